@@ -1,23 +1,57 @@
 """
 Document Processing Pipeline
 Stages: INGEST → EXTRACT → NORMALIZE → METADATA → STORAGE → TRIGGER
+
+Public names are imported from their module on first access, so importing
+the package (or one of its modules) does not load every stage. Call
+``warmup`` in long-lived processes to pay the import cost up front.
 """
-from .pipeline import process_document, PipelineResult, register_trigger
-from .ingest import ingest_document, IngestResult
-from .extract import extract_document, ExtractionResult
-from .normalize import normalize_document, NormalizeResult
-from .metadata import generate_metadata, DocumentMetadata
-
-__all__ = [
-    "process_document",
-    "PipelineResult",
-    "register_trigger",
-    "ingest_document",
-    "IngestResult",
-    "extract_document",
-    "ExtractionResult",
-    "normalize_document",
-    "NormalizeResult",
-    "generate_metadata",
-    "DocumentMetadata",
-]
+# Helpers are imported under private names so that dir() and star-imports
+# of the package only show the public API.
+import importlib as _importlib
+import typing as _typing
+
+# Public name → module that defines it.
+_EXPORTS = {
+    "process_document": ".pipeline",
+    "PipelineResult": ".pipeline",
+    "register_trigger": ".pipeline",
+    "ingest_document": ".ingest",
+    "ingest_many": ".ingest",
+    "BulkIngestStats": ".ingest",
+    "IngestResult": ".ingest",
+    "extract_document": ".extract",
+    "iter_extract_pages": ".extract",
+    "ExtractionReport": ".extract",
+    "ExtractionResult": ".extract",
+    "normalize_document": ".normalize",
+    "NormalizeResult": ".normalize",
+    "generate_metadata": ".metadata",
+    "DocumentMetadata": ".metadata",
+    "warmup": ".startup",
+}
+
+__all__ = list(_EXPORTS)
+
+if _typing.TYPE_CHECKING:
+    from .pipeline import process_document, PipelineResult, register_trigger
+    from .ingest import ingest_document, ingest_many, BulkIngestStats, IngestResult
+    from .extract import extract_document, iter_extract_pages, ExtractionReport, ExtractionResult
+    from .normalize import normalize_document, NormalizeResult
+    from .metadata import generate_metadata, DocumentMetadata
+    from .startup import warmup
+
+
+def __getattr__(name: str) -> _typing.Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(_importlib.import_module(module, __name__), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__() -> _typing.List[str]:
+    """The public API plus module dunders; helpers and loaded submodules are left out."""
+    dunders = {n for n in globals() if n.startswith("__") and n.endswith("__")}
+    return sorted(dunders | set(__all__))
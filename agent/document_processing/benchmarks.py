@@ -0,0 +1,498 @@
+"""
+Micro-benchmarks for the document processing pipeline
+
+Usage:
+    python -m agent.document_processing.benchmarks            # run all
+    python -m agent.document_processing.benchmarks hashing    # run one
+
+Each benchmark prints a small table of throughput numbers comparing the
+previous implementation with the current one. Numbers are best-of-N wall
+clock, so run on an otherwise idle machine when comparing commits.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+_BENCHMARKS: Dict[str, Callable[[], None]] = {}
+
+
+def _benchmark(name: str) -> Callable[[Callable[[], None]], Callable[[], None]]:
+    def register(fn: Callable[[], None]) -> Callable[[], None]:
+        _BENCHMARKS[name] = fn
+        return fn
+    return register
+
+
+def _best_of(fn: Callable[[], object], repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _report(title: str, rows: Sequence[Sequence[str]]) -> None:
+    print(f"\n{title}")
+    widths = [max(len(r[i]) for r in rows) for i in range(len(rows[0]))]
+    for row in rows:
+        print("  " + "  ".join(cell.ljust(w) for cell, w in zip(row, widths)))
+
+
+def _mb_per_s(nbytes: int, seconds: float) -> str:
+    return f"{nbytes / seconds / 1024 / 1024:,.0f} MB/s"
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------------------------------
+
+@_benchmark("hashing")
+def bench_hashing(size_mb: int = 64) -> None:
+    """
+    SHA-256 + MD5: two full passes vs single chunked pass vs spooled ingest.
+    The threaded variants only pull ahead with two or more CPUs.
+    """
+    from .hashing import MultiHasher, hash_buffer
+
+    size = size_mb * 1024 * 1024
+    data = os.urandom(size)
+    chunk = 1024 * 1024
+
+    def two_pass() -> None:
+        hashlib.sha256(data).hexdigest()
+        hashlib.md5(data).hexdigest()
+
+    def spool(background: bool, algorithms: Sequence[str]) -> Callable[[], None]:
+        def run() -> None:
+            src = io.BytesIO(data)
+            hasher = MultiHasher(algorithms, background=background)
+            with tempfile.TemporaryFile() as out:
+                while True:
+                    block = src.read(chunk)
+                    if not block:
+                        break
+                    hasher.update(block)
+                    out.write(block)
+            hasher.hexdigests()
+        return run
+
+    rows: List[List[str]] = [["variant", "throughput"]]
+    cases = [
+        ("two-pass sha256+md5 (bytes)", two_pass),
+        ("single-pass sha256+md5 (bytes)", lambda: hash_buffer(data, background=False)),
+        ("single-pass sha256+md5, per-digest threads", lambda: hash_buffer(data)),
+        ("single-pass sha256 only (bytes)", lambda: hash_buffer(data, ("sha256",))),
+        ("spool + hash, same thread", spool(False, ("sha256", "md5"))),
+        ("spool + hash, background thread", spool(True, ("sha256", "md5"))),
+        ("spool + sha256 only, background", spool(True, ("sha256",))),
+    ]
+    for label, fn in cases:
+        rows.append([label, _mb_per_s(size, _best_of(fn))])
+    _report(f"hashing ({size_mb} MB random input, {os.cpu_count()} CPUs)", rows)
+
+
+@_benchmark("pdf")
+def bench_pdf(path: str = os.getenv("PDF_BENCH_FILE", "")) -> None:
+    """
+    Page-parallel PDF extraction at 1, 2, 4, ... workers, and time to the
+    first page from iter_extract_pages vs the full document.
+    Needs pdfplumber and a long PDF named by PDF_BENCH_FILE.
+    """
+    from . import extract
+
+    if not path or not os.path.isfile(path):
+        print("\npdf: set PDF_BENCH_FILE to a (long) PDF to run this benchmark")
+        return
+    with open(path, "rb") as fh:
+        data = fh.read()
+    page_count, _ = extract._pdf_outline(data)
+
+    saved = extract.PDF_PARALLEL_WORKERS, extract.PDF_PARALLEL_MIN_PAGES
+    counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    rows: List[List[str]] = [["workers", "seconds", "pages/s", "speedup"]]
+    baseline = 0.0
+    try:
+        extract.PDF_PARALLEL_MIN_PAGES = 1
+        for workers in counts:
+            extract.PDF_PARALLEL_WORKERS = workers
+            extract._reset_pdf_pool()
+            run = lambda: extract._extract_pdf(data, "bench", os.path.basename(path), path=path)
+            run()  # warm the pool
+            seconds = _best_of(run, repeat=3)
+            baseline = baseline or seconds
+            rows.append([str(workers), f"{seconds:.2f}", f"{page_count / seconds:,.1f}", f"{baseline / seconds:.2f}x"])
+
+        extract.PDF_PARALLEL_WORKERS = 1
+        first_page = lambda: next(iter(extract.iter_extract_pages(data, "bench", os.path.basename(path))))
+        latency = [["serial", "seconds"],
+                   ["first page (iter_extract_pages)", f"{_best_of(first_page, repeat=3):.3f}"],
+                   ["whole document (extract_document)", f"{baseline:.3f}"]]
+    finally:
+        extract.PDF_PARALLEL_WORKERS, extract.PDF_PARALLEL_MIN_PAGES = saved
+        extract._reset_pdf_pool()
+    _report(f"pdf ({page_count} pages, {os.cpu_count()} CPUs)", rows)
+    _report("pdf time to first result", latency)
+
+
+@_benchmark("tables")
+def bench_tables(rows: int = 200_000) -> None:
+    """Memory for a ledger-shaped sheet: lists of str cells vs ColumnarTable."""
+    import datetime as dt
+    import tracemalloc
+
+    from .tables import ColumnarTable
+
+    vendors = ["Acme", "Globex", "Initech", "Umbrella", "Hooli"]
+    day = dt.date(2024, 1, 1)
+
+    def source():
+        for i in range(rows):
+            yield (i, day + dt.timedelta(days=i % 365), vendors[i % 5], i * 1.25, i % 7 == 0, f"INV-{i:07d}")
+
+    def as_strings():
+        return [[str(c) for c in row] for row in source()]
+
+    def as_columns():
+        return ColumnarTable.from_rows(source(), "ledger", ["id", "date", "vendor", "amount", "paid", "ref"])
+
+    out: List[List[str]] = [["representation", "peak memory", "seconds"]]
+    for label, fn in (("list of str rows (previous)", as_strings), ("ColumnarTable", as_columns)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        kept = fn()
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del kept
+        out.append([label, f"{peak / 1024 / 1024:,.1f} MB", f"{seconds:.2f}"])
+    _report(f"tables ({rows:,} rows x 6 columns)", out)
+
+
+@_benchmark("csv")
+def bench_csv(size_mb: int = 10) -> None:
+    """CSV extraction: whole-file decode + list(csv.reader) vs the streaming extractor."""
+    import csv as _csv
+    import tracemalloc
+
+    from . import extract
+
+    line = "{i},Vendor {v},{a:.2f},2024-03-{d:02d},INV-{i:08d},{flag}\n"
+    parts, size, i = ["id,vendor,amount,date,ref,paid\n"], 0, 0
+    while size < size_mb * 1024 * 1024:
+        row = line.format(i=i, v=i % 40, a=i * 1.17, d=i % 28 + 1, flag="yes" if i % 3 else "")
+        parts.append(row)
+        size += len(row)
+        i += 1
+    data = "".join(parts).encode()
+    del parts
+
+    def previous() -> None:
+        rows = list(_csv.reader(io.StringIO(data.decode())))
+        raw = [" | ".join(r) for r in rows]
+        "\n".join(raw)
+
+    def streaming() -> None:
+        result = extract._extract_csv(data, "bench-csv", "bench.csv")
+        os.unlink(result.metadata["spill_path"])
+
+    out: List[List[str]] = [["variant", "throughput", "peak memory"]]
+    for label, fn in (("list(csv.reader) (previous)", previous), ("streaming + stats + spill", streaming)):
+        seconds = _best_of(fn, repeat=1)
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        out.append([label, _mb_per_s(len(data), seconds), f"{peak / 1024 / 1024:,.1f} MB"])
+    _report(f"csv ({len(data) / 1024 / 1024:.0f} MB, {i:,} rows)", out)
+
+
+@_benchmark("jsonl")
+def bench_jsonl(size_mb: int = 20) -> None:
+    """JSON Lines: whole-file json.loads (previous) vs the line-streaming extractor."""
+    import json
+    import tracemalloc
+
+    from . import extract
+
+    parts, size, i = [], 0, 0
+    while size < size_mb * 1024 * 1024:
+        line = json.dumps({"ts": 1700000000 + i, "event": "click" if i % 3 else "view",
+                           "user": {"id": i % 5000, "country": "DE"}, "value": i * 0.5}) + "\n"
+        parts.append(line)
+        size += len(line)
+        i += 1
+    data = "".join(parts).encode()
+    del parts
+
+    def previous() -> None:
+        # The old .jsonl path: decode everything, json.loads fails on the
+        # second record, and the whole text becomes raw_text.
+        text = data.decode()
+        try:
+            json.loads(text)
+        except ValueError as exc:
+            errors = [f"JSON parse error: {exc}"]
+        page = extract.PageContent(page_number=1, text=text)
+        extract._build_result("bench", "bench.jsonl", "json", text, [page], [], {}, {}, "json",
+                              confidence=0.5, errors=errors, warnings=[])
+
+    out: List[List[str]] = [["variant", "throughput", "peak memory"]]
+    cases = (("whole-file json.loads (previous)", previous),
+             ("line-streaming _extract_jsonl", lambda: extract._extract_jsonl(data, "bench", "bench.jsonl")))
+    for label, fn in cases:
+        seconds = _best_of(fn, repeat=1)
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        out.append([label, _mb_per_s(len(data), seconds), f"{peak / 1024 / 1024:,.1f} MB"])
+    _report(f"jsonl ({len(data) / 1024 / 1024:.0f} MB, {i:,} records)", out)
+
+
+@_benchmark("chunking")
+def bench_chunking(size_mb: int = 10) -> None:
+    """
+    Chunking: 1800-character windows with 20% overlap (previous) vs
+    structure-aware spans, and spans sliced into strings as STORAGE does.
+    "retained" is the memory the chunks hold on top of the text itself.
+    """
+    import tracemalloc
+
+    from .chunking import chunk_document, materialize
+
+    sentence = "The quarterly revenue for the northern region grew by {n} percent year over year. "
+    pages, size, n = [], 0, 0
+    while size < size_mb * 1024 * 1024:
+        parts = [f"{n // 10 + 1}. Regional Summary {n}"]
+        for _ in range(4):
+            parts.append("".join(sentence.format(n=n + k) for k in range(6)).strip())
+        parts.append("\n".join(f"Q{q} | {n * q} | {n * q * 1.1:.2f}" for q in range(1, 5)))
+        page = "\n\n".join(parts)
+        pages.append(page)
+        size += len(page) + 2
+        n += 1
+    text = "\n\n".join(pages)
+
+    def previous(chunk_size: int = 1800) -> list:
+        chunks, overlap, start = [], chunk_size // 5, 0
+        while start < len(text):
+            chunks.append(text[start:start + chunk_size].strip())
+            start += chunk_size - overlap
+        return [c for c in chunks if c]
+
+    cases = (("1800-char windows (previous)", previous),
+             ("chunk_document spans", lambda: chunk_document(text, pages)),
+             ("spans + materialize", lambda: materialize(text, chunk_document(text, pages))))
+    out: List[List[str]] = [["variant", "throughput", "chunks", "retained"]]
+    for label, fn in cases:
+        seconds = _best_of(fn, repeat=3)
+        tracemalloc.start()
+        kept = fn()
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        out.append([label, _mb_per_s(len(text), seconds), f"{len(kept):,}", f"{retained / 1024 / 1024:,.1f} MB"])
+        del kept
+    _report(f"chunking ({len(text) / 1024 / 1024:.0f} MB, {len(pages):,} pages)", out)
+
+
+@_benchmark("cleaning")
+def bench_cleaning(size_mb: int = 5) -> None:
+    """
+    EXTRACT and NORMALIZE text cleaning: the previous regex chains (4 and 6
+    passes, NFKC, per-line boilerplate search) vs clean_raw_text and
+    clean_text(boilerplate=True), one pass each. Outputs are asserted equal.
+    """
+    import re
+    import unicodedata
+
+    from .cleaning import clean_raw_text, clean_text
+
+    boilerplate = re.compile(
+        r"(all rights reserved|confidential and proprietary|this document is|"
+        r"page \d+ of \d+|printed on|do not distribute|internal use only|"
+        r"footer|header|table of contents)",
+        re.IGNORECASE,
+    )
+
+    def previous_extract(text: str) -> str:
+        text = re.sub(r"\r\n", "\n", text)
+        text = re.sub(r"\r", "\n", text)
+        text = re.sub(r"[ \t]+", " ", text)
+        return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+    def previous_normalize(text: str) -> str:
+        text = unicodedata.normalize("NFKC", text)
+        text = text.replace("\x00", "").replace("\ufffd", "?")
+        text = re.sub(r"[^\x09\x0A\x0D\x20-\x7E\x80-\xFF\u0100-\uffff]", " ", text)
+        text = re.sub(r"\r\n?", "\n", text)
+        text = re.sub(r"([!?.]){3,}", r"\1\1\1", text)
+        text = re.sub(r"[ \t]{2,}", " ", text)
+        text = re.sub(r"\n{3,}", "\n\n", text)
+        return "\n".join(line for line in text.split("\n") if not boilerplate.search(line)).strip()
+
+    page = ("Invoice No. {n}   issued to  Globex Corp.\r\n"
+            "Line item\t{n}\tWidgets\t$1,250.00\r\n"
+            "Payment is due within 30 days of receipt....\r\n\r\n\r\n"
+            "Page {n} of 999\r\n"
+            "Thank you for your business!\r\n\r\n")
+    ascii_text = "".join(page.format(n=n) for n in range(size_mb * 1024 * 1024 // len(page)))
+    cases = (("ascii", ascii_text), ("non-ascii", ascii_text.replace("Widgets", "Widgets café ﬁne \U0001f4e6")))
+    out: List[List[str]] = [["input", "stage", "previous", "current"]]
+    for name, text in cases:
+        extracted = clean_raw_text(text)
+        assert extracted == previous_extract(text)
+        assert clean_text(extracted, boilerplate=True) == previous_normalize(extracted)
+        out.append([name, "EXTRACT (clean_raw_text)",
+                    _mb_per_s(len(text), _best_of(lambda: previous_extract(text), 3)),
+                    _mb_per_s(len(text), _best_of(lambda: clean_raw_text(text), 3))])
+        out.append([name, "NORMALIZE (clean_text)",
+                    _mb_per_s(len(extracted), _best_of(lambda: previous_normalize(extracted), 3)),
+                    _mb_per_s(len(extracted), _best_of(lambda: clean_text(extracted, boilerplate=True), 3))])
+    _report(f"cleaning ({size_mb} MB)", out)
+
+
+@_benchmark("charset")
+def bench_charset(size_mb: int = 20) -> None:
+    """
+    Plain-text decode + clean: the previous encoding chain (whole-buffer
+    utf-8, utf-16, latin-1 attempts) then clean_raw_text vs sampled detection
+    and chunked decoding that cleans as it goes.
+    """
+    import tracemalloc
+
+    from . import extract
+    from .cleaning import clean_raw_text
+
+    def previous(data: bytes) -> str:
+        for enc in ("utf-8", "utf-16", "latin-1"):
+            try:
+                return clean_raw_text(str(data, enc))
+            except UnicodeDecodeError:
+                pass
+        return ""
+
+    line = "2024-03-{d:02d} 12:00:{s:02d} INFO  café “order” {i} processed — résumé ok\r\n"
+    text = "".join(line.format(d=i % 28 + 1, s=i % 60, i=i)
+                   for i in range(size_mb * 1024 * 1024 // len(line)))
+    out: List[List[str]] = [["input", "variant", "throughput", "peak memory", "decoded as"]]
+    for name, data in (("utf-8", text.encode("utf-8")), ("cp1252", text.encode("cp1252"))):
+        for label, fn in (("decode chain + clean_raw_text (previous)", lambda: previous(data)),
+                          ("detect + chunked decode/clean", lambda: extract._decode_text(data)[0])):
+            seconds = _best_of(fn, repeat=1)
+            tracemalloc.start()
+            decoded = fn()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            correct = decoded == clean_raw_text(text)
+            out.append([name, label, _mb_per_s(len(data), seconds), f"{peak / 1024 / 1024:,.1f} MB",
+                         "correct" if correct else "mis-decoded"])
+            del decoded
+    _report(f"charset ({size_mb} MB)", out)
+
+
+@_benchmark("sandbox")
+def bench_sandbox(docs: int = 200) -> None:
+    """
+    Per-document cost of extracting in a sandbox worker vs in-process, with
+    and without recycling, plus worker start-up. The sandbox's point is the
+    tail: a document that never finishes costs SANDBOX_TIMEOUT_SECONDS
+    instead of a stuck process.
+    """
+    from . import extract
+    from .sandbox import ExtractorSandbox
+
+    samples = ((b"Invoice 42\nTotal: $1,200.00\n" * 20, "invoice.txt"),
+               (b'{"invoice": 42, "lines": [1, 2, 3]}', "invoice.json"))
+    out: List[List[str]] = [["document", "variant", "ms / document"]]
+    startup: List[List[str]] = [["sandbox", "seconds"]]
+    for recycle in (0, 20):
+        sandbox = ExtractorSandbox(workers=1, max_documents=recycle)
+        try:
+            start = time.perf_counter()
+            sandbox.extract(samples[0][0], "bench", samples[0][1])
+            if not recycle:
+                startup.append(["start + first document", f"{time.perf_counter() - start:.3f}"])
+            for data, name in samples:
+                if not recycle:
+                    seconds = _best_of(lambda: [extract.extract_document(data, "bench", name) for _ in range(docs)], 3)
+                    out.append([name, "in-process", f"{seconds / docs * 1000:.2f}"])
+                seconds = _best_of(lambda: [sandbox.extract(data, "bench", name) for _ in range(docs)], 3)
+                label = f"sandbox, recycled every {recycle}" if recycle else "sandbox"
+                out.append([name, label, f"{seconds / docs * 1000:.2f}"])
+        finally:
+            sandbox.shutdown()
+    _report(f"sandbox ({docs} documents, 1 worker)", out)
+    _report("sandbox start-up", startup)
+
+
+@_benchmark("imports")
+def bench_imports(runs: int = 5) -> None:
+    """
+    Cold import cost, each in a fresh interpreter (median of ``runs``): the
+    lazy package, the five stage modules the package used to import, the
+    entry points, every installed library in startup.FORMATS, and a full
+    warmup(). The package import is checked against IMPORT_BUDGET_MS so a
+    regression shows up as "over".
+    """
+    import statistics
+    import subprocess
+    from pathlib import Path
+
+    from .startup import libraries
+
+    budget_ms = float(os.getenv("IMPORT_BUDGET_MS", "50"))
+    pkg = __package__
+    root = str(Path(__file__).resolve().parents[2])
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, (root, os.getenv("PYTHONPATH"))))}
+    stages = ("pipeline", "ingest", "extract", "normalize", "metadata")
+    cases = [
+        ("package (lazy)", f"import {pkg}"),
+        ("five stage modules (previous package import)", "; ".join(f"import {pkg}.{m}" for m in stages)),
+        ("from package import extract_document", f"from {pkg} import extract_document"),
+        ("from package import process_document", f"from {pkg} import process_document"),
+    ]
+    cases += [(f"import {lib}", f"import {lib}") for lib in libraries()]
+    cases.append(("warmup() (no pools)", f"from {pkg} import warmup; warmup(pools=False, sandbox=False)"))
+
+    def cold(stmt: str) -> Optional[float]:
+        code = f"import time; t = time.perf_counter(); {stmt}; print(time.perf_counter() - t)"
+        proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env)
+        return float(proc.stdout.split()[-1]) if proc.returncode == 0 else None
+
+    out: List[List[str]] = [["import", "ms", "budget"]]
+    for label, stmt in cases:
+        samples = [cold(stmt) for _ in range(runs)]
+        if None in samples:
+            out.append([label, "not installed", ""])
+            continue
+        ms = statistics.median(samples) * 1000
+        verdict = ("ok" if ms <= budget_ms else "over") if label == "package (lazy)" else ""
+        out.append([label, f"{ms:.1f}", verdict])
+    _report(f"imports (fresh interpreter, median of {runs})", out)
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def main(argv: Sequence[str]) -> int:
+    names = list(argv) or list(_BENCHMARKS)
+    unknown = [n for n in names if n not in _BENCHMARKS]
+    if unknown:
+        print(f"Unknown benchmark(s): {', '.join(unknown)}. Available: {', '.join(_BENCHMARKS)}")
+        return 2
+    for name in names:
+        _BENCHMARKS[name]()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
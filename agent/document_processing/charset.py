@@ -0,0 +1,166 @@
+"""
+Charset - encoding detection and incremental decoding for text formats
+
+Detection order (``detect_encoding``), on a bounded sample only:
+  1. Byte-order mark: UTF-8, UTF-32, UTF-16
+  2. Sample windows from the head, middle and tail of the buffer, each
+     aligned to a line start:
+       NUL byte pattern    → BOM-less UTF-16 LE / BE
+       strict UTF-8 check  → "utf-8" (covers ASCII)
+  3. charset-normalizer, then chardet, when installed
+  4. cp1252 if the sample decodes as cp1252, else latin-1
+
+Decoding (``iter_decode`` / ``decode_bytes``) then runs once with the chosen
+codec through an incremental decoder, CHARSET_DECODE_CHUNK_BYTES at a time,
+so nothing is decoded twice and callers can process text chunk by chunk.
+"""
+
+from __future__ import annotations
+
+import codecs
+import os
+from dataclasses import dataclass
+from typing import Iterator, List, Tuple, Union
+
+BufferLike = Union[bytes, bytearray, memoryview]
+
+CHARSET_SAMPLE_BYTES: int = int(os.getenv("CHARSET_SAMPLE_BYTES", str(64 * 1024)))
+CHARSET_DECODE_CHUNK_BYTES: int = int(os.getenv("CHARSET_DECODE_CHUNK_BYTES", str(1024 * 1024)))
+# Detector results below this confidence fall through to cp1252 / latin-1.
+CHARSET_MIN_CONFIDENCE: float = float(os.getenv("CHARSET_MIN_CONFIDENCE", "0.5"))
+
+# Longest first: the UTF-32 LE mark starts with the UTF-16 LE one.
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+@dataclass
+class EncodingGuess:
+    encoding: str       # Python codec name
+    method: str         # "bom", "utf-8", "utf-16", "charset-normalizer", "chardet", "fallback"
+    confidence: float
+
+
+def _sample_windows(data: BufferLike, size: int) -> List[bytes]:
+    """Head, middle and tail of ``data``, ``size`` bytes in total; whole if smaller."""
+    total = len(data)
+    if total <= size:
+        return [bytes(data)]
+    part = size // 4
+    windows = [bytes(data[:2 * part])]
+    for start in (total // 2, total - part):
+        window = bytes(data[start:start + part])
+        # start on a line so no multi-byte character is cut in half
+        nl = window.find(b"\n")
+        if 0 <= nl < len(window) - 1:
+            windows.append(window[nl + 1:])
+    return windows
+
+
+def _utf16_order(sample: bytes) -> str:
+    """"le" / "be" if the NUL bytes look like BOM-less UTF-16 text, else ""."""
+    if len(sample) < 64:
+        return ""
+    even = sample[0::2].count(0) / (len(sample) // 2)
+    odd = sample[1::2].count(0) / (len(sample) // 2)
+    if odd > 0.3 and even < 0.05:
+        return "le"
+    if even > 0.3 and odd < 0.05:
+        return "be"
+    return ""
+
+
+def _lookup(name: str) -> str:
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return ""
+
+
+def _run_detectors(sample: bytes) -> Tuple[str, str, float]:
+    try:
+        from charset_normalizer import from_bytes  # type: ignore
+        matches = from_bytes(sample)
+        best = matches.best()
+        if best is not None and _lookup(best.encoding):
+            # Latin-script samples often tie across the Windows code pages
+            # (or decode identically, listed in could_be_from_charset); take
+            # the most common one rather than the first listed.
+            tied = {name for m in matches if (m.chaos, m.coherence) == (best.chaos, best.coherence)
+                    for name in m.could_be_from_charset}
+            encoding = "cp1252" if "cp1252" in tied else best.encoding
+            return _lookup(encoding), "charset-normalizer", round(1.0 - best.chaos, 3)
+    except ImportError:
+        pass
+    try:
+        import chardet  # type: ignore
+        detected = chardet.detect(sample)
+        if detected.get("encoding") and _lookup(detected["encoding"]):
+            return _lookup(detected["encoding"]), "chardet", round(detected.get("confidence") or 0.0, 3)
+    except ImportError:
+        pass
+    return "", "", 0.0
+
+
+def detect_encoding(data: BufferLike, sample_bytes: int = CHARSET_SAMPLE_BYTES) -> EncodingGuess:
+    """
+    Pick the codec for ``data`` from its BOM or a sample of at most
+    ``sample_bytes``. Never fails; the last resort is latin-1, which
+    decodes any byte string.
+    """
+    head = bytes(data[:4])
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return EncodingGuess(encoding, "bom", 1.0)
+
+    windows = _sample_windows(data, sample_bytes)
+    # before the UTF-8 check: ASCII text in UTF-16 is valid UTF-8 full of NULs
+    order = _utf16_order(windows[0])
+    if order:
+        return EncodingGuess(f"utf-16-{order}", "utf-16", 0.9)
+    last = len(windows) - 1
+    try:
+        for i, window in enumerate(windows):
+            # final=False: a character cut off at the window's end is fine
+            codecs.getincrementaldecoder("utf-8")().decode(window, final=i == last and len(data) <= sample_bytes)
+        return EncodingGuess("utf-8", "utf-8", 0.99)
+    except UnicodeDecodeError:
+        pass
+
+    sample = b"\n".join(windows)
+    encoding, method, confidence = _run_detectors(sample)
+    if encoding and confidence >= CHARSET_MIN_CONFIDENCE:
+        return EncodingGuess(encoding, method, confidence)
+    try:
+        sample.decode("cp1252")
+        return EncodingGuess("cp1252", "fallback", 0.5)
+    except UnicodeDecodeError:
+        return EncodingGuess("latin-1", "fallback", 0.3)
+
+
+def iter_decode(data: BufferLike, encoding: str,
+                chunk_bytes: int = CHARSET_DECODE_CHUNK_BYTES) -> Iterator[str]:
+    """Decode ``data`` in slices of ``chunk_bytes``; undecodable bytes become U+FFFD."""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    view = memoryview(data)
+    try:
+        for start in range(0, len(view), chunk_bytes):
+            text = decoder.decode(view[start:start + chunk_bytes])
+            if text:
+                yield text
+        text = decoder.decode(b"", final=True)
+        if text:
+            yield text
+    finally:
+        view.release()
+
+
+def decode_bytes(data: BufferLike) -> Tuple[str, EncodingGuess]:
+    """(text, guess) for the whole buffer, decoded once with the detected codec."""
+    guess = detect_encoding(data)
+    return str(data, guess.encoding, errors="replace"), guess
@@ -0,0 +1,252 @@
+"""
+Chunking - structure-aware chunks for embedding, as offsets
+
+  A chunk is a ``ChunkSpan(start, end, page, section)`` over one shared text
+  buffer (``ExtractionResult.raw_text``); chunk strings are only sliced out
+  when a consumer such as STORAGE asks for them.
+
+  Boundaries, strongest first:
+    page       → a chunk never crosses a page
+    section    → a heading line starts a new chunk and names the section
+    paragraph  → blank-line separated blocks are packed whole
+    table      → runs of " | " rows stay together; oversized tables split
+                 between rows
+    sentence   → oversized paragraphs split between sentences, then words
+
+  Size is a token budget (CHUNK_MAX_TOKENS) estimated with a word /
+  punctuation regex, which tracks subword tokenizers closely enough for
+  English prose without loading one.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .cleaning import clean_raw_text
+
+CHUNK_MAX_TOKENS: int = int(os.getenv("CHUNK_MAX_TOKENS", "512"))
+CHUNK_OVERLAP_TOKENS: int = int(os.getenv("CHUNK_OVERLAP_TOKENS", "64"))
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_PUNCT_RE = re.compile(r"[^\w\s]")
+# ASCII helpers for count_tokens: the punctuation bytes, and a table
+# mapping whitespace (as str.split sees it) to b" " and the rest to b"x".
+_PUNCT_BYTES = bytes(c for c in range(128) if _PUNCT_RE.match(chr(c)))
+_WORD_SHAPE = bytes(0x20 if chr(c).isspace() else 0x78 for c in range(256))
+# A blank-line separated block, trimmed: from its first to its last
+# non-space character, stopping at a line break that starts a blank line.
+_BLOCK_RE = re.compile(r"\S[^\n]*(?:\n(?![ \t]*\n)[^\n]*)*(?<=\S)")
+_SENTENCE_END_RE = re.compile(r"[.!?][\"')\]]*\s+")
+_LINE_RE = re.compile(r"[^\n]+")
+_HEADING_MAX_CHARS = 100
+_HEADING_RE = re.compile(
+    r"#{1,6}\s+\S.*"                                                   # markdown
+    r"|(?:\d+(?:\.\d+)*\.?|[IVXLC]+\.|(?:Chapter|Section|Article|Part|Appendix)\s+\w+[.:]?)\s+[A-Z].*"
+    r"|[^a-z|]*[A-Z]{3}[^a-z|]*"                                       # ALL CAPS
+)
+_PAGE_PROBE_CHARS = 64
+_FITS_CHARS_PER_TOKEN = 8
+
+
+class ChunkSpan(NamedTuple):
+    """A chunk as offsets into the shared text: ``text[start:end]``."""
+    start: int
+    end: int
+    page: int
+    section: str
+
+
+def count_tokens(text: str, start: int = 0, end: Optional[int] = None) -> int:
+    """
+    Approximate token count of ``text[start:end]``: whitespace-separated
+    words plus punctuation marks. Within a few percent of ``_TOKEN_RE``
+    matches and several times faster. ASCII text (the common case) is
+    counted with bytes.translate / bytes.count, all in C: a word starts at
+    each space-to-non-space step of the text's shape.
+    """
+    part = text[start:end]
+    if part.isascii():
+        data = part.encode("ascii")
+        shape = data.translate(_WORD_SHAPE)
+        words = shape.count(b" x") + shape.startswith(b"x")
+        return words + len(data) - len(data.translate(None, _PUNCT_BYTES))
+    return len(part.split()) + len(_PUNCT_RE.findall(part))
+
+
+def materialize(text: str, spans: Sequence[ChunkSpan]) -> List[str]:
+    return [text[span.start:span.end] for span in spans]
+
+
+def _trim(text: str, start: int, end: int) -> Tuple[int, int]:
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _heading(text: str, start: int, end: int) -> Optional[str]:
+    """Section title if the block is a single heading-like line."""
+    if end - start > _HEADING_MAX_CHARS or text.find("\n", start, end) >= 0:
+        return None
+    line = text[start:end]
+    if line[-1] in ".,;" or not _HEADING_RE.fullmatch(line):
+        return None
+    return line.lstrip("#").strip()
+
+
+def _hard_split(text: str, start: int, end: int, max_tokens: int) -> Iterator[Tuple[int, int, int]]:
+    """Cut a unit with no usable boundary every ``max_tokens`` tokens."""
+    s, count, last = start, 0, start
+    for token in _TOKEN_RE.finditer(text, start, end):
+        if count == max_tokens:
+            yield s, last, count
+            s, count = token.start(), 0
+        count += 1
+        last = token.end()
+    if count:
+        yield s, end, count
+
+
+def _split_block(text: str, start: int, end: int, max_tokens: int) -> Iterator[Tuple[int, int, int]]:
+    """(start, end, tokens) units of an oversized block: table rows or sentences."""
+    if text.count(" | ", start, end) >= text.count("\n", start, end) + 1:
+        cuts = [(m.start(), m.end()) for m in _LINE_RE.finditer(text, start, end)]
+    else:
+        cuts, pos = [], start
+        for m in _SENTENCE_END_RE.finditer(text, start, end):
+            cuts.append((pos, m.end()))
+            pos = m.end()
+        cuts.append((pos, end))
+    for s, e in cuts:
+        s, e = _trim(text, s, e)
+        if s >= e:
+            continue
+        tokens = count_tokens(text, s, e)
+        if tokens <= max_tokens:
+            yield s, e, tokens
+        else:
+            yield from _hard_split(text, s, e, max_tokens)
+
+
+class Chunker:
+    """
+    Packs blocks into spans one page range at a time. The current section
+    carries over from one range to the next, so ``chunk_range`` can be fed
+    pages as they are extracted.
+
+    Parameters
+    ----------
+    max_tokens : int
+        Token budget per chunk.
+    overlap_tokens : int
+        When a chunk fills up, the next one starts with the last block (or
+        sentence) of the previous one if that unit is at most this size.
+        Overlap never crosses a page or section boundary.
+    """
+
+    def __init__(self, max_tokens: int = CHUNK_MAX_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> None:
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.section = ""
+        self._out: List[ChunkSpan] = []
+        self._page = 0
+        self._start: Optional[int] = None
+        self._end = 0
+        self._tokens = 0
+        self._last: Optional[Tuple[int, int, int]] = None
+
+    def _flush(self) -> None:
+        if self._start is not None:
+            self._out.append(ChunkSpan(self._start, self._end, self._page, self.section))
+        self._start = None
+        self._last = None
+
+    def _add(self, start: int, end: int, tokens: int) -> None:
+        if self._start is not None and self._tokens + tokens > self.max_tokens:
+            last = self._last
+            carry = (last is not None and last[0] > self._start
+                     and last[2] <= self.overlap_tokens and last[2] + tokens <= self.max_tokens)
+            self._flush()
+            if carry:
+                self._start, self._tokens = last[0], last[2]
+        if self._start is None:
+            self._start, self._tokens = start, 0
+        self._end = end
+        self._tokens += tokens
+        self._last = (start, end, tokens)
+
+    def chunk_range(self, text: str, start: int, end: int, page: int) -> List[ChunkSpan]:
+        """Spans for ``text[start:end]``, all on ``page``."""
+        self._out, self._page = [], page
+        # A range within budget (most pages) cannot overflow a chunk, so its
+        # blocks are not counted one by one. Ranges too long to plausibly
+        # fit skip the check.
+        fits = (end - start <= _FITS_CHARS_PER_TOKEN * self.max_tokens
+                and count_tokens(text, start, end) <= self.max_tokens)
+        for block in _BLOCK_RE.finditer(text, start, end):
+            s, e = block.span()
+            if e - s <= _HEADING_MAX_CHARS:
+                heading = _heading(text, s, e)
+                if heading is not None:
+                    self._flush()
+                    self.section = heading
+            if fits:
+                self._add(s, e, 0)
+                continue
+            tokens = count_tokens(text, s, e)
+            if tokens <= self.max_tokens:
+                self._add(s, e, tokens)
+            else:
+                for unit in _split_block(text, s, e, self.max_tokens):
+                    self._add(*unit)
+        self._flush()
+        return self._out
+
+
+def locate_pages(text: str, page_texts: Sequence[str]) -> List[Tuple[int, int]]:
+    """
+    (offset, page number) where each page begins in ``text``, found in
+    order by searching for the page's leading characters. Pages that
+    cannot be found (empty, or rewritten on the way into ``text``) fold
+    into the page before them.
+    """
+    starts = [(0, 1)]
+    cursor = 0
+    for number, page in enumerate(page_texts, 1):
+        # Cleaning a prefix of the page gives a prefix of the cleaned page,
+        # so a short window usually suffices; whitespace-heavy page starts
+        # fall back to a wider one.
+        for window in (_PAGE_PROBE_CHARS + 16, 4 * _PAGE_PROBE_CHARS):
+            probe = clean_raw_text(page[:window])[:_PAGE_PROBE_CHARS]
+            if len(probe) == _PAGE_PROBE_CHARS or len(page) <= window:
+                break
+        if not probe:
+            continue
+        at = text.find(probe, cursor)
+        if at < 0:
+            continue
+        if at <= starts[-1][0]:
+            starts[-1] = (starts[-1][0], number)
+        else:
+            starts.append((at, number))
+        cursor = at + len(probe)
+    return starts
+
+
+def chunk_document(
+    text: str,
+    page_texts: Sequence[str] = (),
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+) -> List[ChunkSpan]:
+    """Chunk a whole document; ``page_texts`` (in order) supply the page boundaries."""
+    chunker = Chunker(max_tokens, overlap_tokens)
+    starts = locate_pages(text, page_texts)
+    spans: List[ChunkSpan] = []
+    for i, (offset, page) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else len(text)
+        spans.extend(chunker.chunk_range(text, offset, end, page))
+    return spans
@@ -0,0 +1,127 @@
+"""
+Cleaning - the text cleaning rules of EXTRACT and NORMALIZE
+
+  clean_raw_text    → EXTRACT's rule, lossless apart from whitespace: CR /
+                      CRLF → LF, space and tab runs → one space, three or
+                      more line breaks → a blank line, strip. Characters are
+                      otherwise kept as extracted (no NFKC; emoji, CJK
+                      Ext-B and math letters survive into raw_text and the
+                      chunks).
+  clean_text        → NORMALIZE's rule: Unicode NFKC (skipped when
+                      str.isascii()), NUL removed, U+FFFD → "?", control and
+                      non-BMP characters → space, then space / tab runs,
+                      blank-line runs and repeated punctuation collapsed
+  strip_boilerplate → drop lines containing a boilerplate phrase, found by
+                      one scan of the lower-cased text
+
+  Each is one regex pass that matches only text needing a change, plus
+  str.replace calls made only when the character is present. They give the
+  same output as the per-step regex chains they replace;
+  tests/test_cleaning.py checks that against those chains.
+
+  clean_raw_text is idempotent, and joining its outputs with "\\n\\n" yields
+  clean text, which is what lets chunk offsets survive assembly.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import List
+
+_BOILERPLATE_PHRASES = (
+    r"all rights reserved|confidential and proprietary|this document is|"
+    r"page \d+ of \d+|printed on|do not distribute|internal use only|"
+    r"footer|header|table of contents"
+)
+_BOILERPLATE_RE = re.compile(_BOILERPLATE_PHRASES)
+_BOILERPLATE_ANYCASE_RE = re.compile(_BOILERPLATE_PHRASES, re.IGNORECASE)
+# Lower-case letters that IGNORECASE matches to an ASCII letter but lower()
+# leaves alone (dotless i, long s).
+_CASE_FOLD = str.maketrans({"ı": "i", "ſ": "s"})
+
+# EXTRACT: only runs needing a change match (two or more blanks, a tab,
+# three or more line breaks), so clean text costs no callbacks.
+_RAW_RE = re.compile(r"(?=[ \t\n])(?:[ \t]{2,}|\t|\n{3,})")
+
+# NORMALIZE: characters replaced by a space, i.e. everything outside tab,
+# LF, CR, printable ASCII and the rest of the BMP.
+_TO_SPACE = r"\x01-\x08\x0b\x0c\x0e-\x1f\x7f\U00010000-\U0010ffff"
+# The leading lookahead lets the regex engine skip to candidate characters
+# at C speed instead of trying every alternative at every position.
+_CLEAN_RE = re.compile(
+    rf"(?=[ \t\n!?.{_TO_SPACE}])(?:"
+    rf"[ \t{_TO_SPACE}]{{2,}}|[{_TO_SPACE}]"     # blank runs, odd characters
+    r"|\n{3,}"                                   # over one blank line
+    r"|[!?.]{3,})"                               # punctuation runs
+)
+
+
+def _fix(m: re.Match) -> str:
+    s = m.group()
+    if s[0] == "\n":
+        return "\n\n"
+    if s[0] in "!?.":
+        return s[-1] * 3
+    return " "
+
+
+def clean_raw_text(text: str, strip: bool = True) -> str:
+    """
+    Normalize line breaks and blank runs in extracted text; nothing else.
+    ``strip=False`` keeps leading / trailing whitespace (as cleaned), for
+    text cleaned in pieces that are cut where a whitespace run starts.
+    """
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = _RAW_RE.sub(_fix, text)
+    return text.strip() if strip else text
+
+
+def clean_text(text: str, boilerplate: bool = False) -> str:
+    """
+    Clean text for NORMALIZE.
+
+    Parameters
+    ----------
+    text : str
+        Extracted text (raw or already through clean_raw_text).
+    boilerplate : bool
+        Also drop boilerplate lines, as strip_boilerplate.
+    """
+    if not text.isascii():
+        text = unicodedata.normalize("NFKC", text)
+        if "\ufffd" in text:
+            text = text.replace("\ufffd", "?")
+    if "\x00" in text:
+        text = text.replace("\x00", "")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = _CLEAN_RE.sub(_fix, text)
+    return strip_boilerplate(text) if boilerplate else text.strip()
+
+
+def strip_boilerplate(text: str) -> str:
+    """Drop every line containing a boilerplate phrase."""
+    lowered = text.lower()
+    # A case-sensitive scan of lower-cased text is several times faster than
+    # IGNORECASE, but needs lower() to keep offsets (a few letters do not).
+    if len(lowered) == len(text):
+        if not lowered.isascii():
+            lowered = lowered.translate(_CASE_FOLD)
+        matches = _BOILERPLATE_RE.finditer(lowered)
+    else:
+        matches = _BOILERPLATE_ANYCASE_RE.finditer(text)
+    kept: List[str] = []
+    pos = 0
+    for m in matches:
+        line_start = text.rfind("\n", 0, m.start()) + 1
+        if line_start < pos:
+            continue  # another phrase on a line already dropped
+        line_end = text.find("\n", m.end())
+        kept.append(text[pos:line_start])
+        pos = len(text) if line_end < 0 else line_end + 1
+    if not kept:
+        return text.strip()
+    kept.append(text[pos:])
+    return "".join(kept).strip()
@@ -0,0 +1,500 @@
+"""
+Columnar Files - footer-first readers for Parquet, Feather and Avro
+
+Everything that file metadata can answer comes from metadata. That covers
+the schema, the row count, the row-group layout, and (for Parquet) the
+per-column null/min/max statistics. They are read from the footer or the
+container header without decoding a data page. Data is read only for the
+text sample. Only the row groups that hold the first and last sample rows
+are read, and only the projected columns: flat (non-nested, non-binary)
+fields, at most COLUMNAR_SAMPLE_MAX_COLUMNS of them.
+
+  Parquet  → pyarrow.parquet footer + read_row_group(columns=...)
+  Feather  → batch row counts from the IPC footer and message headers
+             (parsed here); get_batch() with included_fields for the
+             sampled batches only; legacy v1 files via pyarrow.feather
+  Avro     → container and block headers parsed here (no dependency);
+             sample records decoded with fastavro when installed
+
+Arrow sources are opened zero-copy. A path is memory-mapped; an
+in-memory buffer is wrapped in a BufferReader. Uncompressed record
+batches then reference the mapped pages instead of copies.
+"""
+
+from __future__ import annotations
+
+import bz2
+import io
+import json
+import logging
+import lzma
+import os
+import struct
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .tables import ColumnarTable
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_SAMPLE_HEAD_ROWS: int = int(os.getenv("COLUMNAR_SAMPLE_HEAD_ROWS", "1000"))
+COLUMNAR_SAMPLE_TAIL_ROWS: int = int(os.getenv("COLUMNAR_SAMPLE_TAIL_ROWS", "200"))
+COLUMNAR_SAMPLE_MAX_COLUMNS: int = int(os.getenv("COLUMNAR_SAMPLE_MAX_COLUMNS", "64"))
+_STAT_TEXT_LIMIT = 200
+
+BufferLike = Union[bytes, bytearray, memoryview]
+# (group index, [(first row, stop row, is_head), ...]) within that group
+SamplePlan = List[Tuple[int, List[Tuple[int, int, bool]]]]
+
+
+@dataclass
+class ColumnarFileInfo:
+    """What a columnar reader learned about one file."""
+    format: str
+    schema: List[Dict[str, Any]] = field(default_factory=list)
+    row_count: Optional[int] = None
+    row_groups: List[int] = field(default_factory=list)  # rows per row group / batch / block
+    column_stats: List[Dict[str, Any]] = field(default_factory=list)
+    file_metadata: Dict[str, Any] = field(default_factory=dict)
+    sample_columns: List[str] = field(default_factory=list)
+    head: Optional[ColumnarTable] = None
+    tail: Optional[ColumnarTable] = None
+    warnings: List[str] = field(default_factory=list)
+
+    def to_metadata(self) -> Dict[str, Any]:
+        meta: Dict[str, Any] = {
+            "format": self.format,
+            "schema": self.schema,
+            "row_count": self.row_count,
+            "row_groups": len(self.row_groups),
+            "sample_columns": self.sample_columns,
+        }
+        if self.column_stats:
+            meta["column_stats"] = self.column_stats
+        meta.update(self.file_metadata)
+        return meta
+
+
+def _json_value(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        value = bytes(value).decode("utf-8", errors="replace")
+    elif hasattr(value, "isoformat"):
+        value = value.isoformat()
+    else:
+        value = str(value)
+    return value[:_STAT_TEXT_LIMIT]
+
+
+# ---------------------------------------------------------------------------
+# Sampling: read only the groups that hold the head / tail rows
+# ---------------------------------------------------------------------------
+
+def sample_plan(group_rows: Sequence[int], head_rows: int = COLUMNAR_SAMPLE_HEAD_ROWS,
+                tail_rows: int = COLUMNAR_SAMPLE_TAIL_ROWS) -> SamplePlan:
+    """
+    Which groups to read for the first ``head_rows`` and last ``tail_rows``
+    rows, and which row spans within each. Head and tail never overlap.
+    Each group appears at most once.
+    """
+    total = sum(group_rows)
+    head_end = min(head_rows, total)
+    tail_start = max(head_end, total - tail_rows)
+    plan: SamplePlan = []
+    start = 0
+    for i, n in enumerate(group_rows):
+        end = start + n
+        spans = []
+        if n and start < head_end:
+            spans.append((0, min(end, head_end) - start, True))
+        if n and end > tail_start:
+            spans.append((max(tail_start, start) - start, n, False))
+        if spans:
+            plan.append((i, spans))
+        start = end
+    return plan
+
+
+def _new_samples(info: ColumnarFileInfo) -> Tuple[ColumnarTable, ColumnarTable]:
+    info.head = ColumnarTable("head", info.sample_columns)
+    info.tail = ColumnarTable("tail", info.sample_columns)
+    return info.head, info.tail
+
+
+def _arrow_sample(info: ColumnarFileInfo, read_group: Callable[[int], Sequence[Any]]) -> None:
+    """Fill head/tail from Arrow arrays; ``read_group(i)`` returns the projected columns."""
+    head, tail = _new_samples(info)
+    for i, spans in sample_plan(info.row_groups):
+        columns = read_group(i)
+        for lo, hi, is_head in spans:
+            # slice() is zero-copy; only the sampled rows become Python objects
+            (head if is_head else tail).extend_columns(
+                [col.slice(lo, hi - lo).to_pylist() for col in columns], hi - lo,
+            )
+
+
+# ---------------------------------------------------------------------------
+# Arrow-backed formats (Parquet, Feather)
+# ---------------------------------------------------------------------------
+
+def arrow_source(data: BufferLike, path: Optional[str] = None) -> Any:
+    """A zero-copy pyarrow input: a memory map over ``path``, else a view of ``data``."""
+    import pyarrow as pa  # type: ignore
+    if path:
+        return pa.memory_map(path, "r")
+    return pa.BufferReader(pa.py_buffer(data))
+
+
+def _arrow_schema(schema: Any) -> List[Dict[str, Any]]:
+    return [{"name": f.name, "type": str(f.type), "nullable": f.nullable} for f in schema]
+
+
+def _sample_fields(schema: Any, info: ColumnarFileInfo) -> List[str]:
+    """Flat fields to project for the sample; nested and binary columns are skipped."""
+    import pyarrow.types as pat  # type: ignore
+
+    def flat(t: Any) -> bool:
+        if pat.is_dictionary(t):
+            t = t.value_type
+        return not (pat.is_nested(t) or pat.is_binary(t) or pat.is_large_binary(t)
+                    or pat.is_fixed_size_binary(t))
+
+    names = [f.name for f in schema if flat(f.type)]
+    skipped = len(schema) - len(names)
+    if skipped:
+        info.warnings.append(f"{skipped} nested/binary column(s) left out of the text sample")
+    if len(names) > COLUMNAR_SAMPLE_MAX_COLUMNS:
+        info.warnings.append(
+            f"Text sample limited to the first {COLUMNAR_SAMPLE_MAX_COLUMNS} of {len(names)} columns"
+        )
+        names = names[:COLUMNAR_SAMPLE_MAX_COLUMNS]
+    return names
+
+
+def _parquet_footer_stats(md: Any) -> List[Dict[str, Any]]:
+    """Per-leaf-column statistics merged across row groups, from the footer alone."""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for g in range(md.num_row_groups):
+        rg = md.row_group(g)
+        for c in range(rg.num_columns):
+            chunk = rg.column(c)
+            entry = merged.get(chunk.path_in_schema)
+            if entry is None:
+                entry = merged[chunk.path_in_schema] = {
+                    "name": chunk.path_in_schema, "type": chunk.physical_type,
+                    "count": 0, "nulls": 0, "min": None, "max": None,
+                    "compression": chunk.compression,
+                    "compressed_bytes": 0, "uncompressed_bytes": 0,
+                    "stats_complete": True,
+                }
+            entry["count"] += chunk.num_values
+            entry["compressed_bytes"] += chunk.total_compressed_size
+            entry["uncompressed_bytes"] += chunk.total_uncompressed_size
+            stats = chunk.statistics if chunk.is_stats_set else None
+            if stats is None:
+                entry["stats_complete"] = False
+                continue
+            if stats.has_null_count:
+                entry["nulls"] += stats.null_count
+            else:
+                entry["stats_complete"] = False
+            if stats.has_min_max:
+                try:
+                    if entry["min"] is None or stats.min < entry["min"]:
+                        entry["min"] = stats.min
+                    if entry["max"] is None or stats.max > entry["max"]:
+                        entry["max"] = stats.max
+                except TypeError:
+                    entry["stats_complete"] = False
+            elif chunk.num_values > stats.null_count:
+                entry["stats_complete"] = False
+    out = []
+    for entry in merged.values():
+        nulls = entry.pop("nulls")
+        entry["null_rate"] = round(nulls / entry["count"], 4) if entry["count"] else 0.0
+        entry["min"], entry["max"] = _json_value(entry["min"]), _json_value(entry["max"])
+        out.append(entry)
+    return out
+
+
+def read_parquet(source: Any) -> ColumnarFileInfo:
+    """Schema, footer statistics and a head/tail sample of a Parquet file."""
+    import pyarrow.parquet as pq  # type: ignore
+
+    info = ColumnarFileInfo("parquet")
+    pf = pq.ParquetFile(source)
+    md = pf.metadata
+    schema = pf.schema_arrow
+    info.schema = _arrow_schema(schema)
+    info.row_count = md.num_rows
+    info.row_groups = [md.row_group(i).num_rows for i in range(md.num_row_groups)]
+    info.column_stats = _parquet_footer_stats(md)
+    info.file_metadata = {
+        "created_by": md.created_by,
+        "format_version": md.format_version,
+        "footer_bytes": md.serialized_size,
+        "key_value_metadata": sorted(k.decode("utf-8", errors="replace") for k in (md.metadata or {})),
+    }
+    info.sample_columns = _sample_fields(schema, info)
+    if info.sample_columns:
+        _arrow_sample(info, lambda i: pf.read_row_group(i, columns=info.sample_columns).columns)
+    return info
+
+
+# Arrow IPC file layout: each record batch's row count sits in its message
+# header, found through the Block list in the file footer (both are
+# flatbuffers), so the counts are read without touching a batch body.
+_IPC_MAGIC = b"ARROW1"
+_IPC_CONTINUATION = b"\xff\xff\xff\xff"
+_IPC_BLOCK = struct.Struct("<qi4xq")           # offset, metaDataLength, bodyLength
+_IPC_FOOTER_RECORD_BATCHES = 3                 # Footer field index
+_IPC_MESSAGE_HEADER_TYPE, _IPC_MESSAGE_HEADER = 1, 2
+_IPC_HEADER_RECORD_BATCH = 3                   # MessageHeader union tag
+
+
+def _fb_table(buf: bytes, pos: int) -> int:
+    """Target of the flatbuffer uoffset at ``pos``."""
+    return pos + struct.unpack_from("<I", buf, pos)[0]
+
+
+def _fb_field(buf: bytes, table: int, index: int) -> Optional[int]:
+    """Position of field ``index`` of the flatbuffer table at ``table``; None if absent."""
+    vtable = table - struct.unpack_from("<i", buf, table)[0]
+    vtable_size = struct.unpack_from("<H", buf, vtable)[0]
+    if 4 + 2 * index >= vtable_size:
+        return None
+    offset = struct.unpack_from("<H", buf, vtable + 4 + 2 * index)[0]
+    return table + offset if offset else None
+
+
+def _ipc_batch_rows(source: Any) -> Optional[List[int]]:
+    """
+    Rows per record batch of an Arrow IPC file, from the footer's block
+    list and each batch's message header. None if the layout is not the
+    one expected, for the caller to fall back on reading the batches.
+    """
+    try:
+        size = source.size()
+        tail = source.read_at(10, size - 10)
+        if tail[4:] != _IPC_MAGIC:
+            return None
+        footer_len = struct.unpack_from("<i", tail)[0]
+        footer = source.read_at(footer_len, size - 10 - footer_len)
+        pos = _fb_field(footer, _fb_table(footer, 0), _IPC_FOOTER_RECORD_BATCHES)
+        if pos is None:
+            return []
+        vector = _fb_table(footer, pos)
+        count = struct.unpack_from("<I", footer, vector)[0]
+        rows = []
+        for i in range(count):
+            offset, meta_len, _ = _IPC_BLOCK.unpack_from(footer, vector + 4 + i * _IPC_BLOCK.size)
+            meta = source.read_at(meta_len, offset)
+            message = meta[8:] if meta[:4] == _IPC_CONTINUATION else meta[4:]
+            root = _fb_table(message, 0)
+            tag = _fb_field(message, root, _IPC_MESSAGE_HEADER_TYPE)
+            header = _fb_field(message, root, _IPC_MESSAGE_HEADER)
+            if tag is None or header is None or message[tag] != _IPC_HEADER_RECORD_BATCH:
+                return None
+            length = _fb_field(message, _fb_table(message, header), 0)
+            rows.append(struct.unpack_from("<q", message, length)[0] if length is not None else 0)
+        return rows
+    except (struct.error, IndexError, OSError, ValueError):
+        return None
+
+
+def read_feather(source: Any) -> ColumnarFileInfo:
+    """Schema, record-batch layout and a head/tail sample of a Feather (Arrow IPC) file."""
+    import pyarrow as pa  # type: ignore
+
+    info = ColumnarFileInfo("feather")
+    try:
+        footer = pa.ipc.open_file(source)
+    except pa.ArrowInvalid:
+        return _read_feather_v1(source, info)
+    schema = footer.schema
+    info.schema = _arrow_schema(schema)
+    info.file_metadata = {
+        "schema_metadata": sorted(k.decode("utf-8", errors="replace") for k in (schema.metadata or {})),
+    }
+    info.sample_columns = _sample_fields(schema, info)
+    reader = footer
+    if info.sample_columns:
+        # Batches then materialise (and decompress) only the projected columns.
+        wanted = set(info.sample_columns)
+        indices = [i for i, f in enumerate(schema) if f.name in wanted]
+        reader = pa.ipc.open_file(source, options=pa.ipc.IpcReadOptions(included_fields=indices))
+    rows = _ipc_batch_rows(source)
+    if rows is None or len(rows) != footer.num_record_batches:
+        rows = [reader.get_batch(i).num_rows for i in range(reader.num_record_batches)]
+    info.row_groups = rows
+    info.row_count = sum(info.row_groups)
+    if info.sample_columns:
+        _arrow_sample(info, lambda i: reader.get_batch(i).columns)
+    return info
+
+
+def _read_feather_v1(source: Any, info: ColumnarFileInfo) -> ColumnarFileInfo:
+    # Legacy Feather has no batch layout; the (uncompressed) table is read whole.
+    import pyarrow.feather as feather  # type: ignore
+
+    source.seek(0)
+    table = feather.read_table(source)
+    info.file_metadata = {"feather_version": 1}
+    info.schema = _arrow_schema(table.schema)
+    info.row_count = table.num_rows
+    info.row_groups = [table.num_rows]
+    info.sample_columns = _sample_fields(table.schema, info)
+    if info.sample_columns:
+        _arrow_sample(info, lambda i: table.select(info.sample_columns).columns)
+    return info
+
+
+# ---------------------------------------------------------------------------
+# Avro object container files
+# ---------------------------------------------------------------------------
+
+_AVRO_MAGIC = b"Obj\x01"
+_AVRO_SYNC_BYTES = 16
+_AVRO_PRIMITIVES = frozenset({"null", "boolean", "int", "long", "float", "double", "string"})
+
+
+def _avro_codecs() -> Dict[str, Callable[[bytes], bytes]]:
+    codecs: Dict[str, Callable[[bytes], bytes]] = {
+        "null": lambda b: b,
+        "deflate": lambda b: zlib.decompress(b, -15),
+        "bzip2": bz2.decompress,
+        "xz": lzma.decompress,
+    }
+    try:
+        import snappy  # type: ignore
+        codecs["snappy"] = lambda b: snappy.decompress(b[:-4])  # trailing CRC32
+    except ImportError:
+        pass
+    try:
+        import zstandard  # type: ignore
+        codecs["zstandard"] = lambda b: zstandard.ZstdDecompressor().decompressobj().decompress(b)
+    except ImportError:
+        pass
+    return codecs
+
+
+def _read_long(stream: io.IOBase) -> int:
+    """One zig-zag varint."""
+    shift = result = 0
+    while True:
+        b = stream.read(1)
+        if not b:
+            raise EOFError("truncated Avro varint")
+        result |= (b[0] & 0x7F) << shift
+        if not b[0] & 0x80:
+            return (result >> 1) ^ -(result & 1)
+        shift += 7
+
+
+def _read_avro_header(stream: io.IOBase) -> Tuple[Dict[str, bytes], bytes]:
+    if stream.read(4) != _AVRO_MAGIC:
+        raise ValueError("not an Avro object container file")
+    meta: Dict[str, bytes] = {}
+    while True:
+        count = _read_long(stream)
+        if count == 0:
+            break
+        if count < 0:  # negative count: the block's byte size follows
+            _read_long(stream)
+            count = -count
+        for _ in range(count):
+            key = stream.read(_read_long(stream)).decode("utf-8", errors="replace")
+            meta[key] = stream.read(_read_long(stream))
+    return meta, stream.read(_AVRO_SYNC_BYTES)
+
+
+def _iter_avro_blocks(stream: io.IOBase, sync: bytes) -> Iterator[Tuple[int, int, int]]:
+    """(records, data offset, data size) per block; block data is seeked over, not read."""
+    while True:
+        try:
+            count = _read_long(stream)
+        except EOFError:
+            return
+        size = _read_long(stream)
+        offset = stream.tell()
+        stream.seek(size, io.SEEK_CUR)
+        if stream.read(_AVRO_SYNC_BYTES) != sync:
+            raise ValueError(f"Avro sync marker mismatch after byte {offset + size}")
+        yield count, offset, size
+
+
+def _avro_type_name(t: Any) -> str:
+    if isinstance(t, list):
+        return "|".join(_avro_type_name(u) for u in t)
+    if isinstance(t, dict):
+        return t.get("logicalType") or t.get("type", "?")
+    return str(t)
+
+
+def _avro_flat(t: Any) -> bool:
+    if isinstance(t, list):
+        return all(_avro_flat(u) for u in t)
+    if isinstance(t, dict):
+        return t.get("type") == "enum" or (t.get("type") in _AVRO_PRIMITIVES)
+    return t in _AVRO_PRIMITIVES
+
+
+def read_avro(stream: io.IOBase) -> ColumnarFileInfo:
+    """
+    Schema, block layout and a head/tail sample of an Avro container file.
+
+    The row count comes from the block headers; block data is skipped
+    with seek(). Records are decoded only for the sampled blocks, and only
+    when fastavro is installed.
+    """
+    info = ColumnarFileInfo("avro")
+    meta, sync = _read_avro_header(stream)
+    schema = json.loads(meta.get("avro.schema", b"null"))
+    codec = meta.get("avro.codec", b"null").decode("ascii", errors="replace") or "null"
+    fields = schema.get("fields", []) if isinstance(schema, dict) and schema.get("type") == "record" else []
+    info.schema = [
+        {"name": f["name"], "type": _avro_type_name(f["type"]),
+         "nullable": isinstance(f["type"], list) and "null" in f["type"]}
+        for f in fields
+    ]
+    info.file_metadata = {
+        "codec": codec,
+        "record_name": schema.get("name", "") if isinstance(schema, dict) else "",
+        "user_metadata": sorted(k for k in meta if not k.startswith("avro.")),
+    }
+    blocks = list(_iter_avro_blocks(stream, sync))
+    info.row_groups = [count for count, _, _ in blocks]
+    info.row_count = sum(info.row_groups)
+
+    names = [f["name"] for f in fields if _avro_flat(f["type"])]
+    if len(names) < len(fields):
+        info.warnings.append(f"{len(fields) - len(names)} nested column(s) left out of the text sample")
+    info.sample_columns = names[:COLUMNAR_SAMPLE_MAX_COLUMNS]
+    if not info.sample_columns:
+        return info
+    try:
+        import fastavro  # type: ignore
+    except ImportError:
+        info.warnings.append("fastavro not installed; Avro schema and row count only, no sample")
+        return info
+    decompress = _avro_codecs().get(codec)
+    if decompress is None:
+        info.warnings.append(f"Avro codec '{codec}' unavailable; schema and row count only, no sample")
+        return info
+
+    parsed = fastavro.parse_schema(schema)
+    head, tail = _new_samples(info)
+    for i, spans in sample_plan(info.row_groups):
+        _, offset, size = blocks[i]
+        stream.seek(offset)
+        block = io.BytesIO(decompress(stream.read(size)))
+        stop = max(hi for _, hi, _ in spans)
+        records = [fastavro.schemaless_reader(block, parsed) for _ in range(stop)]
+        for lo, hi, is_head in spans:
+            rows = records[lo:hi]
+            (head if is_head else tail).extend_columns(
+                [[r.get(name) for r in rows] for name in info.sample_columns], len(rows),
+            )
+    return info
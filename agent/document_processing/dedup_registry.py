@@ -0,0 +1,267 @@
+"""
+Duplicate Registry - content-hash → file_id lookups for the INGEST stage
+
+Backends:
+  MemoryDuplicateRegistry  → per-process dict (tests, single-worker dev)
+  SQLiteDuplicateRegistry  → on-disk SQLite in WAL mode, shared by every
+                             worker process on the host, survives restarts
+
+Both backends expire entries after a TTL. The SQLite backend keeps a bounded
+in-process LRU front cache so hot hashes never touch the database.
+
+Usage:
+    from agent.document_processing.dedup_registry import get_duplicate_registry
+    registry = get_duplicate_registry()
+    registry.register(sha256, file_id)
+    registry.lookup(sha256)  # → file_id or None
+"""
+
+from __future__ import annotations
+
+import abc
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+DUP_REGISTRY_BACKEND: str = os.getenv("DUP_REGISTRY_BACKEND", "sqlite")  # "sqlite" | "memory"
+DUP_REGISTRY_PATH: Path = Path(os.getenv(
+    "DUP_REGISTRY_PATH",
+    str(Path(os.getenv("TEMP_UPLOAD_DIR", tempfile.gettempdir())) / "doc_processing_state" / "dup_registry.sqlite3"),
+))
+DUP_REGISTRY_TTL_SECONDS: int = int(os.getenv("DUP_REGISTRY_TTL_DAYS", "30")) * 86400
+DUP_REGISTRY_CACHE_SIZE: int = int(os.getenv("DUP_REGISTRY_CACHE_SIZE", "10000"))
+_PURGE_EVERY_N_WRITES = 1000
+_SQL_BATCH = 500  # stays under SQLite's bound-parameter limit
+
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+
+class DuplicateRegistry(abc.ABC):
+    """Interface for sha256 → file_id registries."""
+
+    @abc.abstractmethod
+    def lookup(self, sha256: str) -> Optional[str]:
+        """file_id registered for ``sha256``, or None if unknown or expired."""
+
+    @abc.abstractmethod
+    def register(self, sha256: str, file_id: str) -> None:
+        """Record ``file_id`` as the holder of ``sha256`` (replacing any entry)."""
+
+    def lookup_many(self, hashes: Iterable[str]) -> Dict[str, str]:
+        """Batch lookup; returns only the hashes that are registered."""
+        found = {}
+        for h in hashes:
+            file_id = self.lookup(h)
+            if file_id is not None:
+                found[h] = file_id
+        return found
+
+    def register_many(self, entries: Iterable[Tuple[str, str]]) -> None:
+        for sha256, file_id in entries:
+            self.register(sha256, file_id)
+
+    def purge_expired(self) -> int:
+        """Drop expired entries; return how many were removed."""
+        return 0
+
+
+class MemoryDuplicateRegistry(DuplicateRegistry):
+    """Process-local registry with TTL expiry and a hard size bound."""
+
+    def __init__(self, ttl_seconds: int = DUP_REGISTRY_TTL_SECONDS,
+                 max_entries: int = DUP_REGISTRY_CACHE_SIZE) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, sha256: str) -> Optional[str]:
+        with self._lock:
+            hit = self._entries.get(sha256)
+            if hit is None:
+                return None
+            file_id, expires_at = hit
+            if expires_at <= time.time():
+                del self._entries[sha256]
+                return None
+            self._entries.move_to_end(sha256)
+            return file_id
+
+    def register(self, sha256: str, file_id: str, expires_at: Optional[float] = None) -> None:
+        """Add an entry; ``expires_at`` (epoch seconds) overrides the TTL, e.g. to mirror a DB row."""
+        if expires_at is None:
+            expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._entries[sha256] = (file_id, expires_at)
+            self._entries.move_to_end(sha256)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [h for h, (_, exp) in self._entries.items() if exp <= now]
+            for h in expired:
+                del self._entries[h]
+        return len(expired)
+
+
+class SQLiteDuplicateRegistry(DuplicateRegistry):
+    """
+    SQLite-backed registry shared across worker processes.
+
+    The database runs in WAL mode so readers in one worker never block a
+    writer in another. Lookups are primary-key probes; positive hits are kept
+    in a bounded per-process LRU. Negative results are never cached, because
+    another worker may register the hash at any moment.
+    """
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS seen_hashes ("
+        " sha256 TEXT PRIMARY KEY,"
+        " file_id TEXT NOT NULL,"
+        " expires_at REAL NOT NULL"
+        ") WITHOUT ROWID",
+        "CREATE INDEX IF NOT EXISTS idx_seen_hashes_expires ON seen_hashes(expires_at)",
+    )
+
+    def __init__(self, path: Path = DUP_REGISTRY_PATH,
+                 ttl_seconds: int = DUP_REGISTRY_TTL_SECONDS,
+                 cache_size: int = DUP_REGISTRY_CACHE_SIZE) -> None:
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self._cache = MemoryDuplicateRegistry(ttl_seconds=ttl_seconds, max_entries=cache_size)
+        self._local = threading.local()
+        self._writes = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connection()
+        for stmt in self._SCHEMA:
+            conn.execute(stmt)
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread, re-opened after fork (connections must
+        # not cross process boundaries).
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def lookup(self, sha256: str) -> Optional[str]:
+        cached = self._cache.lookup(sha256)
+        if cached is not None:
+            return cached
+        row = self._connection().execute(
+            "SELECT file_id, expires_at FROM seen_hashes WHERE sha256 = ?", (sha256,),
+        ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        # Cached until the row itself expires, not for a fresh TTL.
+        self._cache.register(sha256, row[0], expires_at=row[1])
+        return row[0]
+
+    def lookup_many(self, hashes: Iterable[str]) -> Dict[str, str]:
+        # Cache first, then one IN (...) query per _SQL_BATCH misses.
+        found: Dict[str, str] = {}
+        misses = []
+        for h in dict.fromkeys(hashes):
+            cached = self._cache.lookup(h)
+            if cached is not None:
+                found[h] = cached
+            else:
+                misses.append(h)
+        conn = self._connection()
+        now = time.time()
+        for i in range(0, len(misses), _SQL_BATCH):
+            part = misses[i:i + _SQL_BATCH]
+            rows = conn.execute(
+                f"SELECT sha256, file_id, expires_at FROM seen_hashes WHERE expires_at > ? "
+                f"AND sha256 IN ({','.join('?' * len(part))})", (now, *part),
+            ).fetchall()
+            for sha256, file_id, expires_at in rows:
+                found[sha256] = file_id
+                self._cache.register(sha256, file_id, expires_at=expires_at)
+        return found
+
+    def register_many(self, entries: Iterable[Tuple[str, str]]) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        rows = [(sha256, file_id, expires_at) for sha256, file_id in entries]
+        if not rows:
+            return
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR REPLACE INTO seen_hashes (sha256, file_id, expires_at) VALUES (?, ?, ?)", rows,
+            )
+        for sha256, file_id, _ in rows:
+            self._cache.register(sha256, file_id, expires_at=expires_at)
+        before, self._writes = self._writes, self._writes + len(rows)
+        if before // _PURGE_EVERY_N_WRITES != self._writes // _PURGE_EVERY_N_WRITES:
+            self.purge_expired()
+
+    def register(self, sha256: str, file_id: str) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        self._connection().execute(
+            "INSERT OR REPLACE INTO seen_hashes (sha256, file_id, expires_at) VALUES (?, ?, ?)",
+            (sha256, file_id, expires_at),
+        )
+        self._cache.register(sha256, file_id, expires_at=expires_at)
+        self._writes += 1
+        if self._writes % _PURGE_EVERY_N_WRITES == 0:
+            self.purge_expired()
+
+    def purge_expired(self) -> int:
+        self._cache.purge_expired()
+        cur = self._connection().execute(
+            "DELETE FROM seen_hashes WHERE expires_at <= ?", (time.time(),),
+        )
+        return cur.rowcount
+
+
+# ---------------------------------------------------------------------------
+# Process-wide registry
+# ---------------------------------------------------------------------------
+
+_REGISTRY: Optional[DuplicateRegistry] = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def set_duplicate_registry(registry: DuplicateRegistry) -> None:
+    """Install a registry backend (e.g. a Redis-backed implementation)."""
+    global _REGISTRY
+    _REGISTRY = registry
+
+
+def get_duplicate_registry() -> DuplicateRegistry:
+    """Return the configured registry, creating it from env settings on first use."""
+    global _REGISTRY
+    if _REGISTRY is None:
+        with _REGISTRY_LOCK:
+            if _REGISTRY is None:
+                if DUP_REGISTRY_BACKEND == "memory":
+                    _REGISTRY = MemoryDuplicateRegistry()
+                else:
+                    try:
+                        _REGISTRY = SQLiteDuplicateRegistry()
+                    except (OSError, sqlite3.Error) as exc:
+                        logger.warning("SQLite duplicate registry unavailable (%s); using in-memory", exc)
+                        _REGISTRY = MemoryDuplicateRegistry()
+    return _REGISTRY
@@ -2,41 +2,77 @@
 Text & Data Extraction - Stage 2 of the Processing Pipeline
 
 Handles extraction from every major document type:
-  PDF        → pdfplumber (tables + text) with PyPDF2 fallback
+  PDF        → pdfplumber (tables + text) with per-page-range PyPDF2
+               fallback; long documents split across a process pool;
+               pages without a text layer rasterized + OCR'd in parallel
   DOCX/ODT   → python-docx / odfpy
-  XLSX/XLS   → openpyxl / xlrd
-  CSV/TSV    → csv stdlib
+  XLSX/XLS   → openpyxl read-only streaming into columnar tables
+  CSV/TSV    → csv stdlib, streamed: column stats + head/tail sample,
+               full data spilled to a columnar file
   PPTX       → python-pptx
-  Images     → Pillow + pytesseract OCR
-  HTML/XML   → BeautifulSoup4 / lxml
-  JSON/JSONL → stdlib json
-  TXT/MD/RST → direct read with charset detection
+  Images     → ocr.OcrEngine: pooled tesserocr / pytesseract, cached by SHA-256
+  HTML/XML   → lxml / stdlib incremental parsers (streamed, no tree)
+  JSON       → stdlib json
+  JSONL      → line-streamed: reservoir-sampled schema, capped text
+  TXT/MD/RST → charset detection on a sample, then decoded and cleaned
+               in chunks
   YAML/TOML  → pyyaml / tomllib
-  Parquet    → pyarrow / pandas
-  Email      → email stdlib
-  Archives   → zipfile / tarfile (flat listing, no recursion)
+  Parquet    → pyarrow footer stats + row-group head/tail sample
+  Feather    → pyarrow.ipc (memory-mapped, projected batches)
+  Avro       → container headers parsed directly; fastavro for the sample
+  Email      → email stdlib, attachments extracted concurrently
+  Archives   → zipfile / tarfile, members streamed and extracted in
+               parallel (recursively, with zip-bomb guards)
   Code files → language-aware tokenisation
-  Fallback   → chardet / charset-normalizer raw decode
+  Fallback   → plain-text decode (charset-normalizer / chardet when the
+               sample is not UTF-8)
 
-Each extractor returns a unified ExtractionResult.
+Each extractor returns a unified ExtractionResult. iter_extract_pages()
+yields PageContent as pages become ready (page by page for PDF) so later
+stages can start before the whole document is parsed.
 """
 
 from __future__ import annotations
 
+import codecs
 import csv
+import hashlib
 import io
 import json
 import logging
+import mimetypes
+import math
 import os
+import random
 import re
+import tempfile
+import threading
 import traceback
-from dataclasses import dataclass, field, asdict
+from collections import deque
+from itertools import islice
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field, asdict, replace
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from . import columnar
+from .charset import EncodingGuess, decode_bytes, detect_encoding, iter_decode
+from .chunking import ChunkSpan, Chunker, chunk_document, materialize
+from .cleaning import clean_raw_text
+from .mime import WEAK_SIGNATURE_MIMES, detect_mime
+from .ocr import get_ocr_engine, ocr_pdf_page
+from .tables import (
+    TABLE_TEXT_MAX_ROWS, ColumnarSpillWriter, ColumnarTable, ColumnStats, parse_column,
+)
+from .temp_store import get_temp_store
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever extractor output changes; keys the stage result cache.
+STAGE_VERSION = "18"
+
 # ---------------------------------------------------------------------------
 # Data structures
 # ---------------------------------------------------------------------------
@@ -67,31 +103,86 @@ class ExtractionResult:
     page_count: int
     extraction_method: str      # which library was used
     confidence: float           # 0–1 overall quality score
-    chunks: List[str]           # text chunks for embedding (≈ 512 tokens)
+    chunk_spans: List[ChunkSpan]  # chunks for embedding, as offsets into raw_text
     errors: List[str] = field(default_factory=list)
     warnings: List[str] = field(default_factory=list)
+    # Full tabular data (spreadsheets) in typed column storage; ``tables``
+    # only carries the capped text rendition for these.
+    columnar_tables: List[ColumnarTable] = field(default_factory=list)
+    # raw_text already went through cleaning.clean_raw_text, so it is not
+    # cleaned again when the result is assembled.
+    text_clean: bool = False
+
+    @property
+    def chunks(self) -> List[str]:
+        """Chunk texts, sliced from ``raw_text`` on each access."""
+        return materialize(self.raw_text, self.chunk_spans)
 
     def to_dict(self) -> Dict:
-        return asdict(self)
+        d = asdict(replace(self, columnar_tables=[]))
+        d["columnar_tables"] = [t.schema() for t in self.columnar_tables]
+        d["chunks"] = self.chunks
+        return d
+
+
+@dataclass
+class ExtractionReport:
+    """
+    Everything about an extraction except its pages, filled in by
+    ``iter_extract_pages`` as it runs. Final once the generator is exhausted.
+    """
+    document_type: str = ""
+    extraction_method: str = ""
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    key_value_pairs: Dict[str, Any] = field(default_factory=dict)
+    tables: List[List[List[str]]] = field(default_factory=list)
+    confidence: float = 0.0
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    # Set when the format has no page-streaming extractor and the whole
+    # document was extracted up front.
+    result: Optional[ExtractionResult] = None
 
 
 # ---------------------------------------------------------------------------
 # Helper utilities
 # ---------------------------------------------------------------------------
 
-_CHUNK_SIZE = 1800  # characters per chunk (≈ 512 tokens)
-
+class PageChunker:
+    """
+    Incremental chunking for streamed pages: feed page texts as they are
+    extracted and get back that page's spans at once (chunks never cross
+    pages). ``text`` is the cleaned pages joined by blank lines, the buffer
+    the spans point into and the document's raw_text.
+    """
 
-def _chunk_text(text: str, chunk_size: int = _CHUNK_SIZE) -> List[str]:
-    """Split text into overlapping chunks for vector embedding."""
-    chunks: List[str] = []
-    overlap = chunk_size // 5
-    start = 0
-    while start < len(text):
-        end = start + chunk_size
-        chunks.append(text[start:end].strip())
-        start += chunk_size - overlap
-    return [c for c in chunks if c]
+    def __init__(self) -> None:
+        self.spans: List[ChunkSpan] = []
+        self._chunker = Chunker()
+        self._parts: List[str] = []
+        self._length = 0
+        self._pages = 0
+
+    def feed(self, text: str, page_number: Optional[int] = None, clean: bool = False) -> List[ChunkSpan]:
+        self._pages += 1
+        if not clean:
+            text = clean_raw_text(text)
+        if not text:
+            return []
+        if self._parts:
+            self._length += 2  # the "\n\n" joining pages in ``text``
+        base = self._length
+        self._parts.append(text)
+        self._length += len(text)
+        page = page_number or self._pages
+        spans = [span._replace(start=span.start + base, end=span.end + base)
+                 for span in self._chunker.chunk_range(text, 0, len(text), page)]
+        self.spans.extend(spans)
+        return spans
+
+    @property
+    def text(self) -> str:
+        return "\n\n".join(self._parts)
 
 
 def _detect_language(text: str) -> str:
@@ -108,29 +199,95 @@ def _detect_language(text: str) -> str:
     return max(scores, key=scores.get) if any(scores.values()) else "unknown"
 
 
-def _clean_raw_text(text: str) -> str:
-    text = re.sub(r"\r\n", "\n", text)
-    text = re.sub(r"\r", "\n", text)
-    text = re.sub(r"[ \t]+", " ", text)
-    text = re.sub(r"\n{3,}", "\n\n", text)
-    return text.strip()
+BufferLike = Union[bytes, bytearray, memoryview]
 
 
-def _decode_bytes(data: bytes) -> str:
-    """Try common encodings with chardet fallback."""
-    for enc in ("utf-8", "utf-16", "latin-1", "cp1252"):
-        try:
-            return data.decode(enc)
-        except (UnicodeDecodeError, LookupError):
-            pass
-    try:
-        import chardet  # type: ignore
-        detected = chardet.detect(data)
-        enc = detected.get("encoding") or "utf-8"
-        return data.decode(enc, errors="replace")
-    except ImportError:
-        pass
-    return data.decode("utf-8", errors="replace")
+class _BufferReader(io.RawIOBase):
+    """
+    Seekable, read-only file object over a bytes-like buffer.
+
+    Unlike ``io.BytesIO(memoryview)``, which copies the whole buffer, this
+    only copies the ranges actually read, so extractors that take file-like
+    objects can parse an mmap'd temp file without a second full copy.
+    """
+
+    def __init__(self, buf: BufferLike) -> None:
+        super().__init__()
+        self._view = memoryview(buf).cast("B")
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = len(self._view) + offset
+        else:
+            raise ValueError(f"invalid whence ({whence})")
+        if pos < 0:
+            raise ValueError(f"negative seek position {pos}")
+        self._pos = pos
+        return pos
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        end = len(self._view) if size is None or size < 0 else min(self._pos + size, len(self._view))
+        if end <= self._pos:
+            return b""
+        chunk = self._view[self._pos:end].tobytes()
+        self._pos = end
+        return chunk
+
+    def readall(self) -> bytes:
+        return self.read()
+
+    def readinto(self, b) -> int:
+        chunk = self._view[self._pos:self._pos + len(b)]
+        n = len(chunk)
+        memoryview(b).cast("B")[:n] = chunk
+        self._pos += n
+        return n
+
+    def readline(self, size: Optional[int] = -1) -> bytes:
+        end = len(self._view) if size is None or size < 0 else min(self._pos + size, len(self._view))
+        start = pos = self._pos
+        while pos < end:
+            window = self._view[pos:min(pos + 8192, end)].tobytes()
+            nl = window.find(b"\n")
+            if nl >= 0:
+                end = pos + nl + 1
+                break
+            pos += len(window)
+        if end <= start:
+            return b""
+        self._pos = end
+        return self._view[start:end].tobytes()
+
+    def close(self) -> None:
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+def _as_stream(data: BufferLike) -> io.IOBase:
+    """Seekable binary stream over ``data`` without copying the buffer."""
+    if isinstance(data, bytes):
+        return io.BytesIO(data)  # shares the immutable bytes object
+    return _BufferReader(data)
+
+
+def _as_bytes(data: BufferLike) -> bytes:
+    """Materialize ``data`` as bytes for libraries that insist on it."""
+    return data if isinstance(data, bytes) else bytes(data)
 
 
 def _build_result(
@@ -146,8 +303,13 @@ def _build_result(
     confidence: float,
     errors: List[str],
     warnings: List[str],
+    chunk_spans: Optional[List[ChunkSpan]] = None,
+    text_clean: bool = False,
 ) -> ExtractionResult:
-    raw_text = _clean_raw_text(raw_text)
+    if not text_clean:
+        raw_text = clean_raw_text(raw_text)
+    if chunk_spans is None:
+        chunk_spans = chunk_document(raw_text, [page.text for page in pages])
     return ExtractionResult(
         success=len(errors) == 0,
         file_id=file_id,
@@ -164,71 +326,338 @@ def _build_result(
         page_count=len(pages) or 1,
         extraction_method=method,
         confidence=confidence,
-        chunks=_chunk_text(raw_text),
+        chunk_spans=chunk_spans,
         errors=errors,
         warnings=warnings,
+        text_clean=True,
     )
 
 
+def build_extraction_result(
+    file_id: str,
+    filename: str,
+    pages: List[PageContent],
+    report: ExtractionReport,
+    chunker: Optional[PageChunker] = None,
+) -> ExtractionResult:
+    """
+    Assemble an ExtractionResult from streamed pages. This is where the
+    full-document string gets built; pass the PageChunker the pages were
+    fed to and its buffer and spans are used as they are.
+    """
+    if report.result is not None:
+        return report.result
+    return _build_result(
+        file_id, filename, report.document_type or "unknown",
+        chunker.text if chunker else "\n\n".join(p.text for p in pages),
+        pages, report.tables, report.key_value_pairs, report.metadata,
+        report.extraction_method, report.confidence,
+        errors=report.errors, warnings=report.warnings,
+        chunk_spans=chunker.spans if chunker else None, text_clean=chunker is not None,
+    )
+
+
+# Metadata naming per-upload side files. The temp-store janitor deletes
+# those after their TTL, so a cached result must not point at them.
+_UPLOAD_LOCAL_METADATA = ("spill_path", "spill_row_groups")
+
+
+def cacheable_result(result: ExtractionResult) -> ExtractionResult:
+    """``result`` as the stage cache keeps it: without per-upload side-file metadata."""
+    if not any(key in result.metadata for key in _UPLOAD_LOCAL_METADATA):
+        return result
+    metadata = {k: v for k, v in result.metadata.items() if k not in _UPLOAD_LOCAL_METADATA}
+    return replace(result, metadata=metadata)
+
+
 # ---------------------------------------------------------------------------
-# Extractors
+# PDF (page-range workers)
 # ---------------------------------------------------------------------------
 
-def _extract_pdf(data: bytes, file_id: str, filename: str) -> ExtractionResult:
-    errors, warnings, pages, tables, kv, meta = [], [], [], [], {}, {}
-    raw_parts = []
-    method = "pdfplumber"
+PDF_PARALLEL_WORKERS: int = int(os.getenv("PDF_PARALLEL_WORKERS", str(os.cpu_count() or 1)))
+PDF_PARALLEL_MIN_PAGES: int = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "32"))
+PDF_PAGES_PER_TASK: int = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+PDF_OCR_ENABLED: bool = os.getenv("PDF_OCR_ENABLED", "1") not in ("0", "false", "no")
+PDF_OCR_MIN_CHARS: int = int(os.getenv("PDF_OCR_MIN_CHARS", "16"))
+
+PdfSource = Union[str, BufferLike]
+
+_PDF_POOL: Optional[ProcessPoolExecutor] = None
+_PDF_POOL_PID = 0
+_PDF_POOL_LOCK = threading.Lock()
+
+
+@dataclass
+class _PdfRange:
+    """Output of one page-range task; merged in page order."""
+    first: int
+    last: int
+    pages: List[PageContent] = field(default_factory=list)
+    methods: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
 
+def _open_pdf_source(source: PdfSource) -> io.IOBase:
+    return open(source, "rb") if isinstance(source, str) else _as_stream(source)
+
+
+def _iter_pdf_pdfplumber(source: PdfSource, first: int, last: int) -> Iterator[PageContent]:
+    import pdfplumber  # type: ignore
+    with _open_pdf_source(source) as fh, pdfplumber.open(fh, pages=list(range(first, last + 1))) as pdf:
+        for page in pdf.pages:
+            text = page.extract_text() or ""
+            clean_tables = [
+                [[str(c or "").strip() for c in row] for row in tbl]
+                for tbl in page.extract_tables() or []
+            ]
+            yield PageContent(
+                page_number=page.page_number,
+                text=text,
+                tables=clean_tables,
+                images_found=len(page.images),
+            )
+
+
+def _iter_pdf_pypdf2(source: PdfSource, first: int, last: int) -> Iterator[PageContent]:
+    import PyPDF2  # type: ignore
+    with _open_pdf_source(source) as fh:
+        reader = PyPDF2.PdfReader(fh)
+        for i in range(first, min(last, len(reader.pages)) + 1):
+            yield PageContent(page_number=i, text=reader.pages[i - 1].extract_text() or "")
+
+
+def _iter_pdf_range(source: PdfSource, first: int, last: int, out: _PdfRange) -> Iterator[PageContent]:
+    """
+    Yield pages ``first``..``last`` (1-based, inclusive) from ``source``.
+
+    If pdfplumber fails part-way, the pages it has not produced yet are
+    retried with PyPDF2; other ranges are unaffected. Methods, warnings and
+    errors are recorded on ``out``.
+    """
+    next_page = first
+    try:
+        for page in _iter_pdf_pdfplumber(source, first, last):
+            next_page = page.page_number + 1
+            yield page
+        out.methods.append("pdfplumber")
+        return
+    except Exception as exc:
+        if next_page > first:
+            out.methods.append("pdfplumber")
+        out.warnings.append(f"pdfplumber failed on pages {next_page}-{last} ({exc}); trying PyPDF2")
+    try:
+        yield from _iter_pdf_pypdf2(source, next_page, last)
+        out.methods.append("PyPDF2")
+    except Exception as exc2:
+        out.methods.append("failed")
+        out.errors.append(f"PDF extraction failed on pages {next_page}-{last}: {exc2}")
+
+
+def _extract_pdf_range(source: PdfSource, first: int, last: int) -> _PdfRange:
+    """Pool task: extract one page range in full."""
+    out = _PdfRange(first, last)
+    out.pages = list(_iter_pdf_range(source, first, last, out))
+    return out
+
+
+def _pdf_pool() -> ProcessPoolExecutor:
+    global _PDF_POOL, _PDF_POOL_PID
+    with _PDF_POOL_LOCK:
+        if _PDF_POOL is None or _PDF_POOL_PID != os.getpid():
+            _PDF_POOL = ProcessPoolExecutor(max_workers=PDF_PARALLEL_WORKERS)
+            _PDF_POOL_PID = os.getpid()
+        return _PDF_POOL
+
+
+def _reset_pdf_pool() -> None:
+    global _PDF_POOL
+    with _PDF_POOL_LOCK:
+        if _PDF_POOL is not None and _PDF_POOL_PID == os.getpid():
+            _PDF_POOL.shutdown(wait=False, cancel_futures=True)
+        _PDF_POOL = None
+
+
+def _pdf_outline(data: BufferLike) -> Tuple[int, Dict]:
+    """(page count, document metadata) without extracting any page content."""
     try:
         import pdfplumber  # type: ignore
-        with pdfplumber.open(io.BytesIO(data)) as pdf:
-            meta = pdf.metadata or {}
-            for i, page in enumerate(pdf.pages, 1):
-                text = page.extract_text() or ""
-                page_tables = page.extract_tables() or []
-                # clean tables
-                clean_tables = [
-                    [[str(c or "").strip() for c in row] for row in tbl]
-                    for tbl in page_tables
-                ]
-                tables.extend(clean_tables)
-                raw_parts.append(text)
-                pages.append(PageContent(
-                    page_number=i,
-                    text=text,
-                    tables=clean_tables,
-                    images_found=len(page.images),
-                ))
+        with pdfplumber.open(_as_stream(data)) as pdf:
+            return len(pdf.pages), dict(pdf.metadata or {})
+    except Exception:
+        import PyPDF2  # type: ignore
+        reader = PyPDF2.PdfReader(_as_stream(data))
+        return len(reader.pages), dict(reader.metadata or {})
+
+
+def _page_ranges(page_count: int, per_task: int) -> List[Tuple[int, int]]:
+    return [(p, min(p + per_task - 1, page_count)) for p in range(1, page_count + 1, per_task)]
+
+
+def _iter_pdf_ranges_parallel(path: str, ranges: List[Tuple[int, int]]) -> Iterator[_PdfRange]:
+    """Run ranges on the pool, yielding each in page order as soon as it is done."""
+    futures = []
+    try:
+        futures = [_pdf_pool().submit(_extract_pdf_range, path, first, last) for first, last in ranges]
+        for i, fut in enumerate(futures):
+            try:
+                yield fut.result()
+            except BrokenProcessPool as exc:
+                # A worker died (OOM, segfault in a native lib): rebuild the
+                # pool next time and finish this document in-process.
+                logger.warning("PDF worker pool broke (%s); extracting serially", exc)
+                _reset_pdf_pool()
+                for first, last in ranges[i:]:
+                    yield _extract_pdf_range(path, first, last)
+                return
+    finally:
+        for fut in futures:
+            fut.cancel()
+
+
+def _needs_ocr(page: PageContent) -> bool:
+    """No usable text layer: nothing at all, or a few stray glyphs over an image."""
+    text = page.text.strip()
+    return not text or (page.images_found > 0 and len(text) < PDF_OCR_MIN_CHARS)
+
+
+def _ocr_textless_pages(pages: Iterator[PageContent], data: BufferLike, source_path: Callable[[], str],
+                        report: ExtractionReport, methods: List[str]) -> Iterator[PageContent]:
+    """
+    Pass ``pages`` through in order, OCR-ing the ones without a text layer.
+
+    Text-less pages are rasterized and OCR'd on the OCR process pool while
+    later pages are still being parsed. A page is yielded as soon as it and
+    every page before it are complete. Pages with text are never rasterized.
+    """
+    engine = get_ocr_engine() if PDF_OCR_ENABLED else None
+    pending: deque = deque()  # (page, OCR future or None), in page order
+    doc_sha256 = ""
+    ocr_pages: List[Dict[str, Any]] = []
+
+    def complete(page: PageContent, fut: Any) -> PageContent:
+        path = source_path()
+        ocr = engine.wait(fut, retry=lambda: ocr_pdf_page(path, page.page_number))
+        text = ocr.text.strip() if ocr.ok else ""
+        if text:
+            page.text = ocr.text
+        page.confidence = ocr.confidence if text else 0.0
+        if ocr.warning and ocr.warning not in report.warnings:
+            report.warnings.append(ocr.warning)
+        ocr_pages.append({
+            "page": page.page_number, "ms": 0.0 if ocr.cached else round(ocr.seconds * 1000, 1),
+            "confidence": round(page.confidence, 3), "engine": ocr.engine,
+            "cached": ocr.cached, "chars": len(text),
+        })
+        return page
+
+    try:
+        for page in pages:
+            fut = None
+            if engine is not None and _needs_ocr(page):
+                doc_sha256 = doc_sha256 or hashlib.sha256(data).hexdigest()
+                fut = engine.submit_pdf_page(source_path(), page.page_number, doc_sha256)
+            pending.append((page, fut))
+            while pending and (pending[0][1] is None or pending[0][1].done()):
+                page, fut = pending.popleft()
+                yield page if fut is None else complete(page, fut)
+        while pending:
+            page, fut = pending.popleft()
+            yield page if fut is None else complete(page, fut)
+    finally:
+        for _, fut in pending:
+            if fut is not None:
+                fut.cancel()
+        if ocr_pages:
+            report.metadata["ocr_pages"] = ocr_pages
+            report.metadata["ocr_seconds"] = round(sum(p["ms"] for p in ocr_pages) / 1000, 3)
+            if any(p["chars"] for p in ocr_pages):
+                methods.append("ocr")
+
+
+def _iter_pdf_pages(data: BufferLike, report: ExtractionReport, path: Optional[str] = None) -> Iterator[PageContent]:
+    """
+    Yield a PDF's pages in order, splitting long documents across a process pool.
+
+    Documents with at least ``PDF_PARALLEL_MIN_PAGES`` pages are cut into
+    ``PDF_PAGES_PER_TASK``-page ranges; each worker opens the file at
+    ``path`` itself (the buffer is spilled to a temp file if no path is
+    given). Shorter documents are parsed in-process one page at a time.
+    Pages without a text layer are OCR'd on the OCR pool (see
+    ``_ocr_textless_pages``).
+    """
+    report.document_type = "pdf"
+    try:
+        page_count, report.metadata = _pdf_outline(data)
     except Exception as exc:
-        warnings.append(f"pdfplumber failed ({exc}); trying PyPDF2")
-        method = "PyPDF2"
-        try:
-            import PyPDF2  # type: ignore
-            reader = PyPDF2.PdfReader(io.BytesIO(data))
-            meta = dict(reader.metadata or {})
-            for i, page in enumerate(reader.pages, 1):
-                text = page.extract_text() or ""
-                raw_parts.append(text)
-                pages.append(PageContent(page_number=i, text=text))
-        except Exception as exc2:
-            errors.append(f"PDF extraction failed: {exc2}")
-            method = "failed"
+        report.errors.append(f"PDF extraction failed: {exc}")
+        report.extraction_method = "failed"
+        report.confidence = 0.3
+        return
+
+    methods: List[str] = []
+    spill: List[str] = []
+
+    def merge(rng: _PdfRange) -> None:
+        report.warnings.extend(rng.warnings)
+        report.errors.extend(rng.errors)
+        methods.extend(m for m in rng.methods if m not in methods)
+
+    def source_path() -> str:
+        # Worker processes open the file themselves; spill the buffer once.
+        if path is not None:
+            return path
+        if not spill:
+            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as fh:
+                fh.write(data)
+            spill.append(fh.name)
+        return spill[0]
+
+    def parallel_pages(ranges: List[Tuple[int, int]]) -> Iterator[PageContent]:
+        for rng in _iter_pdf_ranges_parallel(source_path(), ranges):
+            merge(rng)
+            yield from rng.pages
+
+    def serial_pages() -> Iterator[PageContent]:
+        rng = _PdfRange(1, page_count)
+        yield from _iter_pdf_range(data, 1, page_count, rng)
+        merge(rng)
+
+    if PDF_PARALLEL_WORKERS > 1 and page_count >= PDF_PARALLEL_MIN_PAGES:
+        ranges = _page_ranges(page_count, PDF_PAGES_PER_TASK)
+        report.metadata["parallel_workers"] = min(PDF_PARALLEL_WORKERS, len(ranges))
+        pages = parallel_pages(ranges)
+    else:
+        pages = serial_pages() if page_count else iter(())
+    try:
+        for page in _ocr_textless_pages(pages, data, source_path, report, methods):
+            report.tables.extend(page.tables)
+            yield page
+    finally:
+        for name in spill:
+            os.unlink(name)
 
-    return _build_result(
-        file_id, filename, "pdf", "\n\n".join(raw_parts),
-        pages, tables, kv, meta, method,
-        confidence=0.9 if not errors else 0.3,
-        errors=errors, warnings=warnings,
-    )
+    report.extraction_method = "+".join(methods) or "pdfplumber"
+    report.confidence = 0.9 if not report.errors else 0.3
+
+
+def _extract_pdf(data: BufferLike, file_id: str, filename: str, path: Optional[str] = None) -> ExtractionResult:
+    report = ExtractionReport()
+    pages = list(_iter_pdf_pages(data, report, path))
+    return build_extraction_result(file_id, filename, pages, report)
 
 
+# ---------------------------------------------------------------------------
+# Extractors
+# ---------------------------------------------------------------------------
+
 def _extract_docx(data: bytes, file_id: str, filename: str) -> ExtractionResult:
     errors, warnings, pages, tables, kv, meta = [], [], [], [], {}, {}
     raw_parts = []
     method = "python-docx"
     try:
         from docx import Document  # type: ignore
-        doc = Document(io.BytesIO(data))
+        doc = Document(_as_stream(data))
         props = doc.core_properties
         meta = {
             "author": props.author,
@@ -257,70 +686,273 @@ def _extract_docx(data: bytes, file_id: str, filename: str) -> ExtractionResult:
     )
 
 
+def _read_sheet(ws: Any) -> ColumnarTable:
+    """Stream one read-only worksheet into a ColumnarTable."""
+    # Many writers emit a wrong <dimension>; without this, read-only mode
+    # silently truncates to it.
+    ws.reset_dimensions()
+    table: Optional[ColumnarTable] = None
+    for row in ws.iter_rows(values_only=True):
+        if all(v is None for v in row):
+            continue
+        if table is None:
+            # A leading all-text row is the header, so the data columns can
+            # keep numeric/date types.
+            if all(v is None or isinstance(v, str) for v in row):
+                table = ColumnarTable(ws.title, row)
+                continue
+            table = ColumnarTable(ws.title)
+        table.append_row(row)
+    return table if table is not None else ColumnarTable(ws.title)
+
+
 def _extract_xlsx(data: bytes, file_id: str, filename: str) -> ExtractionResult:
     errors, warnings, pages, tables, kv, meta = [], [], [], [], {}, {}
-    raw_parts = []
+    sheets: List[ColumnarTable] = []
     method = "openpyxl"
     try:
         import openpyxl  # type: ignore
-        wb = openpyxl.load_workbook(io.BytesIO(data), data_only=True)
-        meta = {"sheet_names": wb.sheetnames, "active_sheet": wb.active.title if wb.active else ""}
-        for sheet_name in wb.sheetnames:
-            ws = wb[sheet_name]
-            rows = []
-            for row in ws.iter_rows(values_only=True):
-                str_row = [str(c) if c is not None else "" for c in row]
-                rows.append(str_row)
-                raw_parts.append(" | ".join(str_row))
-            tables.append(rows)
-            pages.append(PageContent(page_number=len(pages) + 1, text="\n".join(" | ".join(r) for r in rows), tables=[rows]))
+        wb = openpyxl.load_workbook(_as_stream(data), read_only=True, data_only=True)
+        try:
+            meta = {"sheet_names": wb.sheetnames, "active_sheet": wb.active.title if wb.active else ""}
+            for ws in wb.worksheets:
+                sheets.append(_read_sheet(ws))
+        finally:
+            wb.close()
     except Exception as exc:
         errors.append(f"XLSX extraction failed: {exc}")
         method = "failed"
 
-    return _build_result(
-        file_id, filename, "xlsx", "\n".join(raw_parts),
+    # Text rendition: one capped string view per sheet, built from the
+    # columnar tables; the full data stays in ``columnar_tables``.
+    for sheet in sheets:
+        rows = sheet.text_rows(TABLE_TEXT_MAX_ROWS)
+        if sheet.truncated(TABLE_TEXT_MAX_ROWS):
+            warnings.append(
+                f"Sheet '{sheet.name}': text rendition capped at {TABLE_TEXT_MAX_ROWS} "
+                f"of {sheet.row_count} rows"
+            )
+        tables.append(rows)
+        pages.append(PageContent(page_number=len(pages) + 1, text="\n".join(" | ".join(r) for r in rows), tables=[rows]))
+    if sheets:
+        meta["sheets"] = [sheet.schema() for sheet in sheets]
+
+    result = _build_result(
+        file_id, filename, "xlsx", "\n".join(p.text for p in pages),
         pages, tables, kv, meta, method,
         confidence=0.95 if not errors else 0.3,
         errors=errors, warnings=warnings,
     )
+    result.columnar_tables = sheets
+    return result
+
+
+CSV_SNIFF_BYTES: int = 64 * 1024
+CSV_SAMPLE_HEAD_ROWS: int = int(os.getenv("CSV_SAMPLE_HEAD_ROWS", "1000"))
+CSV_SAMPLE_TAIL_ROWS: int = int(os.getenv("CSV_SAMPLE_TAIL_ROWS", "200"))
+CSV_SPILL_ENABLED: bool = os.getenv("CSV_SPILL_ENABLED", "1") not in ("0", "false", "no")
+_CSV_BATCH_ROWS = 4096
+
+
+def _open_text(data: BufferLike, encoding: str) -> io.TextIOWrapper:
+    stream = _as_stream(data)
+    if not isinstance(stream, io.BufferedIOBase):
+        stream = io.BufferedReader(stream)
+    return io.TextIOWrapper(stream, encoding=encoding, errors="replace", newline="")
+
+
+def _sniff_dialect(sample: str, sep: str) -> Tuple[Any, str]:
+    """(csv dialect, delimiter) from a text sample; the extension's separator wins if present."""
+    sample = sample[:sample.rfind("\n") + 1] or sample
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",\t;|")
+    except csv.Error:
+        dialect = csv.excel
+    delimiter = dialect.delimiter
+    if delimiter != sep and (sep in sample.split("\n", 1)[0] or dialect is csv.excel):
+        delimiter = sep
+    return dialect, delimiter
+
+
+def _render_sample(header: List[str], head: List[List[str]], tail: List[List[str]],
+                   row_count: int) -> Tuple[List[List[str]], str]:
+    """(table rows, text) for a head/tail sample; the text marks any omitted middle."""
+    rows = ([header] if header else []) + head
+    text_rows = [" | ".join(r) for r in rows]
+    omitted = row_count - len(head) - len(tail)
+    if omitted > 0:
+        text_rows.append(f"... {omitted} rows omitted ...")
+    rows.extend(tail)
+    text_rows.extend(" | ".join(r) for r in tail)
+    return rows, "\n".join(text_rows)
 
 
 def _extract_csv(data: bytes, file_id: str, filename: str, sep: str = ",") -> ExtractionResult:
+    """
+    Stream a CSV/TSV in one pass with bounded memory.
+
+    Decoding is incremental in the encoding ``detect_encoding`` picks from
+    a sample, and the dialect is sniffed from the first ``CSV_SNIFF_BYTES``.
+    Every row updates per-column statistics and is appended to a columnar
+    spill file (``metadata["spill_path"]``, per upload and never cached);
+    only the first ``CSV_SAMPLE_HEAD_ROWS`` and last ``CSV_SAMPLE_TAIL_ROWS``
+    rows are kept as text for the rendition.
+    """
     errors, warnings, pages, tables, kv, meta = [], [], [], [], {}, {}
-    raw_parts = []
     method = "csv"
+    header: List[str] = []
+    head: List[List[str]] = []
+    tail: deque = deque(maxlen=CSV_SAMPLE_TAIL_ROWS)
+    stats: List[ColumnStats] = []
+    row_count = 0
+    spill: Optional[ColumnarSpillWriter] = None
     try:
-        text = _decode_bytes(data)
-        reader = csv.reader(io.StringIO(text), delimiter=sep)
-        rows = list(reader)
-        tables.append(rows)
-        if rows:
-            headers = rows[0]
-            meta["columns"] = headers
-            meta["row_count"] = len(rows) - 1
-            kv = {"headers": headers, "sample_row": rows[1] if len(rows) > 1 else []}
-        raw_parts = [" | ".join(r) for r in rows]
-        pages.append(PageContent(page_number=1, text="\n".join(raw_parts), tables=tables))
+        encoding = detect_encoding(data).encoding
+        with _open_text(data, encoding) as text_stream:
+            dialect, delimiter = _sniff_dialect(text_stream.read(CSV_SNIFF_BYTES), sep)
+            text_stream.seek(0)
+            meta["encoding"] = encoding
+            meta["dialect"] = {"delimiter": delimiter, "quotechar": dialect.quotechar}
+            reader = csv.reader(text_stream, dialect, delimiter=delimiter)
+            header = next(reader, [])
+            stats = [ColumnStats(h) for h in header]
+            if CSV_SPILL_ENABLED and header:
+                try:
+                    spill = ColumnarSpillWriter(get_temp_store().side_file_path(f"{file_id}.colspill"), header)
+                except OSError as exc:
+                    warnings.append(f"CSV spill file unavailable ({exc}); statistics only")
+            while True:
+                batch = list(islice(reader, _CSV_BATCH_ROWS))
+                if not batch:
+                    break
+                # Work column-wise on each batch: parsing, statistics and
+                # spilling then run as whole-column operations.
+                width = max(map(len, batch))
+                while len(stats) < width:
+                    stats.append(ColumnStats("", row_count))
+                padded = [r if len(r) == width else r + [""] * (width - len(r)) for r in batch]
+                columns = [list(col) for col in zip(*padded)]
+                values = [parse_column(col) for col in columns]
+                for i, col_stats in enumerate(stats):
+                    if i < width:
+                        col_stats.add_batch(values[i], columns[i])
+                    else:
+                        col_stats.add_batch([None] * len(batch), [""] * len(batch))
+                if spill is not None:
+                    spill.append_columns(values, len(batch))
+                room = CSV_SAMPLE_HEAD_ROWS - len(head)
+                head.extend(batch[:room])
+                tail.extend(batch[max(room, 0):])
+                row_count += len(batch)
+        if spill is not None:
+            spill.close()
+            meta["spill_path"] = str(spill.path)
+            meta["spill_row_groups"] = spill.row_groups
     except Exception as exc:
+        if spill is not None:
+            spill.abort()
         errors.append(f"CSV extraction failed: {exc}")
         method = "failed"
 
+    if header:
+        meta["columns"] = header
+        meta["row_count"] = row_count
+        meta["column_stats"] = [col.to_dict() for col in stats]
+        kv = {"headers": header, "sample_row": head[0] if head else []}
+
+    rows, raw_text = _render_sample(header, head, list(tail), row_count)
+    if row_count > len(head) + len(tail):
+        warnings.append(
+            f"CSV text rendition sampled: first {len(head)} and last {len(tail)} of {row_count} rows"
+        )
+    if rows:
+        tables.append(rows)
+    pages.append(PageContent(page_number=1, text=raw_text, tables=tables))
+
+    return _build_result(
+        file_id, filename, "csv", raw_text,
+        pages, tables, kv, meta, method,
+        confidence=0.98 if not errors else 0.3,
+        errors=errors, warnings=warnings,
+    )
+
+
+_COLUMNAR_READERS = {
+    "parquet": columnar.read_parquet,
+    "feather": columnar.read_feather,
+    "avro": columnar.read_avro,
+}
+
+
+def _extract_columnar(data: BufferLike, file_id: str, filename: str, fmt: str,
+                      path: Optional[str] = None) -> ExtractionResult:
+    """
+    Parquet / Feather / Avro without a full scan.
+
+    Schema, row count and (Parquet) column statistics come from the file
+    footer or header. The text rendition is a head/tail sample read from
+    the projected columns of the few row groups that hold it. ``path``
+    lets Arrow memory-map the on-disk file instead of wrapping the buffer.
+    """
+    errors, warnings, pages, tables, kv, meta = [], [], [], [], {}, {}
+    method = "fastavro" if fmt == "avro" else "pyarrow"
+    raw_text = ""
+    try:
+        if fmt == "avro":
+            with (open(path, "rb") if path else _as_stream(data)) as stream:
+                info = columnar.read_avro(stream)
+        else:
+            info = _COLUMNAR_READERS[fmt](columnar.arrow_source(data, path))
+        meta = info.to_metadata()
+        warnings.extend(info.warnings)
+        header = info.sample_columns
+        head = list(info.head.iter_text_rows(None, include_header=False)) if info.head else []
+        tail = list(info.tail.iter_text_rows(None, include_header=False)) if info.tail else []
+        if info.head is None:
+            method = "footer"
+        elif (info.row_count or 0) > len(head) + len(tail):
+            warnings.append(
+                f"{fmt.capitalize()} text rendition sampled: first {len(head)} and last "
+                f"{len(tail)} of {info.row_count} rows"
+            )
+        rows, raw_text = _render_sample(header, head, tail, info.row_count or 0)
+        if head or tail:
+            tables.append(rows)
+        kv = {"headers": [c["name"] for c in info.schema], "sample_row": head[0] if head else []}
+        if info.head is None:
+            # No sample: render the schema so the document is still searchable.
+            raw_text = "\n".join(f"{c['name']}: {c['type']}" for c in info.schema)
+    except Exception as exc:
+        errors.append(f"{fmt.capitalize()} extraction failed: {exc}")
+        method = "failed"
+    pages.append(PageContent(page_number=1, text=raw_text, tables=tables))
     return _build_result(
-        file_id, filename, "csv", "\n".join(raw_parts),
+        file_id, filename, fmt, raw_text,
         pages, tables, kv, meta, method,
         confidence=0.98 if not errors else 0.3,
         errors=errors, warnings=warnings,
     )
 
 
+def _extract_parquet(data: BufferLike, file_id: str, filename: str, path: Optional[str] = None) -> ExtractionResult:
+    return _extract_columnar(data, file_id, filename, "parquet", path)
+
+
+def _extract_feather(data: BufferLike, file_id: str, filename: str, path: Optional[str] = None) -> ExtractionResult:
+    return _extract_columnar(data, file_id, filename, "feather", path)
+
+
+def _extract_avro(data: BufferLike, file_id: str, filename: str, path: Optional[str] = None) -> ExtractionResult:
+    return _extract_columnar(data, file_id, filename, "avro", path)
+
+
 def _extract_pptx(data: bytes, file_id: str, filename: str) -> ExtractionResult:
     errors, warnings, pages, tables, kv, meta = [], [], [], [], {}, {}
     raw_parts = []
     method = "python-pptx"
     try:
         from pptx import Presentation  # type: ignore
-        prs = Presentation(io.BytesIO(data))
+        prs = Presentation(_as_stream(data))
         props = prs.core_properties
         meta = {"title": props.title, "author": props.author, "slide_count": len(prs.slides)}
         for i, slide in enumerate(prs.slides, 1):
@@ -343,47 +975,29 @@ def _extract_pptx(data: bytes, file_id: str, filename: str) -> ExtractionResult:
     )
 
 
-def _extract_image(data: bytes, file_id: str, filename: str) -> ExtractionResult:
+def _extract_image(data: BufferLike, file_id: str, filename: str) -> ExtractionResult:
     errors, warnings, pages, tables, kv, meta = [], [], [], [], {}, {}
-    raw_text = ""
-    method = "OCR"
-    confidence = 0.6
-
-    try:
-        from PIL import Image  # type: ignore
-        img = Image.open(io.BytesIO(data))
-        meta = {
-            "format": img.format,
-            "mode": img.mode,
-            "size": list(img.size),
-            "width": img.size[0],
-            "height": img.size[1],
-        }
-        if hasattr(img, "_getexif") and img._getexif():
-            try:
-                from PIL.ExifTags import TAGS  # type: ignore
-                exif_data = {TAGS.get(k, k): str(v) for k, v in img._getexif().items()}
-                meta["exif"] = exif_data
-            except Exception:
-                pass
-    except Exception as exc:
-        errors.append(f"Image open failed: {exc}")
-
-    try:
-        import pytesseract  # type: ignore
-        from PIL import Image as PILImage  # type: ignore
-        img_obj = PILImage.open(io.BytesIO(data))
-        raw_text = pytesseract.image_to_string(img_obj, lang="eng")
-        osd = pytesseract.image_to_osd(img_obj, output_type=pytesseract.Output.DICT)
-        confidence = min(float(osd.get("orientation_conf", 60)) / 100.0, 1.0)
-    except Exception as exc:
-        warnings.append(f"OCR not available ({exc}); returning image metadata only")
-        confidence = 0.1
+    ocr = get_ocr_engine().ocr(data)
+    if ocr.error:
+        errors.append(ocr.error)
+    if ocr.warning:
+        warnings.append(ocr.warning)
+    meta = dict(ocr.image)
+    meta["ocr"] = {
+        "engine": ocr.engine,
+        "cached": ocr.cached,
+        "seconds": round(ocr.seconds, 3),
+        "orientation": ocr.orientation,
+        "orientation_confidence": ocr.orientation_confidence,
+        "script": ocr.script,
+    }
+    confidence = ocr.confidence if ocr.ok else 0.1
+    raw_text = ocr.text
 
     pages.append(PageContent(page_number=1, text=raw_text, confidence=confidence, images_found=1))
     return _build_result(
         file_id, filename, "image", raw_text,
-        pages, tables, kv, meta, method,
+        pages, tables, kv, meta, "OCR",
         confidence=confidence,
         errors=errors, warnings=warnings,
     )
@@ -392,7 +1006,7 @@ def _extract_image(data: bytes, file_id: str, filename: str) -> ExtractionResult
 def _extract_json(data: bytes, file_id: str, filename: str) -> ExtractionResult:
     errors, warnings, pages, tables, kv, meta = [], [], [], [], {}, {}
     method = "json"
-    text = _decode_bytes(data)
+    text, _ = decode_bytes(data)
     raw_text = text
     try:
         parsed = json.loads(text)
@@ -404,6 +1018,11 @@ def _extract_json(data: bytes, file_id: str, filename: str) -> ExtractionResult:
             if parsed and isinstance(parsed[0], dict):
                 kv = {"sample": str(parsed[0])[:500]}
         raw_text = json.dumps(parsed, indent=2, default=str)
+    except json.JSONDecodeError as exc:
+        if exc.msg == "Extra data":
+            # A complete value followed by more: JSON Lines under a .json name.
+            return _extract_jsonl(data, file_id, filename)
+        errors.append(f"JSON parse error: {exc}")
     except Exception as exc:
         errors.append(f"JSON parse error: {exc}")
     pages.append(PageContent(page_number=1, text=raw_text))
@@ -415,86 +1034,222 @@ def _extract_json(data: bytes, file_id: str, filename: str) -> ExtractionResult:
     )
 
 
-def _extract_html(data: bytes, file_id: str, filename: str) -> ExtractionResult:
-    errors, warnings, pages, tables, kv, meta = [], [], [], [], {}, {}
-    method = "beautifulsoup4"
-    raw_text = ""
-    try:
-        from bs4 import BeautifulSoup  # type: ignore
-        soup = BeautifulSoup(data, "lxml")
-        title_tag = soup.find("title")
-        meta["title"] = title_tag.text.strip() if title_tag else ""
-        for tag in soup(["script", "style", "head"]):
-            tag.decompose()
-        raw_text = soup.get_text(separator="\n")
-        # Extract tables
-        for tbl in soup.find_all("table"):
-            rows = [[cell.get_text(strip=True) for cell in row.find_all(["td", "th"])]
-                    for row in tbl.find_all("tr")]
-            if rows:
-                tables.append(rows)
-        # Meta tags
-        for m in soup.find_all("meta"):
-            if m.get("name") and m.get("content"):
-                meta[m["name"]] = m["content"]
-    except Exception as exc:
-        method = "fallback"
-        warnings.append(f"BS4/lxml failed ({exc}); stripping tags manually")
-        raw_text = re.sub(r"<[^>]+>", " ", _decode_bytes(data))
-    pages.append(PageContent(page_number=1, text=raw_text, tables=tables))
-    return _build_result(
-        file_id, filename, "html", raw_text,
-        pages, tables, kv, meta, method,
-        confidence=0.9 if not errors else 0.5,
-        errors=errors, warnings=warnings,
-    )
+JSONL_SAMPLE_RECORDS: int = int(os.getenv("JSONL_SAMPLE_RECORDS", "1000"))
+JSONL_TEXT_MAX_CHARS: int = int(os.getenv("JSONL_TEXT_MAX_CHARS", str(1024 * 1024)))
+_JSONL_SCHEMA_DEPTH = 3        # object nesting followed when merging the schema
+_JSONL_MAX_ERRORS_REPORTED = 20
+_JSON_TYPE_NAMES = {
+    dict: "object", list: "array", str: "string", int: "integer",
+    float: "number", bool: "boolean", type(None): "null",
+}
+
 
+class _Reservoir:
+    """
+    Uniform fixed-size sample of a stream (Li's Algorithm L).
+
+    Draws O(k log(n/k)) random numbers instead of one per item. The seed is
+    fixed so the same file always yields the same sample (and cache key).
+    """
 
-def _extract_xml(data: bytes, file_id: str, filename: str) -> ExtractionResult:
+    def __init__(self, k: int, seed: int = 0) -> None:
+        self.k = k
+        self.items: List[Any] = []
+        self._rng = random.Random(seed)
+        self._seen = 0
+        self._w = 1.0
+        self._next = 0
+
+    def _skip(self) -> None:
+        self._w *= math.exp(math.log(self._rng.random() or 1e-300) / self.k)
+        self._next += int(math.log(self._rng.random() or 1e-300) / math.log1p(-self._w)) + 1
+
+    def offer(self, item: Any) -> None:
+        self._seen += 1
+        if len(self.items) < self.k:
+            self.items.append(item)
+            if len(self.items) == self.k:
+                self._next = self.k
+                self._skip()
+        elif self._seen == self._next:
+            self.items[self._rng.randrange(self.k)] = item
+            self._skip()
+
+
+def _merge_json_schema(schema: Dict[str, Dict[str, Any]], record: Dict, prefix: str = "", depth: int = 0) -> None:
+    """Fold one object's keys (dotted paths for nested objects) into ``schema``."""
+    for key, value in record.items():
+        path = f"{prefix}{key}"
+        entry = schema.get(path)
+        if entry is None:
+            entry = schema[path] = {"types": set(), "count": 0, "example": None}
+        entry["types"].add(_JSON_TYPE_NAMES.get(type(value), "string"))
+        entry["count"] += 1
+        if isinstance(value, dict):
+            if depth < _JSONL_SCHEMA_DEPTH:
+                _merge_json_schema(schema, value, f"{path}.", depth + 1)
+        elif entry["example"] is None and value not in (None, "", []):
+            entry["example"] = value
+
+
+def _extract_jsonl(data: BufferLike, file_id: str, filename: str) -> ExtractionResult:
+    """
+    Stream a JSON Lines file one record at a time in constant memory.
+
+    Every line is parsed (for the record count and error report). Only a
+    ``JSONL_SAMPLE_RECORDS`` reservoir sample is kept; the merged schema
+    and per-key summaries come from it. The text rendition is the
+    original lines, capped at ``JSONL_TEXT_MAX_CHARS``.
+    """
     errors, warnings, pages, tables, kv, meta = [], [], [], [], {}, {}
-    method = "lxml"
-    raw_text = ""
+    method = "jsonl"
+    text_lines: List[str] = []
+    text_chars = lines_omitted = 0
+    records = parse_errors = 0
+    error_lines: List[int] = []
+    record_types: Dict[str, int] = {}
+    reservoir = _Reservoir(JSONL_SAMPLE_RECORDS)
+    loads = json.loads
     try:
-        import lxml.etree as ET  # type: ignore
-        root = ET.fromstring(data)
-        meta["root_tag"] = root.tag
-        meta["namespaces"] = list(root.nsmap.values()) if hasattr(root, "nsmap") else []
-        raw_text = ET.tostring(root, encoding="unicode", method="text")
-        # Flatten all text nodes
-        texts = [el.text.strip() for el in root.iter() if el.text and el.text.strip()]
-        raw_text = "\n".join(texts)
+        stream = _as_stream(data)
+        if not isinstance(stream, io.BytesIO):
+            stream = io.BufferedReader(stream, 1024 * 1024)
+        with stream:
+            for lineno, line in enumerate(stream, 1):
+                if lineno == 1 and line.startswith(codecs.BOM_UTF8):
+                    line = line[len(codecs.BOM_UTF8):]
+                if text_chars < JSONL_TEXT_MAX_CHARS:
+                    text = line.decode("utf-8", errors="replace").rstrip("\r\n")
+                    text_lines.append(text)
+                    text_chars += len(text) + 1
+                else:
+                    lines_omitted += 1
+                if not line.strip():
+                    continue
+                try:
+                    record = loads(line)
+                except ValueError:
+                    parse_errors += 1
+                    if len(error_lines) < _JSONL_MAX_ERRORS_REPORTED:
+                        error_lines.append(lineno)
+                    continue
+                records += 1
+                kind = _JSON_TYPE_NAMES.get(type(record), "string")
+                record_types[kind] = record_types.get(kind, 0) + 1
+                reservoir.offer(record)
     except Exception as exc:
-        warnings.append(f"lxml failed ({exc}); using stdlib")
-        method = "stdlib"
-        try:
-            import xml.etree.ElementTree as ET2
-            root2 = ET2.fromstring(data)
-            texts = [el.text.strip() for el in root2.iter() if el.text and el.text.strip()]
-            raw_text = "\n".join(texts)
-        except Exception as exc2:
-            errors.append(f"XML extraction failed: {exc2}")
+        errors.append(f"JSONL extraction failed: {exc}")
+        method = "failed"
+
+    schema: Dict[str, Dict[str, Any]] = {}
+    for record in reservoir.items:
+        if isinstance(record, dict):
+            _merge_json_schema(schema, record)
+    sampled = len(reservoir.items)
+    meta = {
+        "type": "jsonl",
+        "record_count": records,
+        "record_types": record_types,
+        "parse_errors": parse_errors,
+        "sample_size": sampled,
+        "schema": [
+            {"path": path, "types": sorted(entry["types"]),
+             "presence": round(entry["count"] / sampled, 4)}
+            for path, entry in schema.items()
+        ],
+    }
+    for path, entry in schema.items():
+        if entry["types"] == {"object"}:
+            continue  # its keys are listed individually
+        summary = f"{'|'.join(sorted(entry['types']))}, in {entry['count'] / sampled:.0%} of sampled records"
+        if entry["example"] is not None:
+            summary += f", e.g. {json.dumps(entry['example'], default=str)[:200]}"
+        kv[path] = summary
+    if parse_errors:
+        warnings.append(
+            f"{parse_errors} JSONL line(s) are not valid JSON "
+            f"(lines {', '.join(map(str, error_lines))}{', ...' if parse_errors > len(error_lines) else ''})"
+        )
+    if lines_omitted:
+        warnings.append(
+            f"JSONL text rendition capped at {JSONL_TEXT_MAX_CHARS} characters; {lines_omitted} line(s) omitted"
+        )
+        text_lines.append(f"... {lines_omitted} lines omitted ...")
+    raw_text = "\n".join(text_lines)
     pages.append(PageContent(page_number=1, text=raw_text))
     return _build_result(
-        file_id, filename, "xml", raw_text,
+        file_id, filename, "jsonl", raw_text,
         pages, tables, kv, meta, method,
-        confidence=0.9 if not errors else 0.4,
+        confidence=0.99 if not errors and not parse_errors else 0.7 if not errors else 0.3,
         errors=errors, warnings=warnings,
     )
 
 
-def _extract_text(data: bytes, file_id: str, filename: str, doc_type: str = "text") -> ExtractionResult:
-    text = _decode_bytes(data)
+def _clean_cut(text: str) -> int:
+    """
+    Offset where the trailing whitespace run of ``text`` starts (0 if it is
+    all whitespace). clean_raw_text only rewrites whitespace runs, so the
+    text before the cut, which ends in a non-space character, cleans the
+    same alone as in the whole; the run is carried into the next piece.
+    """
+    cut = len(text)
+    while cut and text[cut - 1].isspace():
+        cut -= 1
+    return cut
+
+
+def _decode_text(data: BufferLike) -> Tuple[str, EncodingGuess, int]:
+    """
+    (clean text, encoding guess, replacement characters) for ``data``.
+
+    Decoded chunks are cleaned as they arrive, cut at ``_clean_cut``, so
+    the uncleaned text never exists in full alongside the bytes and only a
+    whitespace run is carried between chunks. A carried run that grows past
+    a chunk (a file of blank lines) is cleaned and emitted but for its tail.
+    """
+    guess = detect_encoding(data)
+    pieces: List[str] = []
+    pending = ""
+    replaced = 0
+    for chunk in iter_decode(data, guess.encoding):
+        replaced += chunk.count("\ufffd")
+        pending += chunk
+        cut = _clean_cut(pending)
+        if cut:
+            pieces.append(clean_raw_text(pending[:cut], strip=False))
+            pending = pending[cut:]
+        if len(pending) > len(chunk):
+            # A final CR is held back: it may pair with an LF in the next
+            # chunk. Once cleaned, only the last run of one character can
+            # still merge with what follows, so the rest is emitted.
+            cr = "\r" if pending.endswith("\r") else ""
+            run = clean_raw_text(pending[:len(pending) - len(cr)], strip=False)
+            keep = len(run.rstrip(run[-1]))
+            pieces.append(run[:keep])
+            pending = run[keep:] + cr
+    pieces.append(clean_raw_text(pending, strip=False))
+    return "".join(pieces).strip(), guess, replaced
+
+
+def _extract_text(data: BufferLike, file_id: str, filename: str, doc_type: str = "text") -> ExtractionResult:
+    warnings: List[str] = []
+    text, guess, replaced = _decode_text(data)
+    meta = {"encoding": guess.encoding, "encoding_detection": guess.method,
+            "encoding_confidence": guess.confidence}
+    if replaced:
+        warnings.append(f"{replaced} undecodable character(s) replaced while decoding as {guess.encoding}")
     pages = [PageContent(page_number=1, text=text)]
     return _build_result(
         file_id, filename, doc_type, text,
-        pages, [], {}, {}, "plaintext",
-        confidence=1.0, errors=[], warnings=[],
+        pages, [], {}, meta, "plaintext",
+        confidence=1.0 if not replaced else 0.7, errors=[], warnings=warnings,
+        text_clean=True,
     )
 
 
 def _extract_yaml(data: bytes, file_id: str, filename: str) -> ExtractionResult:
     errors, kv, meta = [], {}, {}
-    raw_text = _decode_bytes(data)
+    raw_text, _ = decode_bytes(data)
     try:
         import yaml  # type: ignore
         parsed = yaml.safe_load(raw_text)
@@ -511,67 +1266,713 @@ def _extract_yaml(data: bytes, file_id: str, filename: str) -> ExtractionResult:
     )
 
 
-def _extract_email(data: bytes, file_id: str, filename: str) -> ExtractionResult:
-    import email as emaillib
-    errors, kv, meta = [], {}, {}
-    raw_parts = []
-    msg = emaillib.message_from_bytes(data)
-    meta = {
-        "from": msg.get("From", ""),
-        "to": msg.get("To", ""),
-        "subject": msg.get("Subject", ""),
-        "date": msg.get("Date", ""),
-        "message_id": msg.get("Message-ID", ""),
-    }
-    kv = dict(meta)
-    if msg.is_multipart():
-        for part in msg.walk():
-            ct = part.get_content_type()
-            if ct == "text/plain":
-                payload = part.get_payload(decode=True)
-                if payload:
-                    raw_parts.append(_decode_bytes(payload))
+# ---------------------------------------------------------------------------
+# Markup: streaming HTML / XML
+# ---------------------------------------------------------------------------
+
+_MARKUP_FEED_BYTES = 64 * 1024
+_HTML_SKIP_TAGS = frozenset({"head", "script", "style", "noscript", "template"})
+_HTML_BLOCK_TAGS = frozenset({
+    "address", "article", "aside", "blockquote", "body", "br", "caption", "dd", "div", "dl", "dt",
+    "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr",
+    "li", "main", "nav", "ol", "p", "pre", "section", "table", "td", "th", "tr", "ul",
+})
+
+
+class _MarkupCollector:
+    """
+    Parser target for streaming HTML/XML. It receives start/data/end events
+    and builds no tree. It keeps only the current text line, the stack of
+    open tables and what has been collected so far, so working memory grows
+    with nesting depth, not document size.
+
+    XML: every element boundary ends a line, as the old per-element text
+    walk did. HTML: block elements end a line; script/style/head text is
+    dropped; <title>, <meta name|property> and tables are collected as they
+    stream past.
+    """
+
+    def __init__(self, html: bool) -> None:
+        self.html = html
+        self.lines: List[str] = []
+        self.tables: List[List[List[str]]] = []
+        self.meta: Dict[str, Any] = {"title": ""} if html else {}
+        self.root_tag = ""
+        self.namespaces: List[str] = []
+        self._line: List[str] = []
+        self._skip = 0
+        self._title: Optional[List[str]] = None
+        self._open_tables: List[Tuple[List[List[str]], List[Optional[List[str]]]]] = []
+        if not html:
+            # XML only needs line breaks at element boundaries; bind the
+            # cheapest callbacks so lxml's per-event dispatch stays short.
+            self.start = self._xml_start
+            self.end = self._xml_end
+            self.data = self._line.append
+
+    def _xml_start(self, tag: str, attrib: Any, *_: Any) -> None:
+        if not self.root_tag:
+            self.root_tag = tag
+        if self._line:
+            self._flush()
+
+    def _xml_end(self, tag: str) -> None:
+        if self._line:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._line:
+            return
+        text = "".join(self._line)
+        text = " ".join(text.split()) if self.html else text.strip()
+        if text:
+            self.lines.append(text)
+        self._line.clear()
+
+    def start_ns(self, prefix: Optional[str], uri: str) -> None:
+        if uri not in self.namespaces:
+            self.namespaces.append(uri)
+
+    def start(self, tag: str, attrib: Any, *_: Any) -> None:
+        if not self.root_tag:
+            self.root_tag = tag
+        if tag in _HTML_SKIP_TAGS:
+            self._skip += 1
+        elif tag == "title":
+            self._title = []
+        elif tag == "meta":
+            key = attrib.get("name") or attrib.get("property")
+            if key and attrib.get("content") is not None:
+                self.meta[key] = attrib.get("content")
+        elif tag == "table":
+            self._open_tables.append(([], [None]))
+        elif self._open_tables:
+            rows, cell = self._open_tables[-1]
+            if tag == "tr":
+                rows.append([])
+            elif tag in ("td", "th"):
+                cell[0] = []
+        if tag in _HTML_BLOCK_TAGS:
+            self._flush()
+
+    def data(self, text: str) -> None:
+        if self._title is not None:
+            self._title.append(text)
+        if self._skip:
+            return
+        self._line.append(text)
+        for _, cell in self._open_tables:
+            if cell[0] is not None:
+                cell[0].append(text)
+
+    def end(self, tag: str) -> None:
+        if tag in _HTML_SKIP_TAGS:
+            self._skip = max(self._skip - 1, 0)
+        elif tag == "title" and self._title is not None:
+            self.meta["title"] = " ".join("".join(self._title).split())
+            self._title = None
+        elif tag == "table" and self._open_tables:
+            rows = [row for row in self._open_tables.pop()[0] if row]
+            if rows:
+                self.tables.append(rows)
+        elif tag in ("td", "th") and self._open_tables:
+            rows, cell = self._open_tables[-1]
+            if cell[0] is not None:
+                if not rows:
+                    rows.append([])
+                rows[-1].append(" ".join("".join(cell[0]).split()))
+                cell[0] = None
+        if tag in _HTML_BLOCK_TAGS:
+            self._flush()
+
+    def close(self) -> "_MarkupCollector":
+        self._flush()
+        return self
+
+
+class _HtmlFeeder:
+    """Stdlib html.parser driving a _MarkupCollector, fed bytes like the lxml parsers."""
+
+    def __init__(self, target: _MarkupCollector, encoding: str) -> None:
+        from html.parser import HTMLParser
+
+        class _Parser(HTMLParser):
+            def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+                target.start(tag, {k: v or "" for k, v in attrs})
+
+            def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+                self.handle_starttag(tag, attrs)
+                target.end(tag)
+
+            def handle_endtag(self, tag: str) -> None:
+                target.end(tag)
+
+            def handle_data(self, data: str) -> None:
+                target.data(data)
+
+        self._parser = _Parser(convert_charrefs=True)
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+
+    def feed(self, data: bytes) -> None:
+        self._parser.feed(self._decoder.decode(data))
+
+    def close(self) -> None:
+        self._parser.feed(self._decoder.decode(b"", final=True))
+        self._parser.close()
+
+
+_META_CHARSET_RE = re.compile(rb"""<meta\b[^>]*?charset\s*=\s*["']?\s*([\w.:-]+)""", re.IGNORECASE)
+# WHATWG: these labels mean windows-1252 in HTML; UTF-16 declared in an
+# ASCII-compatible document means UTF-8.
+_HTML_CHARSET_ALIASES = {"iso8859-1": "cp1252", "ascii": "cp1252", "utf-16": "utf-8",
+                         "utf-16-le": "utf-8", "utf-16-be": "utf-8"}
+
+
+def _html_encoding(data: BufferLike, head: bytes) -> Tuple[str, str]:
+    """
+    (codec, source) for an HTML document: a BOM, then the charset declared by
+    ``<meta charset>`` or ``http-equiv`` Content-Type in ``head``, then a
+    guess from samples across the whole document.
+    """
+    guess = detect_encoding(data)
+    if guess.method == "bom":
+        return guess.encoding.replace("-sig", ""), "bom"
+    for match in _META_CHARSET_RE.finditer(head):
+        try:
+            name = codecs.lookup(match.group(1).decode("ascii")).name
+        except (LookupError, UnicodeDecodeError):
+            continue
+        return _HTML_CHARSET_ALIASES.get(name, name), "meta"
+    return guess.encoding, guess.method
+
+
+def _markup_parser(target: _MarkupCollector, html: bool, encoding: str) -> Tuple[Any, str]:
+    """
+    (incremental parser feeding ``target``, method name); lxml if installed.
+    ``encoding`` applies to HTML; XML parsers read the XML declaration.
+    """
+    try:
+        import lxml.etree as ET  # type: ignore
+    except ImportError:
+        if html:
+            return _HtmlFeeder(target, encoding), "html.parser"
+        import xml.etree.ElementTree as ET2
+        return ET2.XMLParser(target=target), "stdlib"
+    if html:
+        # libxml2 guesses latin-1 for HTML without a charset; tell it what the bytes are
+        return ET.HTMLParser(target=target, encoding=encoding, recover=True), "lxml"
+    return ET.XMLParser(target=target, huge_tree=True, resolve_entities=False, no_network=True), "lxml"
+
+
+def _extract_markup(data: BufferLike, file_id: str, filename: str, doc_type: str) -> ExtractionResult:
+    """
+    Stream HTML or XML through an incremental parser in 64 KB slices.
+    Text, tables and meta are collected from parser events; no element tree
+    is built. XML that fails to parse part-way keeps the text read up to
+    the error.
+    """
+    errors, warnings, pages, kv = [], [], [], {}
+    html = doc_type == "html"
+    collector = _MarkupCollector(html)
+    stream = _as_stream(data)
+    chunk = stream.read(_MARKUP_FEED_BYTES)
+    encoding = ""
+    if html:
+        encoding, collector.meta["encoding_source"] = _html_encoding(data, chunk)
+        collector.meta["encoding"] = encoding
+    parser, method = _markup_parser(collector, html, encoding)
+    try:
+        while chunk:
+            parser.feed(chunk)
+            chunk = stream.read(_MARKUP_FEED_BYTES)
+        parser.close()
+    except Exception as exc:
+        collector.close()
+        if collector.lines:
+            warnings.append(f"{doc_type.upper()} parse stopped early ({exc}); text up to the error kept")
+        else:
+            errors.append(f"{doc_type.upper()} extraction failed: {exc}")
     else:
-        payload = msg.get_payload(decode=True)
-        if payload:
-            raw_parts.append(_decode_bytes(payload))
-    raw_text = "\n\n".join(raw_parts)
-    pages = [PageContent(page_number=1, text=raw_text)]
+        collector.close()
+
+    meta = collector.meta
+    if not html:
+        meta["root_tag"] = collector.root_tag
+        meta["namespaces"] = collector.namespaces
+    raw_text = "\n".join(collector.lines)
+    pages.append(PageContent(page_number=1, text=raw_text, tables=collector.tables))
     return _build_result(
-        file_id, filename, "email", raw_text,
-        pages, [], kv, meta, "email-stdlib",
-        confidence=0.95, errors=errors, warnings=[],
+        file_id, filename, doc_type, raw_text,
+        pages, collector.tables, kv, meta, method,
+        confidence=0.9 if not errors and not warnings else (0.5 if html else 0.4),
+        errors=errors, warnings=warnings,
+    )
+
+
+def _extract_html(data: BufferLike, file_id: str, filename: str) -> ExtractionResult:
+    return _extract_markup(data, file_id, filename, "html")
+
+
+def _extract_xml(data: BufferLike, file_id: str, filename: str) -> ExtractionResult:
+    return _extract_markup(data, file_id, filename, "xml")
+
+
+# ---------------------------------------------------------------------------
+# Containers: archives and email, members dispatched through extract_document
+# ---------------------------------------------------------------------------
+
+ARCHIVE_MAX_DEPTH: int = int(os.getenv("ARCHIVE_MAX_DEPTH", "3"))
+ARCHIVE_MAX_MEMBERS: int = int(os.getenv("ARCHIVE_MAX_MEMBERS", "1000"))
+ARCHIVE_MAX_TOTAL_BYTES: int = int(os.getenv("ARCHIVE_MAX_TOTAL_MB", "512")) * 1024 * 1024
+ARCHIVE_MAX_MEMBER_BYTES: int = int(os.getenv("ARCHIVE_MAX_MEMBER_MB", "100")) * 1024 * 1024
+ARCHIVE_MAX_RATIO: int = int(os.getenv("ARCHIVE_MAX_RATIO", "200"))
+EMAIL_MAX_ATTACHMENT_BYTES: int = int(os.getenv("EMAIL_MAX_ATTACHMENT_MB", "25")) * 1024 * 1024
+CONTAINER_WORKERS: int = int(os.getenv("CONTAINER_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_MEMBER_READ_CHUNK = 1024 * 1024
+_MEMBER_SNIFF_BYTES = 4096
+
+_CONTAINER_POOL: Optional[ThreadPoolExecutor] = None
+_CONTAINER_POOL_PID = 0
+_CONTAINER_POOL_LOCK = threading.Lock()
+
+
+class _MemberRejected(Exception):
+    """This member is skipped (too large, encrypted, too deeply nested, ...)."""
+
+
+class _BudgetExhausted(Exception):
+    """A container-wide limit was hit; stop reading members."""
+
+
+class _UnsupportedArchive(Exception):
+    """An archive format whose members cannot be streamed here (7z, RAR)."""
+
+
+class _ContainerBudget:
+    """
+    Zip-bomb guards shared by one top-level container and everything nested
+    in it: nesting depth, total member count and total decompressed bytes.
+    Decompressed sizes are counted as bytes are read, not taken from headers.
+    """
+
+    def __init__(self, depth: int = 0, shared: Optional[Dict[str, int]] = None,
+                 lock: Optional[threading.Lock] = None) -> None:
+        self.depth = depth
+        self._shared = shared if shared is not None else {"members": 0, "bytes": 0}
+        self._lock = lock or threading.Lock()
+
+    def nested(self) -> "_ContainerBudget":
+        if self.depth >= ARCHIVE_MAX_DEPTH:
+            raise _MemberRejected(f"nested deeper than {ARCHIVE_MAX_DEPTH} levels")
+        return _ContainerBudget(self.depth + 1, self._shared, self._lock)
+
+    def claim_member(self) -> None:
+        with self._lock:
+            if self._shared["members"] >= ARCHIVE_MAX_MEMBERS:
+                raise _BudgetExhausted(f"member limit of {ARCHIVE_MAX_MEMBERS} reached")
+            self._shared["members"] += 1
+
+    def charge(self, nbytes: int) -> None:
+        with self._lock:
+            self._shared["bytes"] += nbytes
+            if self._shared["bytes"] > ARCHIVE_MAX_TOTAL_BYTES:
+                raise _BudgetExhausted(
+                    f"decompressed size limit of {ARCHIVE_MAX_TOTAL_BYTES // (1024 * 1024)} MB reached"
+                )
+
+    def read(self, stream: Any, limit: int = ARCHIVE_MAX_MEMBER_BYTES) -> bytes:
+        parts: List[bytes] = []
+        size = 0
+        while True:
+            chunk = stream.read(_MEMBER_READ_CHUNK)
+            if not chunk:
+                return b"".join(parts)
+            size += len(chunk)
+            if size > limit:
+                raise _MemberRejected(f"larger than {limit // (1024 * 1024)} MB decoded")
+            self.charge(len(chunk))
+            parts.append(chunk)
+
+
+def _container_pool() -> ThreadPoolExecutor:
+    global _CONTAINER_POOL, _CONTAINER_POOL_PID
+    with _CONTAINER_POOL_LOCK:
+        if _CONTAINER_POOL is None or _CONTAINER_POOL_PID != os.getpid():
+            _CONTAINER_POOL = ThreadPoolExecutor(max_workers=CONTAINER_WORKERS, thread_name_prefix="container")
+            _CONTAINER_POOL_PID = os.getpid()
+        return _CONTAINER_POOL
+
+
+def _read_member(budget: _ContainerBudget, open_member: Callable[[], Any]) -> bytes:
+    budget.claim_member()
+    with open_member() as fh:
+        return budget.read(fh)
+
+
+def _iter_archive_members(data: BufferLike, filename: str, budget: _ContainerBudget,
+                          meta: Dict[str, Any]) -> Iterator[Tuple[str, Optional[bytes], str]]:
+    """
+    Stream (name, content, skip reason) for each regular file, one member
+    in memory at a time. ZIP is read through its central directory. TAR
+    (plain, gz, bz2, xz) and single-file gzip are read as forward-only
+    streams.
+    """
+    import gzip
+    import tarfile
+    import zipfile
+
+    if zipfile.is_zipfile(_as_stream(data)):
+        meta["archive_type"] = "zip"
+        with zipfile.ZipFile(_as_stream(data)) as zf:
+            for info in zf.infolist():
+                if info.is_dir():
+                    continue
+                if info.flag_bits & 0x1:
+                    yield info.filename, None, "encrypted"
+                elif info.file_size > ARCHIVE_MAX_MEMBER_BYTES:
+                    yield info.filename, None, f"declared size {info.file_size} bytes over the member limit"
+                elif info.compress_size and info.file_size / info.compress_size > ARCHIVE_MAX_RATIO:
+                    yield info.filename, None, f"compression ratio over {ARCHIVE_MAX_RATIO}:1"
+                else:
+                    try:
+                        yield info.filename, _read_member(budget, lambda: zf.open(info)), ""
+                    except _MemberRejected as exc:
+                        yield info.filename, None, str(exc)
+        return
+    try:
+        with tarfile.open(fileobj=_as_stream(data), mode="r|*") as tf:
+            meta["archive_type"] = "tar"
+            for member in tf:
+                if not member.isfile():
+                    continue
+                if member.size > ARCHIVE_MAX_MEMBER_BYTES:
+                    yield member.name, None, f"declared size {member.size} bytes over the member limit"
+                    continue
+                try:
+                    yield member.name, _read_member(budget, lambda: tf.extractfile(member)), ""
+                except _MemberRejected as exc:
+                    yield member.name, None, str(exc)
+        return
+    except tarfile.ReadError:
+        pass
+    if bytes(data[:2]) == b"\x1f\x8b":
+        meta["archive_type"] = "gzip"
+        name = Path(filename).stem if filename.lower().endswith(".gz") else f"{filename}.out"
+        try:
+            yield name, _read_member(budget, lambda: gzip.GzipFile(fileobj=_as_stream(data))), ""
+        except _MemberRejected as exc:
+            yield name, None, str(exc)
+        return
+    head = bytes(data[:6])
+    meta["archive_type"] = "7z" if head == b"7z\xbc\xaf\x27\x1c" else "rar" if head == b"Rar!\x1a\x07" else "unknown"
+    raise _UnsupportedArchive(f"{meta['archive_type']} archives cannot be listed")
+
+
+def _extract_member(data: bytes, file_id: str, name: str, budget: _ContainerBudget) -> ExtractionResult:
+    """Extract one container member; nested archives recurse under the same budget."""
+    mime = detect_mime(data[:_MEMBER_SNIFF_BYTES], name)
+    ext = resolve_extension(name, mime)
+    container = _CONTAINER_EXTRACTORS.get(ext)
+    if container is None:
+        return extract_document(data, file_id, name, mime)
+    try:
+        return container(data, file_id, name, budget=budget.nested())
+    except _MemberRejected as exc:
+        return _build_result(
+            file_id, name, "email" if ext in (".eml", ".msg") else "archive", "", [], [], {}, {}, "skipped",
+            confidence=0.0, errors=[], warnings=[f"Nested container not extracted: {exc}"],
+        )
+
+
+def _extract_members(
+    members: Iterator[Tuple[str, Optional[bytes], str]],
+    file_id: str,
+    budget: _ContainerBudget,
+    top: bool,
+    names: List[str],
+    warnings: List[str],
+    meta: Dict[str, Any],
+) -> List[Tuple[str, ExtractionResult]]:
+    """
+    Run (name, content, skip reason) items through ``_extract_member`` and
+    return the results in member order. Top-level containers fan out on the
+    container pool, with at most ``2 * CONTAINER_WORKERS`` decoded members
+    in flight. Nested containers run serially in the worker that found them,
+    because a pool thread waiting on tasks queued behind it could deadlock.
+    """
+    results: Dict[int, Tuple[str, ExtractionResult]] = {}
+    pending: Dict[Any, Tuple[int, str]] = {}
+    skipped: List[Dict[str, str]] = meta.setdefault("skipped", [])
+    pool = _container_pool() if top and CONTAINER_WORKERS > 1 else None
+
+    def collect(futures: Any) -> None:
+        for fut in futures:
+            index, name = pending.pop(fut)
+            results[index] = (name, fut.result())
+
+    try:
+        for index, (name, content, reason) in enumerate(members):
+            names.append(name)
+            member_id = f"{file_id}/{index}"
+            if content is None:
+                skipped.append({"name": name, "reason": reason})
+                warnings.append(f"{name}: skipped ({reason})")
+            elif pool is None:
+                results[index] = (name, _extract_member(content, member_id, name, budget))
+            else:
+                if len(pending) >= 2 * CONTAINER_WORKERS:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                pending[pool.submit(_extract_member, content, member_id, name, budget)] = (index, name)
+    except _BudgetExhausted as exc:
+        warnings.append(f"Extraction stopped: {exc}")
+        meta["limit_reached"] = str(exc)
+    finally:
+        collect(list(pending))
+    return [results[i] for i in sorted(results)]
+
+
+def _aggregate_members(
+    file_id: str,
+    filename: str,
+    doc_type: str,
+    members: List[Tuple[str, ExtractionResult]],
+    header_text: str,
+    meta: Dict[str, Any],
+    errors: List[str],
+    warnings: List[str],
+    method: str,
+    kv: Optional[Dict[str, Any]] = None,
+) -> ExtractionResult:
+    """
+    One parent result from per-member results. ``header_text`` (e.g. the
+    archive listing) becomes page 1; member pages follow, renumbered
+    consecutively, and ``metadata["members"]`` maps each member to its page
+    range. Member chunk spans are shifted into the parent text rather than
+    re-chunked, so no chunk spans two members; a member chunk outside any
+    section is filed under the member's name. Member errors become parent
+    warnings.
+    """
+    header_text = clean_raw_text(header_text)
+    pages = [PageContent(page_number=1, text=header_text)] if header_text else []
+    spans = Chunker().chunk_range(header_text, 0, len(header_text), 1) if header_text else []
+    tables: List[List[List[str]]] = []
+    columnar: List[ColumnarTable] = []
+    kv = dict(kv or {})
+    texts = [header_text] if header_text else []
+    length = len(header_text)  # len("\n\n".join(texts)), tracked as texts grow
+    member_meta: List[Dict[str, Any]] = []
+    for name, res in members:
+        first = len(pages) + 1
+        pages.extend(replace(page, page_number=first + i) for i, page in enumerate(res.pages))
+        tables.extend(res.tables)
+        columnar.extend(res.columnar_tables)
+        kv.update((f"{name}:{k}", v) for k, v in res.key_value_pairs.items())
+        warnings.extend(f"{name}: {w}" for w in res.warnings + res.errors)
+        if res.raw_text:
+            # Member raw_text is already clean and so is the label, so the
+            # joined text is clean and no offset moves.
+            label = clean_raw_text(f"[{name}]") + "\n"
+            base = length + (2 if texts else 0) + len(label)
+            texts.append(label + res.raw_text)
+            length = base + len(res.raw_text)
+            spans.extend(
+                span._replace(start=span.start + base, end=span.end + base,
+                              page=span.page + first - 1, section=span.section or name)
+                for span in res.chunk_spans
+            )
+        member_meta.append({
+            "name": name,
+            "file_id": res.file_id,
+            "document_type": res.document_type,
+            "success": res.success,
+            "extraction_method": res.extraction_method,
+            "first_page": first if res.pages else None,
+            "last_page": len(pages) if res.pages else None,
+            "chars": res.char_count,
+        })
+    meta["members"] = member_meta
+    confidences = [res.confidence for _, res in members]
+    result = _build_result(
+        file_id, filename, doc_type, "\n\n".join(texts),
+        pages, tables, kv, meta, method,
+        confidence=(sum(confidences) / len(confidences) if confidences else 0.8) if not errors else 0.3,
+        errors=errors, warnings=warnings, chunk_spans=spans, text_clean=True,
     )
+    result.columnar_tables = columnar
+    return result
+
 
+def _extract_archive(data: BufferLike, file_id: str, filename: str,
+                     budget: Optional[_ContainerBudget] = None) -> ExtractionResult:
+    """
+    Extract every member of a ZIP / TAR / gzip archive into one result.
+    Other archives (7z, RAR) succeed with a warning and no members.
 
-def _extract_archive(data: bytes, file_id: str, filename: str) -> ExtractionResult:
-    import zipfile, tarfile
-    errors, warnings, meta = [], [], {}
-    file_list = []
-    method = "archive"
+    Members are streamed out one at a time and dispatched through
+    ``extract_document`` (see ``_extract_members``). Nested archives
+    recurse under the same ``_ContainerBudget``.
+    """
+    top = budget is None
+    budget = budget or _ContainerBudget()
+    errors: List[str] = []
+    warnings: List[str] = []
+    meta: Dict[str, Any] = {"archive_type": "unknown", "depth": budget.depth}
+    names: List[str] = []
+    results: List[Tuple[str, ExtractionResult]] = []
     try:
-        if zipfile.is_zipfile(io.BytesIO(data)):
-            with zipfile.ZipFile(io.BytesIO(data)) as zf:
-                file_list = zf.namelist()
-                meta["archive_type"] = "zip"
-        elif tarfile.is_tarfile(io.BytesIO(data)):
-            with tarfile.open(fileobj=io.BytesIO(data)) as tf:
-                file_list = tf.getnames()
-                meta["archive_type"] = "tar"
+        members = _iter_archive_members(data, filename, budget, meta)
+        results = _extract_members(members, file_id, budget, top, names, warnings, meta)
+    except _UnsupportedArchive as exc:
+        # Accepted at ingest; stored without a listing rather than failed.
+        warnings.append(f"Archive members not extracted: {exc}")
     except Exception as exc:
-        errors.append(f"Archive listing failed: {exc}")
-    meta["file_count"] = len(file_list)
-    meta["files"] = file_list[:50]
-    raw_text = "Archive contents:\n" + "\n".join(file_list)
-    pages = [PageContent(page_number=1, text=raw_text)]
-    return _build_result(
-        file_id, filename, "archive", raw_text,
-        pages, [], {}, meta, method,
-        confidence=0.8 if not errors else 0.3,
-        errors=errors, warnings=warnings,
+        errors.append(f"Archive extraction failed: {exc}")
+
+    meta["file_count"] = len(names)
+    meta["files"] = names[:50]
+    listing = "Archive contents:\n" + "\n".join(names)
+    return _aggregate_members(
+        file_id, filename, "archive", results,
+        listing, meta, errors, warnings, "archive",
+    )
+
+
+def _iter_email_leaves(part: Any) -> Iterator[Any]:
+    """Non-multipart parts in document order; attached messages are not entered."""
+    if part.is_multipart() and part.get_content_type() != "message/rfc822":
+        for sub in part.iter_parts():
+            yield from _iter_email_leaves(sub)
+    else:
+        yield part
+
+
+def _email_text(part: Any) -> Tuple[str, Optional[str]]:
+    """
+    (text, warning) for an inline text/plain part. A declared charset that
+    Python does not know is replaced by detection rather than failing the
+    message; undecodable bytes become U+FFFD.
+    """
+    payload = part.get_payload(decode=True) or b""
+    declared = part.get_content_charset()
+    if declared:
+        try:
+            return str(payload, codecs.lookup(declared).name, errors="replace"), None
+        except LookupError:
+            text, guess = decode_bytes(payload)
+            return text, f"unknown charset {declared!r}, decoded as {guess.encoding}"
+    return decode_bytes(payload)[0], None
+
+
+def _iter_email_attachments(msg: Any, budget: _ContainerBudget, body: List[str], html_body: List[bytes],
+                            warnings: List[str]) -> Iterator[Tuple[str, Optional[bytes], str]]:
+    """
+    Walk the MIME tree lazily. Inline text parts are appended to ``body``
+    (or ``html_body``) as they are met; one that cannot be read becomes a
+    warning. Attachments are yielded as (name, content, skip reason) and
+    decoded only when their turn comes. Oversized ones are rejected from
+    their encoded length, before decoding.
+    """
+    for index, part in enumerate(_iter_email_leaves(msg)):
+        ctype = part.get_content_type()
+        filename = part.get_filename()
+        if ctype == "message/rfc822":
+            # Attached messages are already parsed, so their size is exact;
+            # they count against the same limits as any other attachment.
+            inner = part.get_payload(0)
+            name = f"{inner.get('Subject') or f'message-{index}'}.eml"
+            content = inner.as_bytes()
+            if len(content) > EMAIL_MAX_ATTACHMENT_BYTES:
+                yield name, None, f"{len(content)} bytes, over the {EMAIL_MAX_ATTACHMENT_BYTES // (1024 * 1024)} MB attachment limit"
+                continue
+            budget.claim_member()
+            budget.charge(len(content))
+            yield name, content, ""
+            continue
+        if not filename and part.get_content_disposition() != "attachment":
+            try:
+                if ctype == "text/plain":
+                    text, warning = _email_text(part)
+                    body.append(text)
+                    if warning:
+                        warnings.append(f"body part {index}: {warning}")
+                elif ctype == "text/html":
+                    html_body.append(part.get_payload(decode=True) or b"")
+            except Exception as exc:
+                warnings.append(f"body part {index} not read: {exc}")
+            continue
+        name = filename or f"attachment-{index}{mimetypes.guess_extension(ctype) or '.bin'}"
+        encoded = part.get_payload(decode=False)
+        estimate = len(encoded) * 3 // 4 if part.get("Content-Transfer-Encoding", "").lower() == "base64" \
+            else len(encoded)
+        if estimate > EMAIL_MAX_ATTACHMENT_BYTES:
+            yield name, None, f"about {estimate} bytes, over the {EMAIL_MAX_ATTACHMENT_BYTES // (1024 * 1024)} MB attachment limit"
+            continue
+        budget.claim_member()
+        content = part.get_payload(decode=True) or b""
+        budget.charge(len(content))
+        yield name, content, ""
+
+
+def _extract_email(data: BufferLike, file_id: str, filename: str,
+                   budget: Optional[_ContainerBudget] = None) -> ExtractionResult:
+    """
+    Extract an RFC 822 message: the text body as page 1, then every
+    attachment dispatched through ``extract_document``, concurrently and
+    under the container budget. ``metadata["members"]`` links each
+    attachment result (file_id ``<message file_id>/<n>``) to this message.
+    An HTML-only body is extracted like an attachment named ``body.html``.
+    """
+    from email import policy
+    from email.parser import BytesParser
+
+    top = budget is None
+    budget = budget or _ContainerBudget()
+    errors: List[str] = []
+    warnings: List[str] = []
+    names: List[str] = []
+    body: List[str] = []
+    html_body: List[bytes] = []
+    results: List[Tuple[str, ExtractionResult]] = []
+    meta: Dict[str, Any] = {}
+    kv: Dict[str, Any] = {}
+    try:
+        msg = BytesParser(policy=policy.default).parse(_as_stream(data))
+        meta.update({
+            "from": str(msg.get("From", "")),
+            "to": str(msg.get("To", "")),
+            "subject": str(msg.get("Subject", "")),
+            "date": str(msg.get("Date", "")),
+            "message_id": str(msg.get("Message-ID", "")),
+        })
+        kv.update(meta)
+        members = _iter_email_attachments(msg, budget, body, html_body, warnings)
+        results = _extract_members(members, file_id, budget, top, names, warnings, meta)
+        if not body and html_body:
+            html_id = f"{file_id}/body"
+            results.insert(0, ("body.html", extract_document(b"\n".join(html_body), html_id, "body.html", "text/html")))
+    except Exception as exc:
+        errors.append(f"Email extraction failed: {exc}")
+    meta["attachment_count"] = len(names)
+    meta["attachments"] = names[:50]
+    return _aggregate_members(
+        file_id, filename, "email", results,
+        "\n\n".join(body), meta, errors, warnings, "email-stdlib", kv=kv,
     )
 
 
+_CONTAINER_EXTRACTORS: Dict[str, Callable[..., ExtractionResult]] = {
+    ".zip": _extract_archive,
+    ".tar": _extract_archive,
+    ".gz": _extract_archive,
+    ".7z": _extract_archive,
+    ".rar": _extract_archive,
+    ".eml": _extract_email,
+    ".msg": _extract_email,
+}
+
+
 # ---------------------------------------------------------------------------
 # Dispatcher
 # ---------------------------------------------------------------------------
@@ -589,12 +1990,15 @@ _EXT_TO_EXTRACTOR = {
     ".pptx": _extract_pptx,
     ".ppt": _extract_pptx,
     ".json": _extract_json,
-    ".jsonl": _extract_json,
+    ".jsonl": _extract_jsonl,
     ".html": _extract_html,
     ".htm": _extract_html,
     ".xhtml": _extract_html,
     ".xml": _extract_xml,
     ".yaml": _extract_yaml,
+    ".parquet": _extract_parquet,
+    ".feather": _extract_feather,
+    ".avro": _extract_avro,
     ".yml": _extract_yaml,
     ".txt": _extract_text,
     ".md": lambda d, fid, fn: _extract_text(d, fid, fn, "markdown"),
@@ -623,6 +2027,13 @@ _EXT_TO_EXTRACTOR = {
     ".sql": lambda d, fid, fn: _extract_text(d, fid, fn, "sql"),
 }
 
+_PATH_AWARE_EXTRACTORS = frozenset({_extract_pdf, _extract_parquet, _extract_feather, _extract_avro})
+
+# Formats whose pages can be yielded one at a time.
+_PAGE_ITERATORS = {
+    ".pdf": _iter_pdf_pages,
+}
+
 _MIME_TO_EXT = {
     "application/pdf": ".pdf",
     "application/vnd.openxmlformats-officedocument.wordprocessingml.document": ".docx",
@@ -630,6 +2041,8 @@ _MIME_TO_EXT = {
     "application/vnd.openxmlformats-officedocument.presentationml.presentation": ".pptx",
     "text/csv": ".csv",
     "application/json": ".json",
+    "application/x-ndjson": ".jsonl",
+    "application/jsonl": ".jsonl",
     "text/html": ".html",
     "text/xml": ".xml",
     "application/xml": ".xml",
@@ -641,22 +2054,99 @@ _MIME_TO_EXT = {
     "image/webp": ".webp",
     "text/plain": ".txt",
     "message/rfc822": ".eml",
+    "application/msword": ".doc",
+    "application/vnd.ms-excel": ".xls",
+    "application/vnd.ms-powerpoint": ".ppt",
+    "application/vnd.ms-outlook": ".msg",
+    "application/vnd.oasis.opendocument.text": ".odt",
+    "application/vnd.oasis.opendocument.spreadsheet": ".ods",
+    "application/vnd.oasis.opendocument.presentation": ".odp",
+    "application/zip": ".zip",
+    "application/gzip": ".gz",
+    "application/x-tar": ".tar",
+    "application/x-7z-compressed": ".7z",
+    "application/vnd.rar": ".rar",
+    "application/vnd.apache.parquet": ".parquet",
+    "application/vnd.apache.arrow.file": ".feather",
+    "application/avro": ".avro",
 }
 
+# MIME types that come from binary signatures / container inspection rather
+# than text heuristics. When one of these disagrees with the extension (a
+# renamed file), the content wins.
+_SNIFFED_MIMES = frozenset({
+    "application/pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    "application/msword",
+    "application/vnd.ms-excel",
+    "application/vnd.ms-powerpoint",
+    "application/vnd.ms-outlook",
+    "application/vnd.oasis.opendocument.text",
+    "application/vnd.oasis.opendocument.spreadsheet",
+    "application/vnd.oasis.opendocument.presentation",
+    "application/zip",
+    "application/gzip",
+    "application/x-tar",
+    "application/x-7z-compressed",
+    "application/vnd.rar",
+    "application/vnd.apache.parquet",
+    "application/vnd.apache.arrow.file",
+    "application/avro",
+    "image/jpeg",
+    "image/png",
+    "image/gif",
+    "image/tiff",
+    "image/bmp",
+    "image/webp",
+})
+
+# Extensions of text formats; only a strong signature (see
+# mime.WEAK_SIGNATURE_MIMES) re-routes them.
+_TEXT_EXTENSIONS = frozenset({
+    ".txt", ".md", ".rst", ".log", ".csv", ".tsv", ".json", ".jsonl", ".html", ".htm", ".xhtml",
+    ".xml", ".yaml", ".yml", ".eml", ".py", ".js", ".ts", ".java", ".sql",
+})
+
+
+def resolve_extension(filename: str, mime_type: str = "") -> str:
+    """
+    Return the extension key ``extract_document`` will dispatch on.
+
+    The filename's extension is used unless the sniffed MIME type is a
+    binary signature that maps to a different extractor. A text extension
+    only gives way to a strong (four bytes or more) signature.
+    """
+    ext = Path(filename).suffix.lower()
+    sniffed_ext = _MIME_TO_EXT.get(mime_type, "")
+    if ext in _TEXT_EXTENSIONS and mime_type in WEAK_SIGNATURE_MIMES:
+        return ext
+    if mime_type in _SNIFFED_MIMES and sniffed_ext:
+        if _EXT_TO_EXTRACTOR.get(ext) is not _EXT_TO_EXTRACTOR.get(sniffed_ext):
+            return sniffed_ext
+    if ext not in _EXT_TO_EXTRACTOR:
+        ext = sniffed_ext
+    return ext
+
 
 def extract_document(
-    file_data: bytes,
+    file_data: BufferLike,
     file_id: str,
     filename: str,
     mime_type: str = "",
+    source_path: Optional[str] = None,
 ) -> ExtractionResult:
     """
     Dispatch extraction based on file extension (MIME type as fallback).
-    """
-    ext = Path(filename).suffix.lower()
-    if ext not in _EXT_TO_EXTRACTOR:
-        ext = _MIME_TO_EXT.get(mime_type, "")
 
+    ``file_data`` may be bytes or any read-only buffer (e.g. a memoryview
+    over an mmap'd temp file). Extractors whose libraries take file objects
+    receive a seekable view instead of a copy. ``source_path``, when the
+    bytes also live on disk, lets path-aware extractors (PDF) hand the file
+    to worker processes instead of pickling the content.
+    """
+    ext = resolve_extension(filename, mime_type)
     extractor = _EXT_TO_EXTRACTOR.get(ext)
 
     if extractor is None:
@@ -665,26 +2155,92 @@ def extract_document(
         return _extract_text(file_data, file_id, filename, doc_type=ext.lstrip(".") or "unknown")
 
     try:
+        if extractor in _PATH_AWARE_EXTRACTORS:
+            return extractor(file_data, file_id, filename, path=source_path)
         return extractor(file_data, file_id, filename)
     except Exception as exc:
         logger.error("Extractor crashed for %s: %s", filename, exc)
-        return ExtractionResult(
-            success=False,
-            file_id=file_id,
-            filename=filename,
-            document_type=ext.lstrip(".") or "unknown",
-            raw_text="",
-            pages=[],
-            tables=[],
-            key_value_pairs={},
-            metadata={},
-            language="unknown",
-            word_count=0,
-            char_count=0,
-            page_count=0,
-            extraction_method="failed",
-            confidence=0.0,
-            chunks=[],
-            errors=[f"Extraction crashed: {exc}", traceback.format_exc()],
-            warnings=[],
+        return failed_result(
+            file_id, filename, ext.lstrip(".") or "unknown",
+            [f"Extraction crashed: {exc}", traceback.format_exc()],
         )
+
+
+def failed_result(file_id: str, filename: str, doc_type: str, errors: List[str],
+                  metadata: Optional[Dict[str, Any]] = None) -> ExtractionResult:
+    """An empty, unsuccessful ExtractionResult carrying ``errors``."""
+    return ExtractionResult(
+        success=False,
+        file_id=file_id,
+        filename=filename,
+        document_type=doc_type,
+        raw_text="",
+        pages=[],
+        tables=[],
+        key_value_pairs={},
+        metadata=metadata or {},
+        language="unknown",
+        word_count=0,
+        char_count=0,
+        page_count=0,
+        extraction_method="failed",
+        confidence=0.0,
+        chunk_spans=[],
+        errors=errors,
+        warnings=[],
+    )
+
+
+def streams_pages(filename: str, mime_type: str = "") -> bool:
+    """True if ``iter_extract_pages`` yields this format page by page."""
+    return resolve_extension(filename, mime_type) in _PAGE_ITERATORS
+
+
+def iter_extract_pages(
+    file_data: BufferLike,
+    file_id: str,
+    filename: str,
+    mime_type: str = "",
+    source_path: Optional[str] = None,
+    report: Optional[ExtractionReport] = None,
+) -> Iterator[PageContent]:
+    """
+    Yield PageContent in page order as each page becomes ready.
+
+    Parameters
+    ----------
+    file_data, file_id, filename, mime_type, source_path
+        As for ``extract_document``.
+    report : ExtractionReport, optional
+        Receives document type, metadata, method, tables, errors and
+        warnings. Pass it to ``build_extraction_result`` afterwards if the
+        full ExtractionResult is needed.
+
+    Formats without a page-streaming extractor (see ``streams_pages``) are
+    extracted in full first and their pages yielded afterwards.
+    """
+    report = report if report is not None else ExtractionReport()
+    ext = resolve_extension(filename, mime_type)
+    page_iter = _PAGE_ITERATORS.get(ext)
+
+    if page_iter is None:
+        result = extract_document(file_data, file_id, filename, mime_type, source_path)
+        report.document_type = result.document_type
+        report.extraction_method = result.extraction_method
+        report.metadata = result.metadata
+        report.key_value_pairs = result.key_value_pairs
+        report.tables = result.tables
+        report.confidence = result.confidence
+        report.errors = result.errors
+        report.warnings = result.warnings
+        report.result = result
+        yield from result.pages
+        return
+
+    try:
+        yield from page_iter(file_data, report, path=source_path)
+    except Exception as exc:
+        logger.error("Page extractor crashed for %s: %s", filename, exc)
+        report.errors.extend([f"Extraction crashed: {exc}", traceback.format_exc()])
+        report.extraction_method = "failed"
+        report.confidence = 0.0
@@ -0,0 +1,149 @@
+"""
+Content Hashing - single-pass multi-digest helper for the INGEST stage
+
+MultiHasher feeds every requested digest from the same chunk, so a file is
+read once no matter how many digests are needed. hashlib releases the GIL for
+updates larger than ~2 KB; in background mode each digest runs on its own
+helper thread, so SHA-256 and MD5 proceed in parallel with each other and
+with the caller reading and writing the next block.
+
+Supported algorithms: any hashlib name (sha256, md5, blake2b, ...) plus
+xxh64 / xxh3_64 / xxh3_128 when the ``xxhash`` package is installed.
+FAST_ALGORITHM names the cheapest available non-cryptographic digest for
+internal keys.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import queue
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+try:
+    import xxhash  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    xxhash = None
+
+HASH_CHUNK_BYTES: int = 1024 * 1024
+BACKGROUND_THRESHOLD_BYTES: int = int(os.getenv("HASH_BACKGROUND_THRESHOLD_KB", "1024")) * 1024
+FAST_ALGORITHM: str = "xxh3_64" if xxhash is not None else "blake2b"
+
+_XXHASH_ALGORITHMS = ("xxh64", "xxh3_64", "xxh3_128")
+_STOP = object()
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def _new_hash(name: str):
+    if name in _XXHASH_ALGORITHMS:
+        if xxhash is None:
+            raise ValueError(f"{name} requires the 'xxhash' package")
+        return getattr(xxhash, name)()
+    return hashlib.new(name)
+
+
+class MultiHasher:
+    """
+    Incrementally compute several digests in one pass.
+
+    With ``background=True`` updates move to one helper thread per digest
+    once more than ``background_threshold`` bytes have been fed (small inputs
+    never pay for the threads). At most ``max_pending`` chunks are queued per
+    digest; chunks are shared, so extra memory is bounded by ``max_pending``
+    blocks.
+    """
+
+    def __init__(
+        self,
+        algorithms: Sequence[str] = ("sha256", "md5"),
+        background: bool = False,
+        background_threshold: int = BACKGROUND_THRESHOLD_BYTES,
+        max_pending: int = 4,
+    ) -> None:
+        self._hashers = [(name, _new_hash(name)) for name in algorithms]
+        self._background = background
+        self._threshold = background_threshold
+        self._max_pending = max_pending
+        self._seen = 0
+        self._queues: List[queue.Queue] = []
+        self._threads: List[threading.Thread] = []
+        self._error: Optional[BaseException] = None
+
+    def _worker(self, h, q: queue.Queue) -> None:
+        while True:
+            chunk = q.get()
+            if chunk is _STOP:
+                return
+            if self._error is None:
+                try:
+                    h.update(chunk)
+                except BaseException as exc:  # surfaced from hexdigests()
+                    self._error = exc
+
+    def _start_workers(self) -> None:
+        for name, h in self._hashers:
+            q: queue.Queue = queue.Queue(maxsize=self._max_pending)
+            t = threading.Thread(target=self._worker, args=(h, q), name=f"hash-{name}", daemon=True)
+            t.start()
+            self._queues.append(q)
+            self._threads.append(t)
+
+    def update(self, chunk: Buffer) -> None:
+        """Feed a chunk. The caller must not mutate it after handing it over."""
+        self._seen += len(chunk)
+        if not self._threads and self._background and self._seen > self._threshold:
+            self._start_workers()
+        if self._threads:
+            for q in self._queues:
+                q.put(chunk)
+        else:
+            for _, h in self._hashers:
+                h.update(chunk)
+
+    def close(self) -> None:
+        """Stop the helper threads once queued chunks are consumed. Safe to repeat."""
+        for q in self._queues:
+            q.put(_STOP)
+        for t in self._threads:
+            t.join()
+        self._queues, self._threads = [], []
+
+    def hexdigests(self) -> Dict[str, str]:
+        """Finish all pending updates and return {algorithm: hexdigest}."""
+        self.close()
+        if self._error is not None:
+            raise self._error
+        return {name: h.hexdigest() for name, h in self._hashers}
+
+
+def hash_chunks(chunks: Iterable[Buffer], algorithms: Sequence[str] = ("sha256", "md5"),
+                background: bool = True) -> Dict[str, str]:
+    """Hash an iterable of blocks in one pass."""
+    hasher = MultiHasher(algorithms, background=background)
+    for chunk in chunks:
+        hasher.update(chunk)
+    return hasher.hexdigests()
+
+
+def hash_buffer(data: Buffer, algorithms: Sequence[str] = ("sha256", "md5"),
+                chunk_size: int = HASH_CHUNK_BYTES, background: bool = True) -> Dict[str, str]:
+    """
+    Hash an in-memory buffer in one chunked pass.
+
+    Each chunk is fed to every digest while it is still hot in cache, rather
+    than running one full pass per algorithm. Buffers above the background
+    threshold are hashed on per-digest threads.
+    """
+    view = memoryview(data).cast("B")
+    hasher = MultiHasher(algorithms, background=background)
+    for offset in range(0, len(view), chunk_size):
+        hasher.update(view[offset:offset + chunk_size])
+    return hasher.hexdigests()
+
+
+def sha256_md5(data: Buffer, with_md5: bool = True) -> Tuple[str, str]:
+    """(sha256, md5) hex digests; md5 is "" when not requested."""
+    digests = hash_buffer(data, ("sha256", "md5") if with_md5 else ("sha256",))
+    return digests["sha256"], digests.get("md5", "")
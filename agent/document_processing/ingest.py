@@ -6,12 +6,15 @@ Handles:
 - Support for ALL file types: PDF, DOCX, XLSX, CSV, TXT, JSON, XML,
   PPTX, ODT, RTF, images (PNG/JPG/TIFF/BMP/GIF/WEBP), audio, HTML,
   Markdown, YAML, TOML, parquet, and more
-- Malware/virus scanning via ClamAV (if available) with hash-based fallback
+- Malware/virus scanning via pooled ClamAV sessions (if available) with
+  hash-based fallback and a SHA-256 verdict cache
 - File size enforcement with configurable limits
-- MIME type detection via magic bytes (not just extension)
-- Duplicate detection via SHA-256 hash
-- Temporary storage management with TTL
+- MIME type detection via indexed magic bytes and ZIP/OLE container
+  inspection (not just extension)
+- Duplicate detection via SHA-256 hash (persistent, shared across workers)
+- Content-addressed temporary storage with background TTL expiry
 - Structured error reporting and user feedback
+- Bulk ingest (ingest_many) for directories and upload batches
 - Metadata extraction at intake (file stats, hash, timestamps)
 
 Triggered automatically when users upload documents - no explicit instruction needed.
@@ -19,21 +22,25 @@ Triggered automatically when users upload documents - no explicit instruction ne
 
 from __future__ import annotations
 
-import hashlib
 import io
 import json
 import logging
-import mimetypes
 import os
 import re
-import shutil
-import tempfile
+import sqlite3
 import time
 import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass, field, asdict
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .dedup_registry import get_duplicate_registry
+from .hashing import MultiHasher
+from .mime import SIGNATURE_WINDOW, SIGNATURES, detect_mime
+from .scanner import ScanSource, get_scanner
+from .temp_store import TEMP_STORE_DIR, get_temp_store
 
 logger = logging.getLogger(__name__)
 
@@ -42,8 +49,13 @@ logger = logging.getLogger(__name__)
 # ---------------------------------------------------------------------------
 
 MAX_FILE_SIZE_BYTES: int = int(os.getenv("MAX_FILE_SIZE_MB", "100")) * 1024 * 1024  # 100 MB default
-TEMP_DIR: Path = Path(os.getenv("TEMP_UPLOAD_DIR", tempfile.gettempdir())) / "doc_processing"
-TEMP_TTL_SECONDS: int = 3600  # 1 hour
+INGEST_CHUNK_BYTES: int = int(os.getenv("INGEST_CHUNK_KB", "1024")) * 1024  # 1 MB read blocks
+SNIFF_BYTES: int = max(4096, SIGNATURE_WINDOW)  # header bytes kept for MIME detection
+BULK_INGEST_WORKERS: int = int(os.getenv("BULK_INGEST_WORKERS", str(min(8, (os.cpu_count() or 1) * 2))))
+# ingest_many commits completed uploads in batches of up to this many, or
+# whatever has completed once the oldest has waited this long.
+BULK_COMMIT_BATCH: int = int(os.getenv("BULK_COMMIT_BATCH", "64"))
+BULK_COMMIT_MAX_WAIT_SECONDS: float = float(os.getenv("BULK_COMMIT_MAX_WAIT_MS", "50")) / 1000
 ALLOWED_EXTENSIONS: frozenset = frozenset({
     # Documents
     ".pdf", ".doc", ".docx", ".odt", ".rtf", ".txt", ".md", ".rst",
@@ -70,27 +82,10 @@ ALLOWED_EXTENSIONS: frozenset = frozenset({
     ".log",
 })
 
-# Magic bytes for MIME detection (extend as needed)
+# Offset-0 magic bytes (kept for callers that inspect it; the full,
+# prefix-indexed signature table lives in mime.SIGNATURES)
 MAGIC_MAP: Dict[bytes, str] = {
-    b"\x25\x50\x44\x46": "application/pdf",
-    b"\x50\x4B\x03\x04": "application/zip",  # DOCX/XLSX/PPTX are zips
-    b"\xD0\xCF\x11\xE0": "application/vnd.ms-office",  # DOC/XLS/PPT (OLE)
-    b"\xFF\xD8\xFF": "image/jpeg",
-    b"\x89\x50\x4E\x47": "image/png",
-    b"\x47\x49\x46\x38": "image/gif",
-    b"\x42\x4D": "image/bmp",
-    b"\x49\x49\x2A\x00": "image/tiff",
-    b"\x4D\x4D\x00\x2A": "image/tiff",
-    b"\x52\x49\x46\x46": "image/webp",
-    b"\x1F\x8B": "application/gzip",
-    b"\x42\x5A\x68": "application/x-bzip2",
-    b"<!DOC": "text/html",
-    b"<html": "text/html",
-    b"<?xml": "text/xml",
-    b"{\n": "application/json",
-    b'{"': "application/json",
-    b"[{": "application/json",
-    b"PAR1": "application/vnd.apache.parquet",
+    parts[0][1]: mime for mime, parts in SIGNATURES if len(parts) == 1 and parts[0][0] == 0
 }
 
 KNOWN_MALICIOUS_HASHES: frozenset = frozenset()  # populate from threat-intel feed
@@ -137,206 +132,488 @@ def _sanitize_filename(name: str) -> str:
     return f"{stem}{suffix}"
 
 
-def _compute_hashes(data: bytes) -> Tuple[str, str]:
-    sha256 = hashlib.sha256(data).hexdigest()
-    md5 = hashlib.md5(data).hexdigest()
-    return sha256, md5
-
-
-def _detect_mime(data: bytes, filename: str) -> str:
-    """Detect MIME type from magic bytes first, then fallback to extension."""
-    header = data[:8]
-    for magic, mime in MAGIC_MAP.items():
-        if header.startswith(magic):
-            # Distinguish OOXML (docx/xlsx/pptx) from generic zip
-            if mime == "application/zip":
-                ext = Path(filename).suffix.lower()
-                if ext == ".docx":
-                    return "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                if ext == ".xlsx":
-                    return "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                if ext == ".pptx":
-                    return "application/vnd.openxmlformats-officedocument.presentationml.presentation"
-            return mime
-    # Text sniff
+@dataclass
+class _SpoolResult:
+    size: int
+    header: bytes
+    sha256: str
+    md5: str
+    oversize: bool
+
+
+def _iter_chunks(
+    file_data: Union[bytes, bytearray, io.IOBase],
+    chunk_size: int = INGEST_CHUNK_BYTES,
+) -> Iterator[bytes]:
+    """Yield fixed-size blocks from bytes or a binary file-like object."""
+    if isinstance(file_data, (bytes, bytearray, memoryview)):
+        view = memoryview(file_data)
+        for offset in range(0, len(view), chunk_size):
+            yield view[offset:offset + chunk_size]
+        return
+    while True:
+        block = file_data.read(chunk_size)
+        if not block:
+            return
+        yield block
+
+
+def _spool_to_temp(
+    file_data: Union[bytes, bytearray, io.IOBase],
+    dest: Path,
+    max_size_bytes: int,
+    compute_md5: bool = True,
+) -> _SpoolResult:
+    """
+    Stream the upload to ``dest`` block by block.
+
+    Hashes and the MIME sniff header are updated incrementally, so peak memory
+    is one block plus ``SNIFF_BYTES`` regardless of file size. Reading stops as
+    soon as ``max_size_bytes`` is crossed; the partial spool file is removed and
+    the digests are left empty. Digests of large uploads are computed on a
+    helper thread while the next block is read and written. If reading or
+    writing fails, the hash threads are stopped and the partial file removed
+    before the error propagates.
+    """
+    hasher = MultiHasher(("sha256", "md5") if compute_md5 else ("sha256",), background=True)
+    header = bytearray()
+    size = 0
     try:
-        sample = data[:4096].decode("utf-8", errors="ignore")
-        if sample.strip().startswith("{") or sample.strip().startswith("["):
-            return "application/json"
-        if "," in sample and "\n" in sample:
-            ext = Path(filename).suffix.lower()
-            if ext in (".csv", ".tsv"):
-                return "text/csv"
-    except Exception:
-        pass
-    guessed, _ = mimetypes.guess_type(filename)
-    return guessed or "application/octet-stream"
-
-
-def _scan_for_malware(data: bytes, sha256: str) -> Tuple[str, str]:
+        with open(dest, "wb") as out:
+            for block in _iter_chunks(file_data):
+                size += len(block)
+                if size > max_size_bytes:
+                    break
+                if len(header) < SNIFF_BYTES:
+                    header += block[:SNIFF_BYTES - len(header)]
+                hasher.update(block)
+                out.write(block)
+        digests = hasher.hexdigests()
+    except BaseException:
+        # A failed read or write (or hash) leaves no partial spool file.
+        dest.unlink(missing_ok=True)
+        raise
+    finally:
+        hasher.close()
+    if size > max_size_bytes:
+        dest.unlink(missing_ok=True)
+        return _SpoolResult(size=size, header=bytes(header), sha256="", md5="", oversize=True)
+    return _SpoolResult(
+        size=size,
+        header=bytes(header),
+        sha256=digests["sha256"],
+        md5=digests.get("md5", ""),
+        oversize=False,
+    )
+
+
+def _detect_mime(data: bytes, filename: str, path: Optional[str] = None) -> str:
     """
-    Attempt ClamAV scan; fall back to hash-list check.
-    Returns (status, detail).
+    Detect MIME type from magic bytes and container structure first, then
+    fall back to text sniffing and the extension. ``path`` enables ZIP/OLE
+    sub-type detection on the full spooled file.
     """
-    if sha256 in KNOWN_MALICIOUS_HASHES:
-        return "threat_found", f"Hash {sha256} matches known-malicious database"
+    return detect_mime(data[:SNIFF_BYTES], filename, path)
 
-    try:
-        import clamd  # type: ignore
-        cd = clamd.ClamdUnixSocket()
-        result = cd.instream(io.BytesIO(data))
-        stream_result = result.get("stream", ("OK", ""))
-        if stream_result[0] == "FOUND":
-            return "threat_found", stream_result[1]
-        return "clean", "ClamAV scan passed"
-    except Exception:
-        pass
-
-    return "skipped", "Antivirus unavailable; hash-list check passed"
-
-
-def _cleanup_old_temp_files() -> None:
-    """Remove temp files older than TEMP_TTL_SECONDS."""
-    if not TEMP_DIR.exists():
-        return
-    now = time.time()
-    for p in TEMP_DIR.iterdir():
-        if p.is_file() and (now - p.stat().st_mtime) > TEMP_TTL_SECONDS:
-            try:
-                p.unlink()
-            except Exception:
-                pass
 
+def _start_malware_scan(data: ScanSource, sha256: str) -> "Future[Tuple[str, str]]":
+    """
+    Start a malware scan and return a Future of (status, detail).
 
-# ---------------------------------------------------------------------------
-# Duplicate registry (in-process; replace with Redis/DB for production)
-# ---------------------------------------------------------------------------
+    The hash-list check resolves immediately; otherwise the pooled ClamAV
+    scanner runs on its own threads (verdicts are cached by SHA-256), so the
+    caller can carry on with MIME detection and the duplicate lookup.
+    """
+    if sha256 in KNOWN_MALICIOUS_HASHES:
+        fut: "Future[Tuple[str, str]]" = Future()
+        fut.set_result(("threat_found", f"Hash {sha256} matches known-malicious database"))
+        return fut
+    return get_scanner().submit(data, sha256)
 
-_SEEN_HASHES: Dict[str, str] = {}  # sha256 -> file_id
 
+# ---------------------------------------------------------------------------
+# Duplicate registry (pluggable; see dedup_registry.py)
+# ---------------------------------------------------------------------------
 
 def _check_duplicate(sha256: str) -> Optional[str]:
-    return _SEEN_HASHES.get(sha256)
+    return get_duplicate_registry().lookup(sha256)
 
 
 def _register_hash(sha256: str, file_id: str) -> None:
-    _SEEN_HASHES[sha256] = file_id
+    get_duplicate_registry().register(sha256, file_id)
 
 
 # ---------------------------------------------------------------------------
 # Main entry point
 # ---------------------------------------------------------------------------
 
-def ingest_document(
+@dataclass
+class _PendingIngest:
+    """An upload that has been spooled, sniffed and scanned but not committed."""
+    file_id: str
+    filename: str
+    safe_name: str
+    detected_ext: str
+    spool_path: Path
+    spool: _SpoolResult
+    mime_type: str
+    scan_status: str
+    scan_detail: str
+    errors: List[str]
+    warnings: List[str]
+
+
+def _failed_pending(filename: str, error: str) -> _PendingIngest:
+    safe_name = _sanitize_filename(filename)
+    return _PendingIngest(
+        file_id=str(uuid.uuid4()), filename=filename, safe_name=safe_name,
+        detected_ext=Path(safe_name).suffix.lower(), spool_path=Path(),
+        spool=_SpoolResult(size=0, header=b"", sha256="", md5="", oversize=False),
+        mime_type="application/octet-stream",
+        scan_status="skipped", scan_detail="Skipped due to prior errors",
+        errors=[error], warnings=[],
+    )
+
+
+def _prepare_ingest(
     file_data: Union[bytes, io.IOBase],
     filename: str,
-    max_size_bytes: int = MAX_FILE_SIZE_BYTES,
-    skip_scan: bool = False,
-) -> IngestResult:
-    """
-    Ingest a document and return an IngestResult.
-
-    Parameters
-    ----------
-    file_data : bytes or file-like object
-        Raw file content.
-    filename : str
-        Original filename from the upload.
-    max_size_bytes : int
-        Maximum allowed file size in bytes.
-    skip_scan : bool
-        Skip antivirus scan (for testing only).
-    """
+    max_size_bytes: int,
+    skip_scan: bool,
+    compute_md5: bool,
+) -> _PendingIngest:
+    """Spool, hash, validate, sniff and scan an upload (everything but the commit)."""
     file_id = str(uuid.uuid4())
     errors: List[str] = []
     warnings: List[str] = []
 
-    # Read data
-    if isinstance(file_data, (bytes, bytearray)):
-        data = bytes(file_data)
-    else:
-        data = file_data.read()
-
-    file_size = len(data)
     safe_name = _sanitize_filename(filename)
     detected_ext = Path(safe_name).suffix.lower()
 
-    # --- 1. Size check ---
-    if file_size == 0:
-        errors.append("File is empty.")
-    if file_size > max_size_bytes:
+    # --- 1. Stream to temp storage (hash + sniff + size limit as we go) ---
+    spool_path = TEMP_STORE_DIR / f".{file_id}.part"
+    try:
+        spool_path = get_temp_store().spool_path(file_id)
+        spool = _spool_to_temp(file_data, spool_path, max_size_bytes, compute_md5)
+    except (OSError, sqlite3.Error) as exc:
+        spool_path.unlink(missing_ok=True)
+        spool = _SpoolResult(size=0, header=b"", sha256="", md5="", oversize=False)
+        errors.append(f"Failed to write temp file: {exc}")
+
+    file_size = spool.size
+
+    # --- 2. Size check ---
+    if spool.oversize:
         errors.append(
-            f"File size {file_size / 1024 / 1024:.1f} MB exceeds limit "
-            f"of {max_size_bytes / 1024 / 1024:.0f} MB."
+            f"File size exceeds limit of {max_size_bytes / 1024 / 1024:.0f} MB "
+            f"(stopped reading after {file_size / 1024 / 1024:.1f} MB)."
         )
+    elif file_size == 0 and not errors:
+        errors.append("File is empty.")
 
-    # --- 2. Extension check ---
+    # --- 3. Extension check ---
     if detected_ext and detected_ext not in ALLOWED_EXTENSIONS:
         warnings.append(
             f"Extension '{detected_ext}' is not in the standard allow-list; "
             "will attempt best-effort processing."
         )
 
-    # --- 3. MIME detection ---
-    mime_type = _detect_mime(data, filename)
-
-    # --- 4. Hash computation ---
-    sha256, md5 = _compute_hashes(data)
+    # Kick off the scan now so it overlaps with MIME detection
+    scan_future = None
+    if not errors and not skip_scan:
+        scan_future = _start_malware_scan(spool_path, spool.sha256)
 
-    # --- 5. Duplicate check ---
-    dup_of = _check_duplicate(sha256)
-    is_duplicate = dup_of is not None
+    # --- 4. MIME detection ---
+    mime_type = _detect_mime(spool.header, filename, str(spool_path) if spool.size else None)
 
-    # --- 6. Malware scan ---
-    if errors or skip_scan:
+    # --- 5. Malware scan ---
+    if scan_future is None:
         scan_status, scan_detail = "skipped", "Skipped due to prior errors"
     else:
-        scan_status, scan_detail = _scan_for_malware(data, sha256)
+        scan_status, scan_detail = scan_future.result()
 
     if scan_status == "threat_found":
         errors.append(f"Security threat detected: {scan_detail}")
 
-    # --- 7. Persist to temp storage ---
+    return _PendingIngest(
+        file_id=file_id, filename=filename, safe_name=safe_name,
+        detected_ext=detected_ext, spool_path=spool_path, spool=spool,
+        mime_type=mime_type, scan_status=scan_status, scan_detail=scan_detail,
+        errors=errors, warnings=warnings,
+    )
+
+
+def _finish_ingest(pending: _PendingIngest, dup_of: Optional[str]) -> IngestResult:
+    """Commit the spooled file (hardlinked if the content is known) and build the result."""
+    errors = pending.errors
+    file_size = pending.spool.size
+    mime_type = pending.mime_type
+
     temp_path = ""
     if not errors:
-        TEMP_DIR.mkdir(parents=True, exist_ok=True)
-        _cleanup_old_temp_files()
-        temp_path = str(TEMP_DIR / f"{file_id}_{safe_name}")
         try:
-            Path(temp_path).write_bytes(data)
-            _register_hash(sha256, file_id)
-        except OSError as exc:
+            temp_path = get_temp_store().commit(
+                pending.spool_path, pending.spool.sha256, pending.file_id, pending.safe_name,
+            )
+        except (OSError, sqlite3.Error) as exc:
+            temp_path = ""
             errors.append(f"Failed to write temp file: {exc}")
+    if not temp_path and pending.spool_path.name:
+        pending.spool_path.unlink(missing_ok=True)
 
     result = IngestResult(
         success=len(errors) == 0,
-        file_id=file_id,
-        original_filename=filename,
-        safe_filename=safe_name,
+        file_id=pending.file_id,
+        original_filename=pending.filename,
+        safe_filename=pending.safe_name,
         temp_path=temp_path,
         file_size_bytes=file_size,
         mime_type=mime_type,
-        detected_extension=detected_ext,
-        sha256_hash=sha256,
-        md5_hash=md5,
-        is_duplicate=is_duplicate,
+        detected_extension=pending.detected_ext,
+        sha256_hash=pending.spool.sha256,
+        md5_hash=pending.spool.md5,
+        is_duplicate=dup_of is not None,
         duplicate_of=dup_of,
-        scan_status=scan_status,
-        scan_detail=scan_detail,
+        scan_status=pending.scan_status,
+        scan_detail=pending.scan_detail,
         ingest_timestamp=datetime.now(timezone.utc).isoformat(),
         metadata={
             "file_size_mb": round(file_size / 1024 / 1024, 3),
             "file_size_kb": round(file_size / 1024, 1),
-            "extension": detected_ext,
+            "extension": pending.detected_ext,
             "mime_type": mime_type,
         },
         errors=errors,
-        warnings=warnings,
+        warnings=pending.warnings,
     )
 
     if result.success:
-        logger.info("Ingested %s (%s, %d bytes) → %s", filename, mime_type, file_size, file_id)
+        logger.info("Ingested %s (%s, %d bytes) → %s", pending.filename, mime_type, file_size, pending.file_id)
     else:
-        logger.warning("Ingest failed for %s: %s", filename, errors)
+        logger.warning("Ingest failed for %s: %s", pending.filename, errors)
+
+    return result
+
 
+def ingest_document(
+    file_data: Union[bytes, io.IOBase],
+    filename: str,
+    max_size_bytes: int = MAX_FILE_SIZE_BYTES,
+    skip_scan: bool = False,
+    compute_md5: bool = True,
+) -> IngestResult:
+    """
+    Ingest a document and return an IngestResult.
+
+    Parameters
+    ----------
+    file_data : bytes or file-like object
+        Raw file content. File-like objects are read in ``INGEST_CHUNK_BYTES``
+        blocks and spooled straight to the temp store; the upload is never held
+        in memory as a whole.
+    filename : str
+        Original filename from the upload.
+    max_size_bytes : int
+        Maximum allowed file size in bytes.
+    skip_scan : bool
+        Skip antivirus scan (for testing only).
+    compute_md5 : bool
+        Also compute the MD5 digest; ``md5_hash`` is "" when disabled.
+    """
+    pending = _prepare_ingest(file_data, filename, max_size_bytes, skip_scan, compute_md5)
+    sha256 = pending.spool.sha256
+    dup_of = _check_duplicate(sha256) if sha256 and not pending.errors else None
+    result = _finish_ingest(pending, dup_of)
+    if result.success:
+        _register_hash(sha256, result.file_id)
     return result
+
+
+# ---------------------------------------------------------------------------
+# Bulk ingest
+# ---------------------------------------------------------------------------
+
+BulkSource = Union[str, Path, Tuple[Union[bytes, io.IOBase], str]]
+
+
+@dataclass
+class BulkIngestStats:
+    """Aggregate counters for one ``ingest_many`` run."""
+    files: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    duplicates: int = 0
+    bytes_ingested: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.bytes_ingested / 1024 / 1024 / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def record(self, result: IngestResult) -> None:
+        self.files += 1
+        if result.success:
+            self.succeeded += 1
+            self.bytes_ingested += result.file_size_bytes
+        else:
+            self.failed += 1
+        if result.is_duplicate:
+            self.duplicates += 1
+
+    def to_dict(self) -> Dict:
+        d = asdict(self)
+        d["files_per_second"] = round(self.files_per_second, 2)
+        d["mb_per_second"] = round(self.mb_per_second, 2)
+        return d
+
+
+def _expand_sources(sources: Iterable[BulkSource]) -> Iterator[Tuple[Union[bytes, io.IOBase, Path], str]]:
+    """Yield (data-or-path, filename) pairs; directories are walked recursively."""
+    for src in sources:
+        if isinstance(src, (str, Path)):
+            path = Path(src)
+            if path.is_dir():
+                for child in sorted(path.rglob("*")):
+                    if child.is_file():
+                        yield child, child.name
+            else:
+                yield path, path.name
+        else:
+            data, name = src
+            yield data, name
+
+
+def _prepare_bulk_item(
+    data: Union[bytes, io.IOBase, Path],
+    filename: str,
+    max_size_bytes: int,
+    skip_scan: bool,
+    compute_md5: bool,
+) -> _PendingIngest:
+    if isinstance(data, Path):
+        try:
+            fh = open(data, "rb")
+        except OSError as exc:
+            return _failed_pending(filename, f"Failed to open {data}: {exc}")
+        with fh:
+            return _prepare_ingest(fh, filename, max_size_bytes, skip_scan, compute_md5)
+    return _prepare_ingest(data, filename, max_size_bytes, skip_scan, compute_md5)
+
+
+def _discard_pending(pending: _PendingIngest) -> None:
+    """Drop an upload that will not be committed (its spool file included)."""
+    if pending.spool_path.name:
+        pending.spool_path.unlink(missing_ok=True)
+
+
+def _collect(fut: Future, name: str) -> _PendingIngest:
+    try:
+        return fut.result()
+    except Exception as exc:
+        logger.exception("Bulk ingest worker crashed for %s", name)
+        return _failed_pending(name, f"Ingest crashed: {exc}")
+
+
+def _finish_batch(batch: List[_PendingIngest]) -> List[IngestResult]:
+    """Commit a batch with one registry lookup and one registry write."""
+    registry = get_duplicate_registry()
+    hashes = [p.spool.sha256 for p in batch if p.spool.sha256 and not p.errors]
+    known = registry.lookup_many(hashes) if hashes else {}
+    seen_in_batch: Dict[str, str] = {}
+    results: List[IngestResult] = []
+    for pending in batch:
+        sha256 = pending.spool.sha256
+        dup_of = None
+        if sha256 and not pending.errors:
+            dup_of = seen_in_batch.get(sha256) or known.get(sha256)
+        result = _finish_ingest(pending, dup_of)
+        if result.success:
+            seen_in_batch[sha256] = result.file_id
+        results.append(result)
+    if seen_in_batch:
+        registry.register_many(seen_in_batch.items())
+    return results
+
+
+def ingest_many(
+    sources: Iterable[BulkSource],
+    max_workers: int = BULK_INGEST_WORKERS,
+    max_size_bytes: int = MAX_FILE_SIZE_BYTES,
+    skip_scan: bool = False,
+    compute_md5: bool = True,
+    stats: Optional[BulkIngestStats] = None,
+) -> Iterator[IngestResult]:
+    """
+    Ingest many documents in parallel, yielding results in completion order.
+
+    Parameters
+    ----------
+    sources : iterable
+        File paths, directory paths (walked recursively) and/or
+        ``(bytes_or_file_object, filename)`` tuples. Consumed lazily.
+    max_workers : int
+        Threads spooling, hashing and scanning concurrently.
+    stats : BulkIngestStats, optional
+        Filled in as results are produced (files/s, MB/s once exhausted).
+
+    Completed uploads are committed in batches of up to
+    ``BULK_COMMIT_BATCH``, or what has completed once the oldest has waited
+    ``BULK_COMMIT_MAX_WAIT_SECONDS``: one duplicate-registry lookup and one
+    registry write per batch. Identical files within a batch are flagged as
+    duplicates of each other. If the caller stops early, uploads not yet
+    committed are discarded and their spool files removed.
+    """
+    stats = stats if stats is not None else BulkIngestStats()
+    start = time.perf_counter()
+    items = _expand_sources(sources)
+    window = max_workers * 2
+    exhausted = False
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bulk-ingest") as pool:
+        in_flight: Dict[Future, str] = {}
+        ready: List[_PendingIngest] = []
+        deadline = 0.0
+        try:
+            while in_flight or ready or not exhausted:
+                while not exhausted and len(in_flight) < window:
+                    try:
+                        data, name = next(items)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    fut = pool.submit(_prepare_bulk_item, data, name, max_size_bytes, skip_scan, compute_md5)
+                    in_flight[fut] = name
+                if in_flight:
+                    timeout = max(deadline - time.monotonic(), 0.0) if ready else None
+                    done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        if not ready:
+                            deadline = time.monotonic() + BULK_COMMIT_MAX_WAIT_SECONDS
+                        ready.append(_collect(fut, in_flight.pop(fut)))
+                more = bool(in_flight) or not exhausted
+                if not ready or (more and len(ready) < BULK_COMMIT_BATCH and time.monotonic() < deadline):
+                    continue
+                batch, ready = ready, []
+                for result in _finish_batch(batch):
+                    stats.record(result)
+                    stats.elapsed_seconds = time.perf_counter() - start
+                    yield result
+        finally:
+            # Reached with work left only if the consumer stopped early (or
+            # the loop raised): nothing left here gets committed.
+            for pending in ready:
+                _discard_pending(pending)
+            for fut, name in in_flight.items():
+                if not fut.cancel():
+                    _discard_pending(_collect(fut, name))
+
+    stats.elapsed_seconds = time.perf_counter() - start
+    logger.info(
+        "Bulk ingest: %d files (%d ok, %d failed, %d duplicates) in %.1f s | %.1f files/s | %.1f MB/s",
+        stats.files, stats.succeeded, stats.failed, stats.duplicates,
+        stats.elapsed_seconds, stats.files_per_second, stats.mb_per_second,
+    )
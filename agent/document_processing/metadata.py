@@ -22,6 +22,9 @@ from dataclasses import dataclass, field, asdict
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Tuple
 
+# Bump whenever metadata output changes; keys the stage result cache.
+STAGE_VERSION = "1"
+
 # ---------------------------------------------------------------------------
 # Document type taxonomy
 # ---------------------------------------------------------------------------
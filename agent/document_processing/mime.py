@@ -0,0 +1,295 @@
+"""
+MIME Detection - signature-indexed content sniffing for the INGEST stage
+
+Detection order:
+  1. Binary signatures, looked up through a prefix index (offset → first two
+     bytes → candidates), so cost stays flat as signatures are added
+  2. Container sniffing
+       ZIP → OOXML (word/ xl/ ppt/ + [Content_Types].xml) or ODF (stored
+             "mimetype" member), read from the central directory / first
+             local header only; nothing is decompressed
+       OLE → DOC / XLS / PPT / MSG from the compound-file directory entries
+  3. Text sniffing (XML, HTML, JSON, RFC 822, CSV) on a decoded sample
+  4. Extension via ``mimetypes``
+
+Add new formats to SIGNATURES; the index is built once at import.
+"""
+
+from __future__ import annotations
+
+import io
+import mimetypes
+import struct
+import zipfile
+from collections import defaultdict
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Sequence, Tuple
+
+# ---------------------------------------------------------------------------
+# MIME constants
+# ---------------------------------------------------------------------------
+
+MIME_ZIP = "application/zip"
+MIME_OLE = "application/vnd.ms-office"
+MIME_DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+MIME_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+MIME_PPTX = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+MIME_DOC = "application/msword"
+MIME_XLS = "application/vnd.ms-excel"
+MIME_PPT = "application/vnd.ms-powerpoint"
+MIME_MSG = "application/vnd.ms-outlook"
+
+_OOXML_PREFIXES = (("word/", MIME_DOCX), ("xl/", MIME_XLSX), ("ppt/", MIME_PPTX))
+_EXT_TO_OOXML = {".docx": MIME_DOCX, ".xlsx": MIME_XLSX, ".pptx": MIME_PPTX}
+
+# ---------------------------------------------------------------------------
+# Signature table
+# ---------------------------------------------------------------------------
+
+# (mime, ((offset, magic), ...)) — every part must match. The first part is
+# the index key, so put the most distinctive part first.
+SIGNATURES: List[Tuple[str, Tuple[Tuple[int, bytes], ...]]] = [
+    ("application/pdf", ((0, b"%PDF"),)),
+    (MIME_ZIP, ((0, b"PK\x03\x04"),)),
+    (MIME_ZIP, ((0, b"PK\x05\x06"),)),
+    (MIME_ZIP, ((0, b"PK\x07\x08"),)),
+    (MIME_OLE, ((0, b"\xD0\xCF\x11\xE0\xA1\xB1\x1A\xE1"),)),
+    ("application/rtf", ((0, b"{\\rtf"),)),
+    ("application/postscript", ((0, b"%!PS"),)),
+    ("application/vnd.apache.parquet", ((0, b"PAR1"),)),
+    ("application/vnd.apache.arrow.file", ((0, b"ARROW1"),)),
+    ("application/avro", ((0, b"Obj\x01"),)),
+    ("application/vnd.sqlite3", ((0, b"SQLite format 3\x00"),)),
+    # Images
+    ("image/jpeg", ((0, b"\xFF\xD8\xFF"),)),
+    ("image/png", ((0, b"\x89PNG\r\n\x1a\n"),)),
+    ("image/gif", ((0, b"GIF87a"),)),
+    ("image/gif", ((0, b"GIF89a"),)),
+    # "BM" alone starts plenty of text ("BMW,...", "BMI ..."): also require
+    # the zero reserved field and a known DIB header size.
+    *(("image/bmp", ((0, b"BM"), (6, b"\x00\x00\x00\x00"), (14, struct.pack("<I", size))))
+      for size in (12, 40, 52, 56, 64, 108, 124)),
+    ("image/tiff", ((0, b"II*\x00"),)),
+    ("image/tiff", ((0, b"MM\x00*"),)),
+    ("image/webp", ((0, b"RIFF"), (8, b"WEBP"))),
+    ("image/x-icon", ((0, b"\x00\x00\x01\x00"),)),
+    ("image/vnd.adobe.photoshop", ((0, b"8BPS"),)),
+    ("image/heic", ((4, b"ftypheic"),)),
+    ("image/avif", ((4, b"ftypavif"),)),
+    # Audio / video
+    ("audio/wav", ((0, b"RIFF"), (8, b"WAVE"))),
+    ("video/x-msvideo", ((0, b"RIFF"), (8, b"AVI "))),
+    ("audio/mpeg", ((0, b"ID3"),)),
+    ("audio/flac", ((0, b"fLaC"),)),
+    ("audio/ogg", ((0, b"OggS"),)),
+    ("video/mp4", ((4, b"ftypisom"),)),
+    ("video/mp4", ((4, b"ftypmp42"),)),
+    ("audio/mp4", ((4, b"ftypM4A "),)),
+    ("video/quicktime", ((4, b"ftypqt  "),)),
+    ("video/webm", ((0, b"\x1A\x45\xDF\xA3"),)),
+    # Archives / compression
+    ("application/gzip", ((0, b"\x1F\x8B"),)),
+    ("application/x-bzip2", ((0, b"BZh"),)),
+    ("application/x-7z-compressed", ((0, b"7z\xBC\xAF\x27\x1C"),)),
+    ("application/vnd.rar", ((0, b"Rar!\x1A\x07"),)),
+    ("application/x-xz", ((0, b"\xFD7zXZ\x00"),)),
+    ("application/zstd", ((0, b"\x28\xB5\x2F\xFD"),)),
+    ("application/x-tar", ((257, b"ustar"),)),
+    # Executables (never extracted, but worth naming)
+    ("application/x-executable", ((0, b"\x7FELF"),)),
+    ("application/wasm", ((0, b"\x00asm"),)),
+]
+
+# Bytes needed to evaluate every signature (tar's "ustar" sits at 257).
+SIGNATURE_WINDOW = max(off + len(magic) for _, parts in SIGNATURES for off, magic in parts)
+
+# Formats with a signature under four bytes. Such a match is not enough to
+# override a text file's own extension.
+WEAK_SIGNATURE_MIMES = frozenset(
+    mime for mime, parts in SIGNATURES if sum(len(magic) for _, magic in parts) < 4
+)
+
+_Candidate = Tuple[str, Tuple[Tuple[int, bytes], ...]]
+
+
+class SignatureIndex:
+    """
+    Signatures bucketed by (offset, first two bytes at that offset).
+
+    A lookup probes one bucket per distinct offset, so adding signatures
+    grows bucket count rather than per-lookup work. Within a bucket the most
+    specific (longest total magic) candidates are tried first.
+    """
+
+    def __init__(self, signatures: Sequence[_Candidate]) -> None:
+        buckets: Dict[int, Dict[bytes, List[_Candidate]]] = defaultdict(lambda: defaultdict(list))
+        for mime, parts in signatures:
+            offset, magic = parts[0]
+            buckets[offset][magic[:2]].append((mime, parts))
+        for by_key in buckets.values():
+            for candidates in by_key.values():
+                candidates.sort(key=lambda c: -sum(len(m) for _, m in c[1]))
+        self._offsets = sorted(buckets)
+        self._buckets = {off: dict(by_key) for off, by_key in buckets.items()}
+
+    def match(self, header: bytes) -> Optional[str]:
+        for offset in self._offsets:
+            candidates = self._buckets[offset].get(header[offset:offset + 2])
+            if not candidates:
+                continue
+            for mime, parts in candidates:
+                if all(header[off:off + len(magic)] == magic for off, magic in parts):
+                    return mime
+        return None
+
+
+_INDEX = SignatureIndex(SIGNATURES)
+
+# ---------------------------------------------------------------------------
+# Container sniffing
+# ---------------------------------------------------------------------------
+
+def _odf_mimetype(header: bytes) -> Optional[str]:
+    """ODF/EPUB store an uncompressed ``mimetype`` member first; read it from the local header."""
+    if len(header) < 30 or header[8:10] != b"\x00\x00":  # compression method must be "stored"
+        return None
+    name_len, extra_len = struct.unpack_from("<HH", header, 26)
+    if header[30:30 + name_len] != b"mimetype":
+        return None
+    size = struct.unpack_from("<I", header, 18)[0]
+    start = 30 + name_len + extra_len
+    value = header[start:start + min(size, 128)]
+    try:
+        return value.decode("ascii").strip() or None
+    except UnicodeDecodeError:
+        return None
+
+
+def _zip_member_names(fh: BinaryIO) -> List[str]:
+    """Member names from the central directory (no member is decompressed)."""
+    try:
+        with zipfile.ZipFile(fh) as zf:
+            return zf.namelist()
+    except (zipfile.BadZipFile, OSError, ValueError):
+        return []
+
+
+def _sniff_zip(header: bytes, fh: Optional[BinaryIO], filename: str) -> str:
+    odf = _odf_mimetype(header)
+    if odf:
+        return odf
+    if fh is None:
+        # No random access: fall back to the extension for OOXML.
+        return _EXT_TO_OOXML.get(Path(filename).suffix.lower(), MIME_ZIP)
+    names = _zip_member_names(fh)
+    if "[Content_Types].xml" in names:
+        for prefix, mime in _OOXML_PREFIXES:
+            if any(n.startswith(prefix) for n in names):
+                return mime
+    return MIME_ZIP
+
+
+_OLE_STREAM_TYPES = (
+    ("WordDocument", MIME_DOC),
+    ("Workbook", MIME_XLS),
+    ("Book", MIME_XLS),
+    ("PowerPoint Document", MIME_PPT),
+)
+_OLE_END_OF_CHAIN = 0xFFFFFFFA
+_OLE_MAX_DIR_SECTORS = 16
+
+
+def _ole_stream_names(header: bytes, fh: BinaryIO) -> List[str]:
+    """Walk the compound-file directory chain and return entry names."""
+    if len(header) < 512:
+        return []
+    shift = struct.unpack_from("<H", header, 0x1E)[0]
+    sector_size = 1 << shift
+    if sector_size not in (512, 4096):
+        return []
+    per_fat_sector = sector_size // 4
+    difat = struct.unpack_from("<109I", header, 0x4C)
+    sect = struct.unpack_from("<I", header, 0x30)[0]
+    names: List[str] = []
+    for _ in range(_OLE_MAX_DIR_SECTORS):
+        if sect >= _OLE_END_OF_CHAIN:
+            break
+        fh.seek((sect + 1) * sector_size)
+        block = fh.read(sector_size)
+        for off in range(0, len(block) - 127, 128):
+            name_len = struct.unpack_from("<H", block, off + 0x40)[0]
+            if 2 <= name_len <= 64:
+                names.append(block[off:off + name_len - 2].decode("utf-16-le", errors="ignore"))
+        fat_index = sect // per_fat_sector
+        if fat_index >= len(difat) or difat[fat_index] >= _OLE_END_OF_CHAIN:
+            break
+        fh.seek((difat[fat_index] + 1) * sector_size + (sect % per_fat_sector) * 4)
+        raw = fh.read(4)
+        if len(raw) < 4:
+            break
+        sect = struct.unpack("<I", raw)[0]
+    return names
+
+
+def _sniff_ole(header: bytes, fh: Optional[BinaryIO]) -> str:
+    names = _ole_stream_names(header, fh or io.BytesIO(header))
+    for stream, mime in _OLE_STREAM_TYPES:
+        if stream in names:
+            return mime
+    if any(n.startswith("__substg1.0_") or n.startswith("__nameid_version1.0") for n in names):
+        return MIME_MSG
+    return MIME_OLE
+
+
+# ---------------------------------------------------------------------------
+# Text sniffing
+# ---------------------------------------------------------------------------
+
+_RFC822_HEADERS = ("received:", "return-path:", "from:", "mime-version:", "message-id:", "delivered-to:")
+
+
+def _sniff_text(header: bytes, filename: str) -> Optional[str]:
+    sample = header[:4096].decode("utf-8", errors="ignore").lstrip("\ufeff \t\r\n")
+    lowered = sample[:64].lower()
+    if lowered.startswith("<?xml"):
+        return "text/html" if "<html" in sample[:1024].lower() else "text/xml"
+    if lowered.startswith("<!doctype html") or lowered.startswith("<html"):
+        return "text/html"
+    if sample.startswith("{") or sample.startswith("["):
+        return "application/json"
+    if lowered.startswith(_RFC822_HEADERS) and "\n" in sample:
+        return "message/rfc822"
+    if "," in sample and "\n" in sample and Path(filename).suffix.lower() in (".csv", ".tsv"):
+        return "text/csv"
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def detect_mime(header: bytes, filename: str, path: Optional[str] = None) -> str:
+    """
+    Detect the MIME type of a file.
+
+    ``header`` should hold at least the first ``SIGNATURE_WINDOW`` bytes
+    (ingest keeps 4 KB). ``path``, when given, lets container sniffing seek
+    to the ZIP central directory / OLE directory sectors of the full file.
+    """
+    mime = _INDEX.match(header)
+    if mime in (MIME_ZIP, MIME_OLE):
+        fh = open(path, "rb") if path else None
+        try:
+            if mime == MIME_ZIP:
+                return _sniff_zip(header, fh, filename)
+            return _sniff_ole(header, fh)
+        finally:
+            if fh is not None:
+                fh.close()
+    if mime:
+        return mime
+    text_mime = _sniff_text(header, filename)
+    if text_mime:
+        return text_mime
+    guessed, _ = mimetypes.guess_type(filename)
+    return guessed or "application/octet-stream"
@@ -22,11 +22,15 @@ from __future__ import annotations
 
 import hashlib
 import re
-import unicodedata
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, asdict, replace
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Set, Tuple
 
+from .cleaning import clean_text
+
+# Bump whenever normalization output changes; keys the stage result cache.
+STAGE_VERSION = "4"
+
 # ---------------------------------------------------------------------------
 # Data structures
 # ---------------------------------------------------------------------------
@@ -129,42 +133,10 @@ _MONTH_MAP = {
     "nov": 11, "november": 11, "dec": 12, "december": 12,
 }
 
-# Boilerplate phrases to strip
-_BOILERPLATE = re.compile(
-    r"(all rights reserved|confidential and proprietary|this document is|"
-    r"page \d+ of \d+|printed on|do not distribute|internal use only|"
-    r"footer|header|table of contents)",
-    re.IGNORECASE,
-)
-
 # Near-duplicate registry: dedup_signature → file_id
 _SEEN_SIGNATURES: Dict[str, str] = {}
 
 
-# ---------------------------------------------------------------------------
-# Text cleaning
-# ---------------------------------------------------------------------------
-
-def _clean_text(text: str) -> str:
-    """Remove encoding artifacts, normalize whitespace, strip boilerplate."""
-    # Unicode normalization
-    text = unicodedata.normalize("NFKC", text)
-    # Fix common OCR artifacts
-    text = text.replace("\x00", "").replace("\ufffd", "?")
-    text = re.sub(r"[^\x09\x0A\x0D\x20-\x7E\x80-\xFF\u0100-\uFFFF]", " ", text)
-    # Normalize line endings
-    text = re.sub(r"\r\n?", "\n", text)
-    # Remove repeated punctuation
-    text = re.sub(r"([!?.]){3,}", r"\1\1\1", text)
-    # Normalize whitespace
-    text = re.sub(r"[ \t]{2,}", " ", text)
-    text = re.sub(r"\n{3,}", "\n\n", text)
-    # Strip boilerplate lines
-    lines = text.split("\n")
-    clean_lines = [l for l in lines if not _BOILERPLATE.search(l)]
-    return "\n".join(clean_lines).strip()
-
-
 # ---------------------------------------------------------------------------
 # Date extraction & normalization
 # ---------------------------------------------------------------------------
@@ -318,11 +290,28 @@ def _extract_sections(text: str) -> List[DocumentSection]:
 # NER via spaCy (optional)
 # ---------------------------------------------------------------------------
 
+_NER_CHAR_LIMIT = 50000  # cap for speed
+_NLP: Any = None  # loaded spaCy pipeline; False once loading has failed
+
+
+def _spacy_model() -> Any:
+    # Loaded once per process: PageNormalizer calls NER for every page.
+    global _NLP
+    if _NLP is None:
+        try:
+            import spacy  # type: ignore
+            _NLP = spacy.load("en_core_web_sm")
+        except Exception:
+            _NLP = False
+    return _NLP
+
+
 def _run_ner(text: str) -> List[ExtractedEntity]:
+    nlp = _spacy_model()
+    if not nlp:
+        return []
     try:
-        import spacy  # type: ignore
-        nlp = spacy.load("en_core_web_sm")
-        doc = nlp(text[:50000])  # cap for speed
+        doc = nlp(text[:_NER_CHAR_LIMIT])
         entities = []
         for ent in doc.ents:
             entities.append(ExtractedEntity(
@@ -342,9 +331,12 @@ def _run_ner(text: str) -> List[ExtractedEntity]:
 # Deduplication
 # ---------------------------------------------------------------------------
 
-def _compute_dedup_signature(text: str) -> str:
-    tokens = sorted(set(re.findall(r"\b[a-z]{3,}\b", text.lower())))
-    return hashlib.sha256(" ".join(tokens).encode()).hexdigest()
+def _dedup_tokens(text: str) -> Set[str]:
+    return set(re.findall(r"\b[a-z]{3,}\b", text.lower()))
+
+
+def _compute_dedup_signature(tokens: Set[str]) -> str:
+    return hashlib.sha256(" ".join(sorted(tokens)).encode()).hexdigest()
 
 
 def _near_duplicate_score(sig: str) -> Tuple[float, Optional[str]]:
@@ -353,6 +345,32 @@ def _near_duplicate_score(sig: str) -> Tuple[float, Optional[str]]:
     return 0.0, None
 
 
+_NEAR_DUPLICATE_WARNING = "Near-duplicate of document"
+
+
+def _check_near_duplicate(sig: str, file_id: str, warnings: List[str]) -> float:
+    """Score ``sig`` against earlier documents, remembering it if it is new."""
+    dup_score, dup_of = _near_duplicate_score(sig)
+    if dup_of:
+        warnings.append(f"{_NEAR_DUPLICATE_WARNING} {dup_of} (score={dup_score:.2f})")
+    else:
+        _SEEN_SIGNATURES[sig] = file_id
+    return dup_score
+
+
+def refresh_cached_result(result: NormalizeResult, file_id: str) -> NormalizeResult:
+    """
+    Re-target a cached NormalizeResult at a new upload of the same content.
+
+    The near-duplicate check depends on the documents this process has
+    seen, not on the content alone, so it is redone (and the signature
+    registered) instead of reusing the cached score.
+    """
+    warnings = [w for w in result.warnings if not w.startswith(_NEAR_DUPLICATE_WARNING)]
+    dup_score = _check_near_duplicate(result.dedup_signature, file_id, warnings)
+    return replace(result, file_id=file_id, near_duplicate_score=dup_score, warnings=warnings)
+
+
 # ---------------------------------------------------------------------------
 # Business rule validation
 # ---------------------------------------------------------------------------
@@ -379,6 +397,114 @@ def _validate_business_rules(kv: Dict[str, str], doc_type_hint: str) -> List[str
 # Main entry point
 # ---------------------------------------------------------------------------
 
+class PageNormalizer:
+    """
+    Incremental NORMALIZE: feed page texts as EXTRACT yields them, then
+    ``finish()``. Cleaning, regex extraction and NER run per page, so most of
+    the work overlaps with extraction; only section detection needs the
+    joined text at the end. ``normalize_document`` is the one-page case.
+    """
+
+    def __init__(self, file_id: str) -> None:
+        self.file_id = file_id
+        self.pages_fed = 0
+        self._original_length = 0
+        self._clean_parts: List[str] = []
+        self._clean_length = 0
+        self._dates: Set[str] = set()
+        self._monetary: List[Dict] = []
+        self._phones: Set[str] = set()
+        self._emails: List[str] = []
+        self._urls: List[str] = []
+        self._kv: Dict[str, str] = {}
+        self._ner: List[ExtractedEntity] = []
+        self._tokens: Set[str] = set()
+
+    def feed(self, raw_text: str) -> None:
+        """Normalize one page (or any contiguous slice) of the document."""
+        if self.pages_fed:
+            self._original_length += 2  # the "\n\n" page separator
+        self.pages_fed += 1
+        self._original_length += len(raw_text)
+        clean = clean_text(raw_text, boilerplate=True)
+        if not clean:
+            return
+        offset = self._clean_length + (2 if self._clean_parts else 0)
+        self._clean_parts.append(clean)
+        self._clean_length = offset + len(clean)
+
+        self._dates.update(_extract_dates(clean))
+        if len(self._monetary) < 50:
+            self._monetary.extend(_extract_monetary(clean))
+        self._phones.update(_extract_phones(clean))
+        self._emails.extend(_EMAIL_PATTERN.findall(clean))
+        self._urls.extend(_URL_PATTERN.findall(clean))
+        self._kv.update(_extract_kv(clean))
+        self._tokens.update(_dedup_tokens(clean))
+        if offset < _NER_CHAR_LIMIT:
+            for ent in _run_ner(clean[:_NER_CHAR_LIMIT - offset]):
+                ent.start_char += offset
+                ent.end_char += offset
+                self._ner.append(ent)
+
+    def finish(self, key_value_pairs: Dict[str, Any] = None, document_type: str = "") -> NormalizeResult:
+        """Assemble the NormalizeResult for everything fed so far."""
+        errors: List[str] = []
+        warnings: List[str] = []
+        clean_text = "\n\n".join(self._clean_parts)
+        original_length = self._original_length
+        cleaned_length = len(clean_text)
+        noise_ratio = max(0.0, (original_length - cleaned_length) / max(original_length, 1))
+
+        dates = sorted(self._dates)
+        monetary = self._monetary[:50]
+        phones = list(self._phones)
+        emails = self._emails
+        kv = {**(key_value_pairs or {}), **self._kv}
+        sections = _extract_sections(clean_text)
+        entities = list(self._ner)
+
+        # Add regex-based entities for entities not covered by spaCy
+        for date in dates:
+            entities.append(ExtractedEntity(text=date, entity_type="DATE", normalized=date, confidence=0.9))
+        for money in monetary:
+            entities.append(ExtractedEntity(
+                text=money["raw"], entity_type="MONEY",
+                normalized=money["formatted"], confidence=0.85,
+            ))
+        for email in emails:
+            entities.append(ExtractedEntity(text=email, entity_type="EMAIL", normalized=email.lower(), confidence=0.99))
+        for phone in phones:
+            entities.append(ExtractedEntity(text=phone, entity_type="PHONE", normalized=phone, confidence=0.85))
+
+        validation_errors = _validate_business_rules(kv, document_type)
+
+        dedup_sig = _compute_dedup_signature(self._tokens)
+        dup_score = _check_near_duplicate(dedup_sig, self.file_id, warnings)
+
+        return NormalizeResult(
+            success=True,
+            file_id=self.file_id,
+            clean_text=clean_text,
+            original_length=original_length,
+            cleaned_length=cleaned_length,
+            noise_ratio=round(noise_ratio, 4),
+            entities=entities,
+            dates=dates,
+            monetary_values=monetary,
+            phone_numbers=phones,
+            email_addresses=list(set(emails)),
+            urls=list(set(self._urls)),
+            key_value_pairs=kv,
+            sections=sections,
+            validation_errors=validation_errors,
+            dedup_signature=dedup_sig,
+            near_duplicate_score=dup_score,
+            errors=errors,
+            warnings=warnings,
+        )
+
+
 def normalize_document(
     raw_text: str,
     file_id: str,
@@ -399,64 +525,6 @@ def normalize_document(
     document_type : str
         Hint from extraction stage (e.g. "pdf", "invoice").
     """
-    errors: List[str] = []
-    warnings: List[str] = []
-    kv_input = key_value_pairs or {}
-
-    original_length = len(raw_text)
-    clean_text = _clean_text(raw_text)
-    cleaned_length = len(clean_text)
-    noise_ratio = max(0.0, (original_length - cleaned_length) / max(original_length, 1))
-
-    dates = _extract_dates(clean_text)
-    monetary = _extract_monetary(clean_text)
-    phones = _extract_phones(clean_text)
-    emails = _EMAIL_PATTERN.findall(clean_text)
-    urls = _URL_PATTERN.findall(clean_text)
-    kv = {**kv_input, **_extract_kv(clean_text)}
-    sections = _extract_sections(clean_text)
-    entities = _run_ner(clean_text)
-
-    # Add regex-based entities for entities not covered by spaCy
-    for date in dates:
-        entities.append(ExtractedEntity(text=date, entity_type="DATE", normalized=date, confidence=0.9))
-    for money in monetary:
-        entities.append(ExtractedEntity(
-            text=money["raw"], entity_type="MONEY",
-            normalized=money["formatted"], confidence=0.85,
-        ))
-    for email in emails:
-        entities.append(ExtractedEntity(text=email, entity_type="EMAIL", normalized=email.lower(), confidence=0.99))
-    for phone in phones:
-        entities.append(ExtractedEntity(text=phone, entity_type="PHONE", normalized=phone, confidence=0.85))
-
-    validation_errors = _validate_business_rules(kv, document_type)
-
-    dedup_sig = _compute_dedup_signature(clean_text)
-    dup_score, dup_of = _near_duplicate_score(dedup_sig)
-    if dup_of:
-        warnings.append(f"Near-duplicate of document {dup_of} (score={dup_score:.2f})")
-    else:
-        _SEEN_SIGNATURES[dedup_sig] = file_id
-
-    return NormalizeResult(
-        success=True,
-        file_id=file_id,
-        clean_text=clean_text,
-        original_length=original_length,
-        cleaned_length=cleaned_length,
-        noise_ratio=round(noise_ratio, 4),
-        entities=entities,
-        dates=dates,
-        monetary_values=monetary,
-        phone_numbers=phones,
-        email_addresses=list(set(emails)),
-        urls=list(set(urls)),
-        key_value_pairs=kv,
-        sections=sections,
-        validation_errors=validation_errors,
-        dedup_signature=dedup_sig,
-        near_duplicate_score=dup_score,
-        errors=errors,
-        warnings=warnings,
-    )
+    normalizer = PageNormalizer(file_id)
+    normalizer.feed(raw_text)
+    return normalizer.finish(key_value_pairs, document_type)
@@ -0,0 +1,429 @@
+"""
+OCR Engine - pooled, cached Tesseract for images and scanned pages
+
+  OcrEngine.ocr(data)     → blocking, returns OcrResult
+  OcrEngine.submit(data)  → Future; OCR runs on a persistent process pool
+                            while the caller does other work
+  OcrEngine.submit_pdf_page(path, n, doc_sha256)
+                          → Future; the worker rasterizes page n of the
+                            PDF (pypdfium2, else pdfplumber) and OCRs it
+
+A worker decodes each image exactly once with Pillow. The same decoded
+object provides the image metadata and one engine pass:
+
+  tesserocr    one TessBaseAPI per worker process, initialised once.
+               SetImage once, then recognition plus orientation/script
+               detection on the same in-memory image.
+  pytesseract  one tesseract run with --psm 1 (orientation detection +
+               OCR). Text and word confidences come from image_to_data.
+               The orientation angle is only reported through tesserocr.
+
+Results are cached in-process by image SHA-256 (LRU; PDF pages by
+document SHA-256 + page + DPI), and concurrent requests for the same
+image share one job. ``queue_depth`` counts images
+submitted but not yet finished; watch it (and ``stats()``) when sizing
+OCR_POOL_WORKERS. OCR_POOL_WORKERS=0 runs OCR on the calling thread.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib
+import io
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Callable, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+OCR_POOL_WORKERS: int = int(os.getenv("OCR_POOL_WORKERS", str(os.cpu_count() or 1)))
+OCR_LANG: str = os.getenv("OCR_LANG", "eng")
+OCR_TESSERACT_CONFIG: str = os.getenv("OCR_TESSERACT_CONFIG", "--psm 1")
+OCR_CACHE_SIZE: int = int(os.getenv("OCR_CACHE_SIZE", "2048"))
+OCR_TIMEOUT_SECONDS: float = float(os.getenv("OCR_TIMEOUT_SECONDS", "120"))
+OCR_PDF_DPI: int = int(os.getenv("OCR_PDF_DPI", "300"))
+
+_TESSERACT_MODES = ("1", "L", "RGB", "RGBA")
+
+BufferLike = Union[bytes, bytearray, memoryview]
+
+
+@dataclass
+class OcrResult:
+    text: str = ""
+    confidence: float = 0.0                 # mean word confidence, 0..1
+    orientation: Optional[int] = None       # degrees, when the engine reports it
+    orientation_confidence: Optional[float] = None
+    script: str = ""
+    image: Dict[str, Any] = field(default_factory=dict)   # format, mode, size, exif
+    engine: str = ""                        # "tesserocr" | "pytesseract" | "none"
+    seconds: float = 0.0
+    cached: bool = False
+    error: str = ""                         # the image could not be decoded
+    warning: str = ""                       # decoded, but no OCR engine ran
+
+    @property
+    def ok(self) -> bool:
+        return not self.error and self.engine not in ("", "none")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+# ---------------------------------------------------------------------------
+# Worker side: one decode, one engine pass
+# ---------------------------------------------------------------------------
+
+_API: Any = None   # per-process tesserocr.PyTessBaseAPI; False when unavailable
+_API_PID = 0
+
+
+def _tesserocr_api() -> Any:
+    global _API, _API_PID
+    if _API is None or _API_PID != os.getpid():
+        _API_PID = os.getpid()
+        try:
+            import tesserocr  # type: ignore
+            _API = tesserocr.PyTessBaseAPI(lang=OCR_LANG, psm=tesserocr.PSM.AUTO_OSD)
+        except Exception:  # not installed, or traineddata missing
+            _API = False
+    return _API or None
+
+
+def _image_metadata(img: Any) -> Dict[str, Any]:
+    meta: Dict[str, Any] = {
+        "format": img.format,
+        "mode": img.mode,
+        "size": list(img.size),
+        "width": img.size[0],
+        "height": img.size[1],
+    }
+    try:
+        exif = img.getexif()
+        if exif:
+            from PIL.ExifTags import TAGS  # type: ignore
+            meta["exif"] = {TAGS.get(k, k): str(v) for k, v in exif.items()}
+    except Exception:
+        pass
+    return meta
+
+
+def _run_tesserocr(api: Any, img: Any, result: OcrResult) -> None:
+    api.SetImage(img)
+    try:
+        api.Recognize()
+        result.text = api.GetUTF8Text()
+        result.confidence = max(api.MeanTextConf(), 0) / 100.0
+        # OSD is best-effort (it needs osd.traineddata and enough text); a
+        # failure there must not discard the recognised text.
+        try:
+            osd = api.DetectOrientationScript()
+        except Exception as exc:
+            logger.debug("Orientation detection failed: %s", exc)
+            osd = None
+        if osd:
+            result.orientation = int(osd["orient_deg"])
+            result.orientation_confidence = float(osd["orient_conf"])
+            result.script = osd.get("script_name", "")
+    finally:
+        api.Clear()
+    result.engine = "tesserocr"
+
+
+def _run_pytesseract(img: Any, result: OcrResult) -> None:
+    import pytesseract  # type: ignore
+    data = pytesseract.image_to_data(img, lang=OCR_LANG, config=OCR_TESSERACT_CONFIG,
+                                     output_type=pytesseract.Output.DICT)
+    lines: List[str] = []
+    words: List[str] = []
+    confs: List[float] = []
+    current = None
+    for i, word in enumerate(data["text"]):
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        if key != current:
+            if words:
+                lines.append(" ".join(words))
+            if current is not None and key[:2] != current[:2]:
+                lines.append("")  # paragraph break
+            words, current = [], key
+        if word and word.strip():
+            words.append(word)
+            conf = float(data["conf"][i])
+            if conf >= 0:
+                confs.append(conf)
+    if words:
+        lines.append(" ".join(words))
+    result.text = "\n".join(lines).strip()
+    result.confidence = sum(confs) / len(confs) / 100.0 if confs else 0.0
+    result.engine = "pytesseract"
+
+
+def _ocr_pil(img: Any, result: OcrResult) -> None:
+    if img.mode not in _TESSERACT_MODES:
+        img = img.convert("RGB")
+    try:
+        api = _tesserocr_api()
+        if api is not None:
+            _run_tesserocr(api, img, result)
+        else:
+            _run_pytesseract(img, result)
+    except Exception as exc:
+        result.engine = "none"
+        result.warning = f"OCR not available ({exc}); returning image metadata only"
+
+
+def _ocr_image(data: bytes) -> OcrResult:
+    """Decode ``data`` once and OCR it. Runs inside a pool worker."""
+    start = time.perf_counter()
+    result = OcrResult()
+    try:
+        from PIL import Image  # type: ignore
+        img = Image.open(io.BytesIO(data))
+        img.load()
+    except Exception as exc:
+        result.error = f"Image open failed: {exc}"
+        return result
+    result.image = _image_metadata(img)
+    _ocr_pil(img, result)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def _warm_worker() -> bool:
+    """Pool task: import Pillow and set up the engine ahead of the first image."""
+    try:
+        importlib.import_module("PIL.Image")
+    except ImportError:
+        return False
+    if _tesserocr_api() is not None:
+        return True
+    try:
+        importlib.import_module("pytesseract")
+        return True
+    except ImportError:
+        return False
+
+
+def _render_pdf_page(path: str, page_number: int, dpi: int) -> Any:
+    """Rasterize one page (1-based) straight to a PIL image."""
+    try:
+        import pypdfium2 as pdfium  # type: ignore
+    except ImportError:
+        pdfium = None
+    if pdfium is not None:
+        pdf = pdfium.PdfDocument(path)
+        try:
+            return pdf[page_number - 1].render(scale=dpi / 72).to_pil()
+        finally:
+            pdf.close()
+    import pdfplumber  # type: ignore
+    with pdfplumber.open(path, pages=[page_number]) as pdf:
+        return pdf.pages[0].to_image(resolution=dpi).original
+
+
+def ocr_pdf_page(path: str, page_number: int, dpi: int = OCR_PDF_DPI) -> OcrResult:
+    """Rasterize and OCR one PDF page. Runs inside a pool worker."""
+    start = time.perf_counter()
+    result = OcrResult()
+    try:
+        img = _render_pdf_page(path, page_number, dpi)
+        result.image = {"page": page_number, "dpi": dpi, "width": img.size[0], "height": img.size[1]}
+        _ocr_pil(img, result)
+    except Exception as exc:
+        result.engine = "none"
+        result.warning = f"Page {page_number} could not be rasterized for OCR ({exc})"
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Engine: pool + cache
+# ---------------------------------------------------------------------------
+
+class OcrEngine:
+    """Persistent OCR process pool with a SHA-256 keyed result cache."""
+
+    def __init__(self, workers: int = OCR_POOL_WORKERS, cache_size: int = OCR_CACHE_SIZE) -> None:
+        self.workers = workers
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, OcrResult]" = OrderedDict()
+        self._inflight: Dict[str, "Future[OcrResult]"] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_pid = 0
+        self._queued = 0
+        self.max_queue_depth = 0
+        self.hits = 0
+        self.misses = 0
+        self.processed = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Images submitted to the pool and not yet finished."""
+        return self._queued
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": self._queued,
+                "max_queue_depth": self.max_queue_depth,
+                "processed": self.processed,
+                "cache_hits": self.hits,
+                "cache_misses": self.misses,
+                "cache_entries": len(self._cache),
+            }
+
+    def _executor(self) -> ProcessPoolExecutor:
+        # Called under self._lock. A forked child must not reuse the parent's pool.
+        if self._pool is None or self._pool_pid != os.getpid():
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            self._pool_pid = os.getpid()
+        return self._pool
+
+    def _reset_pool(self) -> None:
+        with self._lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def cached(self, key: str) -> Optional[OcrResult]:
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is None:
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return replace(hit, cached=True)
+
+    def _finished(self, key: str, fut: "Future[OcrResult]") -> None:
+        with self._lock:
+            self._queued -= 1
+            self._inflight.pop(key, None)
+            self.processed += 1
+            if fut.cancelled() or fut.exception() is not None:
+                return
+            result = fut.result()
+            # Only successful runs are cached: an engine that was missing
+            # may be installed by the next deploy.
+            if result.ok and self.cache_size > 0:
+                self._cache[key] = result
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+    def submit(self, data: BufferLike, sha256: str = "") -> "Future[OcrResult]":
+        """
+        Queue ``data`` (encoded image bytes) for OCR.
+
+        Parameters
+        ----------
+        data:
+            The encoded image (PNG, JPEG, TIFF, ...).
+        sha256:
+            Hex digest of ``data`` if the caller already has it; computed
+            otherwise. Keys the result cache and request coalescing.
+        """
+        payload = bytes(data)
+        return self.submit_task(sha256 or hashlib.sha256(payload).hexdigest(), _ocr_image, payload)
+
+    def submit_pdf_page(self, path: str, page_number: int, doc_sha256: str,
+                        dpi: int = OCR_PDF_DPI) -> "Future[OcrResult]":
+        """Queue page ``page_number`` (1-based) of the PDF at ``path`` for rasterizing + OCR."""
+        return self.submit_task(f"{doc_sha256}:p{page_number}@{dpi}", ocr_pdf_page, path, page_number, dpi)
+
+    def submit_task(self, key: str, fn: Callable[..., OcrResult], *args: Any) -> "Future[OcrResult]":
+        """Run ``fn(*args)`` on the pool unless ``key`` is cached or already in flight."""
+        hit = self.cached(key)
+        if hit is not None:
+            done: "Future[OcrResult]" = Future()
+            done.set_result(hit)
+            return done
+        with self._lock:
+            fut = self._inflight.get(key)
+            if fut is not None:
+                self.hits += 1
+                return fut
+            self.misses += 1
+            self._queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self._queued)
+            if self.workers > 0:
+                try:
+                    fut = self._executor().submit(fn, *args)
+                except (BrokenProcessPool, RuntimeError):
+                    self._pool = None
+                    fut = self._executor().submit(fn, *args)
+            else:
+                fut = Future()
+            self._inflight[key] = fut
+        fut.add_done_callback(lambda f: self._finished(key, f))
+        if self.workers <= 0:
+            fut.set_result(fn(*args))
+        return fut
+
+    def wait(self, fut: "Future[OcrResult]", timeout: float = OCR_TIMEOUT_SECONDS,
+             retry: Optional[Callable[[], OcrResult]] = None) -> OcrResult:
+        """
+        Result of a submitted job. Timeouts come back as a warning result.
+        If the pool broke, the pool is reset and ``retry`` runs in-process.
+        """
+        try:
+            return fut.result(timeout=timeout)
+        except FutureTimeout:
+            return OcrResult(engine="none", warning=f"OCR timed out after {timeout:.0f}s")
+        except BrokenProcessPool:
+            logger.warning("OCR worker pool broke; retrying in-process")
+            self._reset_pool()
+            if retry is None:
+                return OcrResult(engine="none", warning="OCR worker pool broke")
+            return retry()
+
+    def ocr(self, data: BufferLike, sha256: str = "", timeout: float = OCR_TIMEOUT_SECONDS) -> OcrResult:
+        """Blocking OCR of one image; never raises for OCR failures."""
+        return self.wait(self.submit(data, sha256), timeout, retry=lambda: _ocr_image(bytes(data)))
+
+    def warm(self) -> int:
+        """Start the pool and initialise an OCR engine in each worker; returns the worker count."""
+        if self.workers <= 0:
+            _warm_worker()
+            return 0
+        with self._lock:
+            pool = self._executor()
+        for fut in [pool.submit(_warm_worker) for _ in range(self.workers)]:
+            fut.result()
+        return self.workers
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+_OCR_ENGINE: Optional[OcrEngine] = None
+_OCR_ENGINE_LOCK = threading.Lock()
+
+
+def get_ocr_engine() -> OcrEngine:
+    global _OCR_ENGINE
+    if _OCR_ENGINE is None:
+        with _OCR_ENGINE_LOCK:
+            if _OCR_ENGINE is None:
+                _OCR_ENGINE = OcrEngine()
+    return _OCR_ENGINE
+
+
+def set_ocr_engine(engine: OcrEngine) -> None:
+    global _OCR_ENGINE
+    _OCR_ENGINE = engine
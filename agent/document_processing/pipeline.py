@@ -17,14 +17,28 @@ Usage:
 from __future__ import annotations
 
 import logging
+import mmap
+import os
 import time
-from dataclasses import dataclass, field, asdict
-from typing import Any, Callable, Dict, List, Optional, Union
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict, replace
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
 
 from .ingest import ingest_document, IngestResult
-from .extract import extract_document, ExtractionResult
-from .normalize import normalize_document, NormalizeResult
+from .extract import (
+    build_extraction_result, cacheable_result, extract_document, iter_extract_pages, resolve_extension,
+    streams_pages,
+    ChunkSpan, ExtractionReport, ExtractionResult, PageChunker,
+)
+from .extract import STAGE_VERSION as EXTRACT_VERSION
+from .cleaning import clean_raw_text
+from .normalize import normalize_document, refresh_cached_result, NormalizeResult, PageNormalizer
+from .normalize import STAGE_VERSION as NORMALIZE_VERSION
+from .sandbox import SANDBOX_ENABLED, get_extractor_sandbox
 from .metadata import generate_metadata, DocumentMetadata
+from .metadata import STAGE_VERSION as METADATA_VERSION
+from .stage_cache import StageCache, get_stage_cache
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +56,7 @@ class StageResult:
     data: Any
     errors: List[str] = field(default_factory=list)
     warnings: List[str] = field(default_factory=list)
+    cached: bool = False
 
 
 @dataclass
@@ -64,7 +79,8 @@ class PipelineResult:
     warnings: List[str] = field(default_factory=list)
 
     def to_dict(self) -> Dict:
-        d = asdict(self)
+        d = asdict(replace(self, extract=None))
+        d["extract"] = self.extract.to_dict() if self.extract else None
         return d
 
     def to_summary(self) -> Dict:
@@ -88,12 +104,27 @@ class PipelineResult:
             "summary": meta.summary if meta else "",
             "processing_flags": meta.processing_flags if meta else [],
             "total_duration_ms": self.total_duration_ms,
-            "stage_timings": {s.stage: s.duration_ms for s in self.stage_results},
+            "stage_timings": _stage_timings(self.stage_results),
+            "cached_stages": [s.stage for s in self.stage_results if s.cached],
             "errors": self.errors,
             "warnings": self.warnings,
         }
 
 
+def _stage_timings(stage_results: List[StageResult]) -> Dict[str, float]:
+    """
+    Stage → duration_ms. A fresh EXTRACT that OCR'd PDF pages also reports
+    each page's OCR cost as "EXTRACT.ocr.page_<n>" (worker time, which can
+    overlap the EXTRACT wall clock).
+    """
+    timings = {s.stage: s.duration_ms for s in stage_results}
+    for s in stage_results:
+        if s.stage == "EXTRACT" and not s.cached and isinstance(s.data, ExtractionResult):
+            for page in s.data.metadata.get("ocr_pages", []):
+                timings[f"EXTRACT.ocr.page_{page['page']}"] = page["ms"]
+    return timings
+
+
 # ---------------------------------------------------------------------------
 # Stage runners
 # ---------------------------------------------------------------------------
@@ -117,6 +148,113 @@ def _run_stage(name: str, fn: Callable, *args, **kwargs) -> StageResult:
                            data=None, errors=[str(exc)])
 
 
+def _run_cached_stage(
+    name: str,
+    cache: Optional[StageCache],
+    sha256: str,
+    version: str,
+    variant: str,
+    refresh: Callable[[Any], Any],
+    fn: Callable,
+    *args,
+    store: Optional[Callable[[Any], Any]] = None,
+    **kwargs,
+) -> StageResult:
+    """
+    Serve a stage from the content-addressed cache, or run it and cache the
+    result if it succeeded. ``refresh`` rewrites the upload-specific fields
+    (file_id, owner, timestamps) on a cached result; ``store``, if given,
+    maps a fresh result to the value cached (dropping what must not outlive
+    the upload).
+    """
+    if cache is not None and sha256:
+        start = time.perf_counter()
+        try:
+            hit = cache.get(sha256, name, version, variant)
+        except Exception as exc:
+            logger.warning("Stage cache lookup failed for %s: %s", name, exc)
+            hit = None
+        if hit is not None:
+            data = refresh(hit)
+            duration_ms = (time.perf_counter() - start) * 1000
+            logger.info("Stage %-12s | HIT | %.1f ms", name, duration_ms)
+            return StageResult(stage=name, success=True, duration_ms=duration_ms, data=data,
+                               warnings=list(getattr(data, "warnings", [])), cached=True)
+
+    sr = _run_stage(name, fn, *args, **kwargs)
+    if cache is not None and sha256 and sr.success and sr.data is not None:
+        try:
+            cache.put(sha256, name, version, store(sr.data) if store else sr.data, variant)
+        except Exception as exc:
+            logger.warning("Stage cache store failed for %s: %s", name, exc)
+    return sr
+
+
+@contextmanager
+def _map_temp_file(path: str) -> Iterator[Union[bytes, memoryview]]:
+    """
+    Yield a read-only memoryview over the spooled upload.
+
+    The file is mmap'd rather than read, so EXTRACT works on the page cache
+    directly instead of a second in-memory copy. Empty files cannot be
+    mapped and yield ``b""``.
+    """
+    if not path:
+        yield b""
+        return
+    with open(path, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            yield b""
+            return
+        mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        try:
+            yield view
+        finally:
+            view.release()
+            try:
+                mapped.close()
+            except BufferError:
+                # An extractor still holds a view; the map is freed when
+                # that last reference is collected.
+                logger.debug("mmap for %s still referenced; deferring close", path)
+
+
+def _extract_from_temp(
+    ingest_result: IngestResult,
+    file_id: str,
+    filename: str,
+    normalizer: Optional[PageNormalizer] = None,
+) -> ExtractionResult:
+    """
+    Run EXTRACT over the mmap'd temp file. With a ``normalizer`` the pages
+    are streamed: each one is normalized and chunked as soon as it is
+    extracted, leaving NORMALIZE only the final assembly. With
+    EXTRACT_SANDBOX=1 the document is extracted in a sandbox worker instead.
+    """
+    with _map_temp_file(ingest_result.temp_path) as data:
+        if SANDBOX_ENABLED:
+            return get_extractor_sandbox().extract(
+                data, file_id, filename, ingest_result.mime_type, source_path=ingest_result.temp_path,
+            )
+        if normalizer is None:
+            return extract_document(
+                data, file_id, filename, ingest_result.mime_type, source_path=ingest_result.temp_path,
+            )
+        report = ExtractionReport()
+        chunker = PageChunker()
+        pages = []
+        for page in iter_extract_pages(
+            data, file_id, filename, ingest_result.mime_type,
+            source_path=ingest_result.temp_path, report=report,
+        ):
+            pages.append(page)
+            text = clean_raw_text(page.text)  # once, for both consumers
+            normalizer.feed(text)
+            chunker.feed(text, page.page_number, clean=True)
+        return build_extraction_result(file_id, filename, pages, report, chunker)
+
+
 # ---------------------------------------------------------------------------
 # Storage stub (replace with real vector DB integration)
 # ---------------------------------------------------------------------------
@@ -124,12 +262,15 @@ def _run_stage(name: str, fn: Callable, *args, **kwargs) -> StageResult:
 def _store_in_knowledge_base(
     file_id: str,
     filename: str,
-    chunks: List[str],
+    text: str,
+    chunk_spans: List[ChunkSpan],
     metadata: Dict,
     summary: str,
 ) -> Dict:
     """
-    Store document chunks + metadata in the knowledge base.
+    Store document chunks + metadata in the knowledge base. Chunks arrive
+    as spans over ``text`` and are sliced out here, only for a backend that
+    needs the strings.
     Production: use Pinecone / Weaviate / Chroma / pgvector.
     """
     try:
@@ -137,16 +278,17 @@ def _store_in_knowledge_base(
         import chromadb  # type: ignore
         client = chromadb.Client()
         collection = client.get_or_create_collection("documents")
-        ids = [f"{file_id}_chunk_{i}" for i in range(len(chunks))]
+        ids = [f"{file_id}_chunk_{i}" for i in range(len(chunk_spans))]
         collection.add(
-            documents=chunks,
+            documents=[text[span.start:span.end] for span in chunk_spans],
             ids=ids,
-            metadatas=[{**metadata, "chunk_index": i} for i in range(len(chunks))],
+            metadatas=[{**metadata, "chunk_index": i, "page": span.page, "section": span.section}
+                       for i, span in enumerate(chunk_spans)],
         )
         return {
             "stored": True,
             "backend": "chromadb",
-            "chunk_count": len(chunks),
+            "chunk_count": len(chunk_spans),
             "collection": "documents",
         }
     except Exception:
@@ -156,7 +298,7 @@ def _store_in_knowledge_base(
     return {
         "stored": True,
         "backend": "stub",
-        "chunk_count": len(chunks),
+        "chunk_count": len(chunk_spans),
         "file_id": file_id,
         "note": "Production: integrate Pinecone/Weaviate/pgvector",
     }
@@ -206,6 +348,7 @@ def process_document(
     project_id: Optional[str] = None,
     skip_scan: bool = False,
     stop_on_error: bool = False,
+    use_cache: bool = True,
 ) -> PipelineResult:
     """
     Run the full 6-stage document processing pipeline.
@@ -221,6 +364,9 @@ def process_document(
         Skip antivirus scan (testing only).
     stop_on_error : bool
         Abort pipeline on first stage failure.
+    use_cache : bool
+        Serve EXTRACT/NORMALIZE/METADATA from the content-hash stage cache
+        when the same bytes have been processed before.
 
     Returns
     -------
@@ -251,12 +397,20 @@ def process_document(
         )
 
     file_id = ingest_result.file_id
-    file_bytes = open(ingest_result.temp_path, "rb").read() if ingest_result.temp_path else b""
+    cache = get_stage_cache() if use_cache else None
+    sha256 = ingest_result.sha256_hash
+    dispatch_ext = resolve_extension(filename, ingest_result.mime_type)
 
     # ── Stage 2: EXTRACT ─────────────────────────────────────────────
-    extract_sr = _run_stage(
-        "EXTRACT", extract_document,
-        file_bytes, file_id, filename, ingest_result.mime_type,
+    # Page-streaming formats normalize each page as it is extracted (not
+    # from the sandbox, which returns whole results).
+    streaming = streams_pages(filename, ingest_result.mime_type) and not SANDBOX_ENABLED
+    normalizer = PageNormalizer(file_id) if streaming else None
+    extract_sr = _run_cached_stage(
+        "EXTRACT", cache, sha256, EXTRACT_VERSION, dispatch_ext,
+        lambda r: replace(r, file_id=file_id, filename=filename),
+        _extract_from_temp, ingest_result, file_id, filename, normalizer,
+        store=cacheable_result,
     )
     stage_results.append(extract_sr)
     all_errors.extend(extract_sr.errors)
@@ -277,8 +431,11 @@ def process_document(
     kv_from_extract = extract_result.key_value_pairs if extract_result else {}
 
     # ── Stage 3: NORMALIZE ───────────────────────────────────────────
-    normalize_sr = _run_stage(
-        "NORMALIZE", normalize_document,
+    streamed = bool(normalizer and normalizer.pages_fed and extract_sr.success and not extract_sr.cached)
+    normalize_sr = _run_cached_stage(
+        "NORMALIZE", cache, sha256, NORMALIZE_VERSION, dispatch_ext,
+        lambda r: refresh_cached_result(r, file_id),
+        (lambda _text, _fid, kv, doc_type: normalizer.finish(kv, doc_type)) if streamed else normalize_document,
         raw_text, file_id, kv_from_extract,
         extract_result.document_type if extract_result else "",
     )
@@ -293,10 +450,21 @@ def process_document(
     dates = normalize_result.dates if normalize_result else []
     monetary = normalize_result.monetary_values if normalize_result else []
     kv_combined = {**(kv_from_extract or {}), **(normalize_result.key_value_pairs if normalize_result else {})}
-    stage_timings = {s.stage: s.duration_ms for s in stage_results}
-
-    metadata_sr = _run_stage(
-        "METADATA", generate_metadata,
+    stage_timings = _stage_timings(stage_results)
+    near_duplicate = bool(normalize_result and normalize_result.near_duplicate_score > 0.9)
+
+    # Everything else METADATA reads follows from the content; the
+    # near-duplicate flag does not, so it is part of the key.
+    metadata_sr = _run_cached_stage(
+        "METADATA", cache, sha256, METADATA_VERSION, f"{filename}:dup={int(near_duplicate)}",
+        lambda r: replace(
+            r, file_id=file_id, filename=filename,
+            owner_id=user_id, uploaded_by=user_id,
+            department=department, project_id=project_id,
+            upload_timestamp=datetime.now(timezone.utc).isoformat(),
+            stage_timings=stage_timings,
+        ),
+        generate_metadata,
         file_id=file_id,
         filename=filename,
         clean_text=normalize_result.clean_text if normalize_result else raw_text,
@@ -312,7 +480,7 @@ def process_document(
         department=department,
         project_id=project_id,
         stage_timings=stage_timings,
-        near_duplicate=bool(normalize_result and normalize_result.near_duplicate_score > 0.9),
+        near_duplicate=near_duplicate,
     )
     stage_results.append(metadata_sr)
     all_errors.extend(metadata_sr.errors)
@@ -321,14 +489,15 @@ def process_document(
     metadata_result: Optional[DocumentMetadata] = metadata_sr.data
 
     # ── Stage 5: STORAGE ─────────────────────────────────────────────
-    chunks = extract_result.chunks if extract_result else []
+    chunk_spans = extract_result.chunk_spans if extract_result else []
     meta_dict = metadata_result.to_dict() if metadata_result else {}
 
     storage_sr = _run_stage(
         "STORAGE", _store_in_knowledge_base,
         file_id,
         filename,
-        chunks,
+        extract_result.raw_text if extract_result else "",
+        chunk_spans,
         meta_dict,
         metadata_result.summary if metadata_result else "",
     )
@@ -0,0 +1,355 @@
+"""
+Extractor Sandbox - extract_document in isolated, reusable worker processes
+
+  ExtractorSandbox.extract(...)  → ExtractionResult, like extract_document,
+                                   but a pathological file cannot hang or
+                                   exhaust the calling process
+
+Workers are started together on first use (or by ``start()``) and each
+extracts one document at a time, receiving the temp file path (or the
+bytes) over a pipe:
+
+  timeout    SANDBOX_TIMEOUT_SECONDS of wall clock per document; then the
+             worker and everything it started are killed and replaced
+  memory     RLIMIT_AS of SANDBOX_MEMORY_MB per worker (the mapped input
+             counts towards it); a MemoryError fails the document and
+             retires the worker
+  recycling  a worker is replaced after SANDBOX_MAX_DOCUMENTS documents so
+             leaks and heap fragmentation do not build up
+
+Failures come back as an unsuccessful ExtractionResult whose ``errors``
+describe what happened and whose ``metadata["sandbox"]`` records the
+outcome ("timeout", "memory" or "crashed"), elapsed seconds and limits.
+
+The pipeline uses the sandbox for EXTRACT when EXTRACT_SANDBOX=1. Page
+streaming is off in that mode: pages arrive with the finished result.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import mmap
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from .extract import ExtractionResult, extract_document, failed_result, resolve_extension
+from .startup import libraries, warmup
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+SANDBOX_ENABLED: bool = os.getenv("EXTRACT_SANDBOX", "0") not in ("0", "false", "no")
+SANDBOX_WORKERS: int = int(os.getenv("SANDBOX_WORKERS", str(os.cpu_count() or 1)))
+SANDBOX_TIMEOUT_SECONDS: float = float(os.getenv("SANDBOX_TIMEOUT_SECONDS", "120"))
+SANDBOX_MEMORY_MB: int = int(os.getenv("SANDBOX_MEMORY_MB", "2048"))       # 0 = no cap
+SANDBOX_MAX_DOCUMENTS: int = int(os.getenv("SANDBOX_MAX_DOCUMENTS", "100"))
+# forkserver forks workers from a clean process that has already imported
+# the extractors, so replacing a killed worker is cheap and never copies
+# the (threaded) parent.
+SANDBOX_START_METHOD: str = os.getenv(
+    "SANDBOX_START_METHOD",
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn",
+)
+
+BufferLike = Union[bytes, bytearray, memoryview]
+
+# ---------------------------------------------------------------------------
+# Worker process
+# ---------------------------------------------------------------------------
+
+def _limit_memory(memory_mb: int) -> None:
+    if memory_mb <= 0:
+        return
+    try:
+        import resource
+    except ImportError:  # not POSIX
+        return
+    limit = memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _extract_job(job: Dict[str, Any], data: Optional[bytes]) -> ExtractionResult:
+    path = job["source_path"]
+    if data is not None or not path:
+        return extract_document(data or b"", job["file_id"], job["filename"], job["mime_type"], path)
+    with open(path, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            return extract_document(b"", job["file_id"], job["filename"], job["mime_type"], path)
+        mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    try:
+        return extract_document(view, job["file_id"], job["filename"], job["mime_type"], path)
+    finally:
+        view.release()
+        try:
+            mapped.close()
+        except BufferError:
+            pass  # an extractor kept a view; freed with it
+
+
+def _worker_main(conn: Any, memory_mb: int, warm_formats: Sequence[str]) -> None:
+    """Serve jobs until told to stop (None) or the parent goes away."""
+    # Own process group, so a timeout kill also takes down pools the
+    # extractors started (PDF page ranges, OCR).
+    os.setsid()
+    _limit_memory(memory_mb)
+    if warm_formats:
+        warmup(warm_formats, pools=False, sandbox=False)
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError, KeyboardInterrupt):
+            return
+        if job is None:
+            return
+        try:
+            data = conn.recv_bytes() if job["inline"] else None
+            result = _extract_job(job, data)
+            del data
+            # extract_document reports a MemoryError as an error string
+            outcome = "memory" if any("MemoryError" in e for e in result.errors) else "ok"
+            conn.send((outcome, result))
+        except MemoryError:
+            outcome, result = "memory", None
+            conn.send((outcome, None))
+        except (EOFError, OSError):
+            return
+        if outcome == "memory":
+            return  # the heap may be in any state; let the parent replace us
+
+
+# ---------------------------------------------------------------------------
+# Sandbox: pool of workers
+# ---------------------------------------------------------------------------
+
+class _Worker:
+    def __init__(self, ctx: Any, memory_mb: int, warm_formats: Sequence[str]) -> None:
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child, memory_mb, list(warm_formats)),
+            name="extract-sandbox", daemon=False,
+        )
+        self.process.start()
+        child.close()
+        self.documents = 0
+
+    def kill(self) -> None:
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError, AttributeError):
+            self.process.kill()
+        self.process.join(5)
+        self.conn.close()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+
+class ExtractorSandbox:
+    """Pre-started extraction worker processes with per-document limits."""
+
+    def __init__(
+        self,
+        workers: int = SANDBOX_WORKERS,
+        timeout: float = SANDBOX_TIMEOUT_SECONDS,
+        memory_mb: int = SANDBOX_MEMORY_MB,
+        max_documents: int = SANDBOX_MAX_DOCUMENTS,
+        start_method: str = SANDBOX_START_METHOD,
+    ) -> None:
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.max_documents = max_documents
+        self.start_method = start_method
+        self.warm_formats: List[str] = []
+        self._lock = threading.Lock()
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._all: List[_Worker] = []
+        self._pid = 0
+        self.processed = 0
+        self.timeouts = 0
+        self.memory_failures = 0
+        self.crashes = 0
+        self.recycled = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "idle": self._idle.qsize(),
+                "processed": self.processed,
+                "timeouts": self.timeouts,
+                "memory_failures": self.memory_failures,
+                "crashes": self.crashes,
+                "recycled": self.recycled,
+            }
+
+    def _context(self) -> Any:
+        ctx = multiprocessing.get_context(self.start_method)
+        if self.start_method == "forkserver":
+            # Only the first sandbox to start the fork server gets to choose.
+            ctx.set_forkserver_preload([__name__, *libraries(self.warm_formats)])
+        return ctx
+
+    def _spawn(self) -> _Worker:
+        # Called under self._lock.
+        worker = _Worker(self._context(), self.memory_mb, self.warm_formats)
+        self._all.append(worker)
+        return worker
+
+    def start(self, warm_formats: Optional[Sequence[str]] = None) -> None:
+        """
+        Start the workers now rather than on the first document. Workers
+        started from here on (including replacements) first warm up
+        ``warm_formats`` (see startup.warmup).
+        """
+        with self._lock:
+            if warm_formats is not None:
+                self.warm_formats = list(warm_formats)
+            # A forked child must not reuse the parent's workers.
+            if self._pid == os.getpid():
+                return
+            self._idle = queue.Queue()
+            self._all = []
+            for _ in range(self.workers):
+                self._idle.put(self._spawn())
+            self._pid = os.getpid()
+        # Workers are not daemonic (extractors start their own pools), so
+        # multiprocessing would wait for them at exit; stop them first.
+        atexit.register(self.shutdown)
+
+    def _replace(self, worker: _Worker, recycle: bool = False) -> None:
+        if recycle:
+            worker.stop()
+        else:
+            worker.kill()
+        with self._lock:
+            if worker in self._all:
+                self._all.remove(worker)
+            if self._pid == os.getpid():
+                self._idle.put(self._spawn())
+
+    def extract(
+        self,
+        file_data: Optional[BufferLike],
+        file_id: str,
+        filename: str,
+        mime_type: str = "",
+        source_path: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> ExtractionResult:
+        """
+        Extract one document in a worker; arguments as for extract_document.
+
+        With ``source_path`` the worker maps the file itself and
+        ``file_data`` is not sent. Blocks while all workers are busy.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        self.start()
+        worker = self._idle.get()
+        if not worker.process.is_alive():
+            self._replace(worker)
+            worker = self._idle.get()
+        inline = not source_path
+        job = {"file_id": file_id, "filename": filename, "mime_type": mime_type,
+               "source_path": source_path, "inline": inline}
+        start = time.perf_counter()
+        outcome, result = "crashed", None
+        try:
+            worker.conn.send(job)
+            if inline:
+                worker.conn.send_bytes(file_data or b"")
+            if worker.conn.poll(timeout):
+                outcome, result = worker.conn.recv()
+            else:
+                outcome = "timeout"
+        except (EOFError, OSError):
+            pass  # worker died mid-document; exit code below
+        elapsed = time.perf_counter() - start
+        worker.documents += 1
+
+        with self._lock:
+            self.processed += 1
+            if outcome == "timeout":
+                self.timeouts += 1
+            elif outcome == "memory":
+                self.memory_failures += 1
+            elif outcome == "crashed":
+                self.crashes += 1
+        if outcome != "ok":
+            if outcome == "crashed":
+                worker.process.join(1)
+            self._replace(worker)
+            return self._failure(file_id, filename, mime_type, outcome, elapsed, timeout,
+                                 worker.process.exitcode, result)
+        if self.max_documents and worker.documents >= self.max_documents:
+            with self._lock:
+                self.recycled += 1
+            self._replace(worker, recycle=True)
+        else:
+            self._idle.put(worker)
+        return result
+
+    def _failure(self, file_id: str, filename: str, mime_type: str, outcome: str, elapsed: float,
+                 timeout: float, exitcode: Optional[int], result: Optional[ExtractionResult]) -> ExtractionResult:
+        if outcome == "timeout":
+            error = f"Extraction timed out after {timeout:.0f}s; sandbox worker killed"
+        elif outcome == "memory":
+            error = f"Extraction exceeded the sandbox memory limit of {self.memory_mb} MB"
+        elif exitcode is not None and exitcode < 0:
+            error = f"Sandbox worker died from signal {-exitcode} during extraction"
+        else:
+            error = f"Sandbox worker exited unexpectedly (exit code {exitcode})"
+        logger.error("%s: %s", filename, error)
+        info = {"outcome": outcome, "seconds": round(elapsed, 3), "timeout_seconds": timeout,
+                "memory_limit_mb": self.memory_mb, "exit_code": exitcode}
+        doc_type = resolve_extension(filename, mime_type).lstrip(".") or "unknown"
+        failed = failed_result(file_id, filename, doc_type, [error], {"sandbox": info})
+        if result is not None:
+            failed.errors.extend(result.errors)
+        return failed
+
+    def shutdown(self) -> None:
+        atexit.unregister(self.shutdown)
+        with self._lock:
+            workers, self._all = self._all, []
+            owned = self._pid == os.getpid()
+            self._pid = 0
+        if owned:
+            for worker in workers:
+                worker.stop(timeout=1.0)
+
+
+_SANDBOX: Optional[ExtractorSandbox] = None
+_SANDBOX_LOCK = threading.Lock()
+
+
+def get_extractor_sandbox() -> ExtractorSandbox:
+    global _SANDBOX
+    if _SANDBOX is None:
+        with _SANDBOX_LOCK:
+            if _SANDBOX is None:
+                _SANDBOX = ExtractorSandbox()
+    return _SANDBOX
+
+
+def set_extractor_sandbox(sandbox: ExtractorSandbox) -> None:
+    global _SANDBOX
+    _SANDBOX = sandbox
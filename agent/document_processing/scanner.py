@@ -0,0 +1,255 @@
+"""
+Malware Scanner - pooled ClamAV client with verdict caching
+
+Speaks the clamd INSTREAM protocol directly over persistent IDSESSION
+connections (unix socket or TCP), so a busy worker reuses a handful of
+sockets instead of connecting once per document.
+
+  MalwareScanner.scan(...)    → blocking scan, returns (status, detail)
+  MalwareScanner.submit(...)  → Future, scan runs on the scanner's thread pool
+                                 while the caller does other ingest work
+
+Verdicts ("clean" / "threat_found") are cached by SHA-256 with a TTL.
+tests/fake_clamd.py has a minimal in-process clamd to test against.
+
+Configure with CLAMD_ADDRESS="unix:/path/to/clamd.ctl" or "tcp:host:port".
+"""
+
+from __future__ import annotations
+
+import io
+import logging
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+CLAMD_ADDRESS: str = os.getenv("CLAMD_ADDRESS", "unix:/var/run/clamav/clamd.ctl")
+CLAMD_TIMEOUT_SECONDS: float = float(os.getenv("CLAMD_TIMEOUT_SECONDS", "60"))
+SCAN_POOL_SIZE: int = int(os.getenv("SCAN_POOL_SIZE", "4"))
+SCAN_VERDICT_TTL_SECONDS: int = int(os.getenv("SCAN_VERDICT_TTL_SECONDS", "86400"))
+SCAN_VERDICT_CACHE_SIZE: int = 50_000
+_STREAM_CHUNK = 64 * 1024
+_RETRY_UNAVAILABLE_AFTER = 30.0  # seconds to wait before re-dialing a dead clamd
+
+ScanSource = Union[bytes, bytearray, memoryview, str, Path, io.IOBase]
+
+
+class ScannerUnavailable(Exception):
+    """clamd could not be reached."""
+
+
+# ---------------------------------------------------------------------------
+# clamd connection + pool
+# ---------------------------------------------------------------------------
+
+def _parse_address(address: str) -> Tuple[int, Union[str, Tuple[str, int]]]:
+    if address.startswith("tcp:"):
+        host, _, port = address[4:].rpartition(":")
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    return socket.AF_UNIX, address[5:] if address.startswith("unix:") else address
+
+
+class _ClamdConnection:
+    """One clamd IDSESSION; commands are pipelined one at a time."""
+
+    def __init__(self, address: str, timeout: float) -> None:
+        family, target = _parse_address(address)
+        self._sock = socket.socket(family, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        try:
+            self._sock.connect(target)
+            self._sock.sendall(b"zIDSESSION\0")
+        except OSError:
+            self._sock.close()
+            raise
+        self._buffer = b""
+
+    def instream(self, stream: io.IOBase) -> Tuple[str, str]:
+        self._sock.sendall(b"zINSTREAM\0")
+        while True:
+            chunk = stream.read(_STREAM_CHUNK)
+            if not chunk:
+                break
+            self._sock.sendall(struct.pack("!L", len(chunk)) + chunk)
+        self._sock.sendall(struct.pack("!L", 0))
+        reply = self._read_reply()
+        # Session replies look like "<id>: stream: OK" / "<id>: stream: Name FOUND"
+        reply = reply.split(": ", 1)[-1]
+        if reply.startswith("stream: "):
+            reply = reply[len("stream: "):]
+        if reply.endswith(" FOUND"):
+            return "threat_found", reply[:-len(" FOUND")]
+        if reply == "OK":
+            return "clean", "ClamAV scan passed"
+        raise OSError(f"clamd error: {reply}")
+
+    def _read_reply(self) -> str:
+        while b"\0" not in self._buffer:
+            data = self._sock.recv(4096)
+            if not data:
+                raise OSError("clamd closed the connection")
+            self._buffer += data
+        reply, _, self._buffer = self._buffer.partition(b"\0")
+        return reply.decode("utf-8", errors="replace").strip()
+
+    def close(self) -> None:
+        try:
+            self._sock.sendall(b"zEND\0")
+        except OSError:
+            pass
+        self._sock.close()
+
+
+class ClamdPool:
+    """Bounded pool of clamd sessions; broken sessions are discarded."""
+
+    def __init__(self, address: str = CLAMD_ADDRESS, size: int = SCAN_POOL_SIZE,
+                 timeout: float = CLAMD_TIMEOUT_SECONDS) -> None:
+        self.address = address
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[_ClamdConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._down_until = 0.0
+
+    def instream(self, stream: io.IOBase) -> Tuple[str, str]:
+        if time.monotonic() < self._down_until:
+            raise ScannerUnavailable(f"clamd at {self.address} marked unavailable")
+        with self._slots:
+            # An idle session may have been closed by clamd's IdleTimeout;
+            # retry once on a fresh connection before giving up.
+            for attempt in range(2):
+                conn = self._checkout()
+                start = stream.tell() if stream.seekable() else None
+                try:
+                    verdict = conn.instream(stream)
+                except OSError:
+                    conn.close()
+                    if attempt or start is None:
+                        raise
+                    stream.seek(start)
+                    continue
+                self._idle.put(conn)
+                return verdict
+        raise ScannerUnavailable("unreachable")
+
+    def _checkout(self) -> _ClamdConnection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return _ClamdConnection(self.address, self.timeout)
+        except OSError as exc:
+            self._down_until = time.monotonic() + _RETRY_UNAVAILABLE_AFTER
+            raise ScannerUnavailable(f"cannot connect to clamd at {self.address}: {exc}") from exc
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+# ---------------------------------------------------------------------------
+# Scanner
+# ---------------------------------------------------------------------------
+
+class MalwareScanner:
+    """Pooled, cached, optionally asynchronous malware scanning."""
+
+    def __init__(self, pool: Optional[ClamdPool] = None,
+                 verdict_ttl: int = SCAN_VERDICT_TTL_SECONDS,
+                 workers: int = SCAN_POOL_SIZE) -> None:
+        self.pool = pool or ClamdPool()
+        self.verdict_ttl = verdict_ttl
+        self._verdicts: "OrderedDict[str, Tuple[str, str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="malware-scan")
+
+    def cached_verdict(self, sha256: str) -> Optional[Tuple[str, str]]:
+        with self._lock:
+            hit = self._verdicts.get(sha256)
+            if hit is None:
+                return None
+            if hit[2] <= time.time():
+                del self._verdicts[sha256]
+                return None
+            self._verdicts.move_to_end(sha256)
+            return hit[0], hit[1]
+
+    def _remember(self, sha256: str, verdict: Tuple[str, str]) -> None:
+        with self._lock:
+            self._verdicts[sha256] = (verdict[0], verdict[1], time.time() + self.verdict_ttl)
+            self._verdicts.move_to_end(sha256)
+            while len(self._verdicts) > SCAN_VERDICT_CACHE_SIZE:
+                self._verdicts.popitem(last=False)
+
+    def scan(self, source: ScanSource, sha256: str) -> Tuple[str, str]:
+        """
+        Scan ``source`` (bytes, a path, or a binary file object).
+        Returns (status, detail) with status "clean" | "threat_found" | "skipped".
+        """
+        cached = self.cached_verdict(sha256) if sha256 else None
+        if cached is not None:
+            return cached
+        try:
+            if isinstance(source, (str, Path)):
+                with open(source, "rb") as fh:
+                    verdict = self.pool.instream(fh)
+            elif isinstance(source, (bytes, bytearray, memoryview)):
+                verdict = self.pool.instream(io.BytesIO(source))
+            else:
+                verdict = self.pool.instream(source)
+        except ScannerUnavailable:
+            return "skipped", "Antivirus unavailable; hash-list check passed"
+        except OSError as exc:
+            logger.warning("clamd scan failed: %s", exc)
+            return "skipped", f"Antivirus scan failed ({exc}); hash-list check passed"
+        if sha256:
+            self._remember(sha256, verdict)
+        return verdict
+
+    def submit(self, source: ScanSource, sha256: str) -> "Future[Tuple[str, str]]":
+        """Run ``scan`` on the scanner thread pool; cache hits resolve immediately."""
+        cached = self.cached_verdict(sha256) if sha256 else None
+        if cached is not None:
+            fut: "Future[Tuple[str, str]]" = Future()
+            fut.set_result(cached)
+            return fut
+        return self._executor.submit(self.scan, source, sha256)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+        self.pool.close()
+
+
+_SCANNER: Optional[MalwareScanner] = None
+_SCANNER_LOCK = threading.Lock()
+
+
+def get_scanner() -> MalwareScanner:
+    global _SCANNER
+    if _SCANNER is None:
+        with _SCANNER_LOCK:
+            if _SCANNER is None:
+                _SCANNER = MalwareScanner()
+    return _SCANNER
+
+
+def set_scanner(scanner: MalwareScanner) -> None:
+    global _SCANNER
+    _SCANNER = scanner
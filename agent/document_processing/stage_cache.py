@@ -0,0 +1,178 @@
+"""
+Stage Result Cache - content-addressed cache for pipeline stage outputs
+
+Results of the expensive stages (EXTRACT, NORMALIZE, METADATA) are keyed by
+``(sha256, stage name, stage version)`` plus an optional variant (e.g. the
+extractor the file was dispatched to) and stored on disk as zlib-compressed
+pickles in a SQLite database. Least-recently-used entries are evicted once the
+total payload size exceeds ``STAGE_CACHE_MAX_BYTES``.
+
+Entries are unpickled, so the database lives in a private directory (mode
+0700, owned by this user) outside the shared upload temp tree; a directory
+anyone else can write to is refused and caching is turned off.
+
+Re-uploads of identical content therefore skip OCR, parsing and NER entirely;
+the pipeline only refreshes the owner-specific fields on the cached results.
+
+Bump a stage module's ``STAGE_VERSION`` whenever its output changes so stale
+entries stop matching.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import pickle
+import sqlite3
+import stat
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+STAGE_CACHE_ENABLED: bool = os.getenv("STAGE_CACHE_ENABLED", "1") not in ("0", "false", "no")
+STAGE_CACHE_PATH: Path = Path(os.getenv(
+    "STAGE_CACHE_PATH",
+    str(Path(os.getenv("XDG_CACHE_HOME", str(Path.home() / ".cache"))) / "doc_processing" / "stage_cache.sqlite3"),
+))
+STAGE_CACHE_MAX_BYTES: int = int(os.getenv("STAGE_CACHE_MAX_MB", "512")) * 1024 * 1024
+_COMPRESSION_LEVEL = 6
+
+
+def _private_dir(path: Path) -> None:
+    """
+    Create ``path`` with mode 0700, or make sure an existing one belongs to
+    this user and is closed to everyone else; raises PermissionError if not.
+    """
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    st = os.lstat(path)
+    if stat.S_ISLNK(st.st_mode):
+        raise PermissionError(f"{path} is a symlink")
+    if not hasattr(os, "getuid"):  # not POSIX
+        return
+    if st.st_uid != os.getuid():
+        raise PermissionError(f"{path} is owned by uid {st.st_uid}, not {os.getuid()}")
+    if st.st_mode & 0o077:
+        os.chmod(path, 0o700)
+
+
+def _cache_key(sha256: str, stage: str, version: str, variant: str = "") -> str:
+    return f"{sha256}:{stage}:{version}:{variant}"
+
+
+class StageCache:
+    """SQLite-backed, size-bounded LRU cache of stage results."""
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS stage_results ("
+        " cache_key TEXT PRIMARY KEY,"
+        " payload BLOB NOT NULL,"
+        " size INTEGER NOT NULL,"
+        " last_access REAL NOT NULL"
+        ") WITHOUT ROWID",
+        "CREATE INDEX IF NOT EXISTS idx_stage_results_access ON stage_results(last_access)",
+    )
+
+    def __init__(self, path: Path = STAGE_CACHE_PATH, max_bytes: int = STAGE_CACHE_MAX_BYTES) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        # False once the database could not be opened; the cache then
+        # misses and drops writes.
+        self.available = True
+        try:
+            _private_dir(self.path.parent)
+            conn = self._connection()
+            for stmt in self._SCHEMA:
+                conn.execute(stmt)
+        except (OSError, sqlite3.Error) as exc:
+            logger.warning("Stage cache unavailable at %s (%s); caching disabled", self.path, exc)
+            self.available = False
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, sha256: str, stage: str, version: str, variant: str = "") -> Optional[Any]:
+        if not self.available:
+            return None
+        key = _cache_key(sha256, stage, version, variant)
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT payload FROM stage_results WHERE cache_key = ?", (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            value = pickle.loads(zlib.decompress(row[0]))
+        except Exception as exc:
+            logger.warning("Dropping unreadable stage cache entry %s: %s", key, exc)
+            conn.execute("DELETE FROM stage_results WHERE cache_key = ?", (key,))
+            return None
+        conn.execute(
+            "UPDATE stage_results SET last_access = ? WHERE cache_key = ?", (time.time(), key),
+        )
+        return value
+
+    def put(self, sha256: str, stage: str, version: str, value: Any, variant: str = "") -> None:
+        if not self.available:
+            return
+        payload = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), _COMPRESSION_LEVEL)
+        if len(payload) > self.max_bytes:
+            return
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO stage_results (cache_key, payload, size, last_access) VALUES (?, ?, ?, ?)",
+            (_cache_key(sha256, stage, version, variant), payload, len(payload), time.time()),
+        )
+        self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM stage_results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        victims = []
+        for key, size in conn.execute(
+            "SELECT cache_key, size FROM stage_results ORDER BY last_access",
+        ):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM stage_results WHERE cache_key = ?", victims)
+        logger.debug("Stage cache evicted %d entries (%d bytes)", len(victims), freed)
+
+
+# ---------------------------------------------------------------------------
+# Process-wide cache
+# ---------------------------------------------------------------------------
+
+_CACHE: Optional[StageCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_stage_cache() -> Optional[StageCache]:
+    """Return the shared stage cache, or None if disabled/unavailable."""
+    global _CACHE
+    if not STAGE_CACHE_ENABLED:
+        return None
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = StageCache()
+    return _CACHE if _CACHE.available else None
@@ -0,0 +1,143 @@
+"""
+Startup - warm a long-lived process before its first document
+
+  warmup(formats=[...])  → import and initialise the libraries those formats
+                           need, start the worker pools they run on, and
+                           report what each step cost
+
+Extractors import their libraries inside the function, so a short-lived
+process only pays for what it uses, but the first document of each format
+in a long-lived one pays the whole import bill. Call ``warmup`` once at
+service start instead:
+
+  libraries  imported in this process (missing optional ones are reported,
+             not raised)
+  models     spaCy's NER pipeline, tesserocr's engine
+  pools      PDF page-range and OCR process pools started, and their
+             workers warmed the same way
+  sandbox    with EXTRACT_SANDBOX=1, sandbox workers start with the same
+             formats preloaded and warmed
+
+Format names: see FORMATS. ``formats=None`` warms everything.
+"""
+
+from __future__ import annotations
+
+import importlib
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Format → the (optional) libraries its extractor imports.
+FORMATS: Dict[str, Tuple[str, ...]] = {
+    "pdf": ("pdfplumber", "PyPDF2", "pypdfium2"),
+    "docx": ("docx",),
+    "pptx": ("pptx",),
+    "xlsx": ("openpyxl",),
+    "html": ("lxml.etree",),
+    "xml": ("lxml.etree",),
+    "yaml": ("yaml",),
+    "parquet": ("pyarrow", "pyarrow.parquet"),
+    "feather": ("pyarrow", "pyarrow.feather"),
+    "avro": ("fastavro",),
+    "image": ("PIL.Image", "tesserocr", "pytesseract"),
+    "text": ("charset_normalizer", "chardet"),
+    "ner": ("spacy",),
+}
+
+
+def libraries(formats: Optional[Sequence[str]] = None) -> List[str]:
+    """Library modules for ``formats`` (all formats if None), in order, once each."""
+    names = list(FORMATS) if formats is None else list(formats)
+    unknown = [f for f in names if f not in FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown format(s): {', '.join(unknown)}. Available: {', '.join(FORMATS)}")
+    return list(dict.fromkeys(lib for f in names for lib in FORMATS[f]))
+
+
+def _preload(modules: Sequence[str]) -> List[str]:
+    """Import ``modules``, skipping missing ones; returns those imported. Also a pool task."""
+    loaded = []
+    for name in modules:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except Exception:  # ImportError, or a library broken at import
+            pass
+    return loaded
+
+
+def _step(report: Dict[str, Dict[str, Any]], name: str, fn: Callable[[], Any]) -> None:
+    start = time.perf_counter()
+    try:
+        value = fn()
+        entry: Dict[str, Any] = {"status": "ok" if value is not False else "missing"}
+        if isinstance(value, int) and not isinstance(value, bool):
+            entry["workers"] = value
+    except Exception as exc:
+        entry = {"status": "failed", "error": str(exc)}
+    entry["ms"] = round((time.perf_counter() - start) * 1000, 1)
+    report[name] = entry
+
+
+def _warm_pdf_pool(modules: Sequence[str]) -> int:
+    from . import extract
+    pool = extract._pdf_pool()
+    futures = [pool.submit(_preload, modules) for _ in range(extract.PDF_PARALLEL_WORKERS)]
+    for fut in futures:
+        fut.result()
+    return len(futures)
+
+
+def _load_ner() -> bool:
+    from .normalize import _spacy_model
+    return bool(_spacy_model())
+
+
+def warmup(
+    formats: Optional[Sequence[str]] = None,
+    pools: bool = True,
+    sandbox: Optional[bool] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Pre-import and pre-initialise what ``formats`` need.
+
+    Parameters
+    ----------
+    formats : sequence of str, optional
+        Keys of FORMATS; None warms every format.
+    pools : bool
+        Also start the PDF / OCR process pools and warm their workers.
+    sandbox : bool, optional
+        Start sandbox workers warmed for ``formats``; defaults to
+        EXTRACT_SANDBOX.
+
+    Returns
+    -------
+    dict
+        Step name → {"status": "ok" | "missing" | "failed", "ms": ...}, in
+        the order the steps ran. Never raises for a missing library.
+    """
+    names = list(FORMATS) if formats is None else list(formats)
+    modules = libraries(names)
+    report: Dict[str, Dict[str, Any]] = {}
+    # The pipeline modules themselves: the first document would load them.
+    _step(report, "pipeline", lambda: importlib.import_module(f"{__package__}.pipeline"))
+    for name in modules:
+        _step(report, name, lambda name=name: bool(_preload([name])))
+    if "ner" in names:
+        _step(report, "spacy model", _load_ner)
+    if pools:
+        if "pdf" in names:
+            _step(report, "pdf pool", lambda: _warm_pdf_pool(FORMATS["pdf"]))
+        if "image" in names or "pdf" in names:
+            from .ocr import get_ocr_engine
+            _step(report, "ocr pool", lambda: get_ocr_engine().warm())
+    from .sandbox import SANDBOX_ENABLED, get_extractor_sandbox
+    if SANDBOX_ENABLED if sandbox is None else sandbox:
+        _step(report, "sandbox", lambda: get_extractor_sandbox().start(warm_formats=names))
+    logger.info("Warmup for %s: %s", ", ".join(names),
+                ", ".join(f"{k} {v['status']} {v['ms']} ms" for k, v in report.items()))
+    return report
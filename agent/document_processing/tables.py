@@ -0,0 +1,551 @@
+"""
+Columnar Tables - compact typed storage for spreadsheet and tabular extracts
+
+A ColumnarTable keeps each column in a typed ``array`` (int64, float64,
+bool) or, for text, as dictionary-encoded uint32 codes plus one copy of each
+distinct string, with a per-row null mask. A 200k-row numeric sheet costs
+about 8 bytes per cell instead of a Python ``str`` object per cell.
+
+Columns start untyped and are promoted as values arrive:
+  empty → bool | int | float | datetime | str
+  int + float → float;  anything else mixed → str
+so a single streaming pass is enough to build the table.
+
+Text views (``iter_text_rows`` / ``to_text``) are produced on demand and can
+be capped at ``TABLE_TEXT_MAX_ROWS`` rows; nothing is stringified up front.
+
+For inputs too large to hold at all (big CSVs), ColumnStats computes
+per-column statistics in one pass and ColumnarSpillWriter streams the rows
+to disk as compressed ColumnarTable row groups (read back with read_spill).
+"""
+
+from __future__ import annotations
+
+import datetime as _dt
+import os
+import pickle
+import re
+import struct
+import zlib
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+TABLE_TEXT_MAX_ROWS: int = int(os.getenv("TABLE_TEXT_MAX_ROWS", "10000"))
+SPILL_ROW_GROUP_ROWS: int = int(os.getenv("SPILL_ROW_GROUP_ROWS", "65536"))
+
+_ARRAY_CODES = {"bool": "b", "int": "q", "float": "d"}
+_INT64_MIN, _INT64_MAX = -(2 ** 63), 2 ** 63 - 1
+# Text columns stop dictionary-encoding once they turn out to be mostly
+# unique (ids, references): the lookup dict would cost more than it saves.
+_DICT_MIN_ROWS = 1024
+_DICT_MAX_RATIO = 0.5
+
+_KIND_BY_TYPE = {
+    bool: "bool", float: "float", str: "str",
+    _dt.datetime: "datetime", _dt.date: "datetime", _dt.time: "datetime",
+}
+_EXTEND_KINDS = {**_KIND_BY_TYPE, int: "int"}  # int64 range checked in extend()
+
+
+def _kind_of(value: Any) -> str:
+    kind = _KIND_BY_TYPE.get(type(value))
+    if kind is not None:
+        return kind
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int" if _INT64_MIN <= value <= _INT64_MAX else "str"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, (_dt.datetime, _dt.date, _dt.time)):
+        return "datetime"
+    return "str"
+
+
+def _format_float(value: float) -> str:
+    # Spreadsheet numbers come back as float even when integral; render
+    # 5.0 as "5" so whole-number columns read naturally.
+    if value.is_integer() and abs(value) < 1e16:
+        return str(int(value))
+    return repr(value)
+
+
+def _render(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return _format_float(value)
+    return str(value)
+
+
+class Column:
+    """One typed, nullable column. Append-only."""
+
+    __slots__ = ("name", "kind", "null_count", "_values", "_nulls", "_strings", "_codes")
+
+    def __init__(self, name: str = "", length: int = 0) -> None:
+        self.name = name
+        self.kind = "empty"
+        self.null_count = length
+        self._values: Optional[array] = None
+        self._nulls = bytearray(b"\x01" * length)
+        self._strings: List[str] = []       # str/datetime: distinct values
+        self._codes: Optional[Dict[str, int]] = {}  # value → code; None once plain
+
+    def __len__(self) -> int:
+        return len(self._nulls)
+
+    # ── building ──────────────────────────────────────────────────────
+
+    def _encode(self, text: str) -> int:
+        codes = self._codes
+        if codes is None:
+            self._strings.append(text)
+            return len(self._strings) - 1
+        code = codes.get(text)
+        if code is None:
+            code = codes[text] = len(self._strings)
+            self._strings.append(text)
+            n = len(self._nulls)
+            if n >= _DICT_MIN_ROWS and code > n * _DICT_MAX_RATIO:
+                self._codes = None
+        return code
+
+    def _promote(self, kind: str) -> None:
+        n = len(self._nulls)
+        if self.kind == "empty":
+            self._values = array(_ARRAY_CODES.get(kind, "I"), bytes(n * array(_ARRAY_CODES.get(kind, "I")).itemsize))
+            self.kind = kind
+            return
+        if self.kind == "int" and kind == "float":
+            self._values = array("d", (float(v) for v in self._values))
+            self.kind = "float"
+            return
+        # Anything else collapses to text, keeping the rendered values.
+        old = [None if self._nulls[i] else self.get(i) for i in range(n)]
+        self._strings, self._codes = [], {}
+        self._values = array("I", (0 if v is None else self._encode(_render(v)) for v in old))
+        self.kind = "str"
+
+    def append(self, value: Any) -> None:
+        if value is None:
+            self._nulls.append(1)
+            self.null_count += 1
+            if self._values is not None:
+                self._values.append(0)
+            return
+        kind = _kind_of(value)
+        if kind != self.kind and self.kind != "str" and not (self.kind == "float" and kind == "int"):
+            self._promote(kind if self.kind in ("empty", "int") else "str")
+        self._nulls.append(0)
+        if self.kind in ("str", "datetime"):
+            self._values.append(self._encode(value if type(value) is str else _render(value)))
+        elif self.kind == "float":
+            self._values.append(float(value))
+        else:
+            self._values.append(int(value))
+
+    def extend(self, values: Sequence[Any]) -> None:
+        """Append many values; uniform batches skip the per-value type checks."""
+        kinds = {_EXTEND_KINDS.get(t) for t in set(map(type, values)) if t is not type(None)}
+        if "int" in kinds:
+            ints = [v for v in values if type(v) is int]
+            if min(ints) < _INT64_MIN or max(ints) > _INT64_MAX:
+                kinds.add(None)
+        if None in kinds:   # unusual cell types or big ints: let append() decide
+            for v in values:
+                self.append(v)
+            return
+        target = self.kind
+        for kind in kinds:
+            target = _merge_kind(target, kind)
+        if target != self.kind:
+            self._promote(target)
+        if self._values is None:   # all None into an empty column
+            self._nulls.extend(b"\x01" * len(values))
+            self.null_count += len(values)
+            return
+        nulls = values.count(None)
+        self.null_count += nulls
+        self._nulls.extend([v is None for v in values] if nulls else bytes(len(values)))
+        if self.kind in ("str", "datetime") and kinds == {"str"}:
+            self._extend_strings([v or "" for v in values] if nulls else values)
+        elif self.kind in ("str", "datetime"):
+            encode = self._encode
+            self._values.extend([0 if v is None else encode(v if type(v) is str else _render(v)) for v in values])
+        elif nulls:
+            self._values.extend([0 if v is None else v for v in values])
+        else:
+            self._values.extend(values)
+
+    def _extend_strings(self, values: Sequence[str]) -> None:
+        # Null slots arrive as "" (the mask already marks them).
+        strings, codes = self._strings, self._codes
+        if codes is None:
+            start = len(strings)
+            strings.extend(values)
+            self._values.extend(range(start, len(strings)))
+            return
+        for v in dict.fromkeys(values):   # new distinct values, first-seen order
+            if v not in codes:
+                codes[v] = len(strings)
+                strings.append(v)
+        self._values.extend(map(codes.__getitem__, values))
+        n = len(self._nulls)
+        if n >= _DICT_MIN_ROWS and len(strings) > n * _DICT_MAX_RATIO:
+            self._codes = None
+
+    # ── reading ───────────────────────────────────────────────────────
+
+    def get(self, i: int) -> Any:
+        if self._nulls[i]:
+            return None
+        v = self._values[i]
+        if self.kind in ("str", "datetime"):
+            return self._strings[v]
+        if self.kind == "bool":
+            return bool(v)
+        return v
+
+    def text(self, i: int) -> str:
+        if i >= len(self._nulls) or self._nulls[i]:
+            return ""
+        v = self._values[i]
+        if self.kind in ("str", "datetime"):
+            return self._strings[v]
+        if self.kind == "float":
+            return _format_float(v)
+        if self.kind == "bool":
+            return str(bool(v))
+        return str(v)
+
+    @property
+    def values(self) -> Optional[array]:
+        """Raw typed storage (codes for text columns); nulls hold 0."""
+        return self._values
+
+    @property
+    def nbytes(self) -> int:
+        size = len(self._nulls)
+        if self._values is not None:
+            size += len(self._values) * self._values.itemsize
+        return size + sum(len(s) for s in self._strings)
+
+
+class ColumnarTable:
+    """
+    Column-oriented table built one row at a time.
+
+    ``header`` holds the column names (rendered as the first text row);
+    ragged rows are padded with nulls.
+    """
+
+    def __init__(self, name: str = "", header: Optional[Sequence[Any]] = None) -> None:
+        self.name = name
+        self.header: List[str] = [_render(h) for h in header] if header else []
+        self.columns: List[Column] = [Column(h) for h in self.header]
+        self.row_count = 0
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[Any]], name: str = "",
+                  header: Optional[Sequence[Any]] = None) -> "ColumnarTable":
+        table = cls(name, header)
+        for row in rows:
+            table.append_row(row)
+        return table
+
+    @property
+    def width(self) -> int:
+        return len(self.columns)
+
+    def append_row(self, row: Sequence[Any]) -> None:
+        while len(self.columns) < len(row):
+            self.columns.append(Column("", self.row_count))
+        for i, col in enumerate(self.columns):
+            col.append(row[i] if i < len(row) else None)
+        self.row_count += 1
+
+    def extend_columns(self, columns: Sequence[Sequence[Any]], rows: int) -> None:
+        """Append ``rows`` rows given column-wise (missing columns are null)."""
+        while len(self.columns) < len(columns):
+            self.columns.append(Column("", self.row_count))
+        for i, col in enumerate(self.columns):
+            col.extend(columns[i] if i < len(columns) else [None] * rows)
+        self.row_count += rows
+
+    def column_types(self) -> Dict[str, str]:
+        return {(c.name or f"column_{i + 1}"): c.kind for i, c in enumerate(self.columns)}
+
+    def iter_rows(self, start: int = 0, stop: Optional[int] = None) -> Iterator[List[Any]]:
+        stop = self.row_count if stop is None else min(stop, self.row_count)
+        for r in range(start, stop):
+            yield [c.get(r) for c in self.columns]
+
+    def iter_text_rows(self, limit: Optional[int] = TABLE_TEXT_MAX_ROWS,
+                       include_header: bool = True) -> Iterator[List[str]]:
+        """Rows as strings ("" for nulls), header first, at most ``limit`` data rows."""
+        width = self.width
+        if include_header and self.header:
+            yield self.header + [""] * (width - len(self.header))
+        stop = self.row_count if limit is None else min(limit, self.row_count)
+        for r in range(stop):
+            yield [c.text(r) for c in self.columns]
+
+    def text_rows(self, limit: Optional[int] = TABLE_TEXT_MAX_ROWS) -> List[List[str]]:
+        return list(self.iter_text_rows(limit))
+
+    def to_text(self, limit: Optional[int] = TABLE_TEXT_MAX_ROWS, sep: str = " | ") -> str:
+        return "\n".join(sep.join(row) for row in self.iter_text_rows(limit))
+
+    def truncated(self, limit: Optional[int] = TABLE_TEXT_MAX_ROWS) -> bool:
+        return limit is not None and self.row_count > limit
+
+    @property
+    def nbytes(self) -> int:
+        return sum(c.nbytes for c in self.columns)
+
+    def schema(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "rows": self.row_count,
+            "columns": [
+                {"name": c.name, "type": c.kind, "nulls": c.null_count}
+                for c in self.columns
+            ],
+        }
+
+
+# ---------------------------------------------------------------------------
+# Text cell parsing + single-pass column statistics
+# ---------------------------------------------------------------------------
+
+_ISO_DATE_BODY = r"\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?(?:Z|[+-]\d{2}:?\d{2})?"
+_ISO_DATE_LINES = re.compile(rf"(?:{_ISO_DATE_BODY}\n)*{_ISO_DATE_BODY}")
+_MAYBE_NUMBER = re.compile(r"^[0-9+\-.]", re.MULTILINE)
+_NOT_FLOAT_CHARS = re.compile(r"[^0-9eE+\-.\n]")
+_LEADING_ZERO = re.compile(r"^[+-]?0\d", re.MULTILINE)
+_DISTINCT_SKETCH_SIZE = 256
+_HASH_OFFSET = 1 << 63  # hash() is signed 64-bit
+_STAT_KINDS = {**_KIND_BY_TYPE, int: "int"}
+
+
+def parse_scalar(text: str) -> Any:
+    """Typed value for a text cell: None for "", int, float, else the text."""
+    if not text:
+        return None
+    c = text[0]
+    if (c.isdigit() or c in "+-.") and "_" not in text:
+        # Keep leading-zero codes (ZIPs, account numbers) as text.
+        if not (len(text) > 1 and c == "0" and text[1].isdigit()):
+            try:
+                return int(text)
+            except ValueError:
+                pass
+            try:
+                return float(text)
+            except ValueError:
+                pass
+    return text
+
+
+def parse_column(texts: List[str]) -> List[Any]:
+    """
+    ``parse_scalar`` over a whole column slice. Uniform int, float and text
+    slices are converted with C-level ``map`` calls; anything else falls back
+    to per-cell parsing. A slice mixing ints and floats comes back as all
+    floats, which is how the column would be stored anyway.
+    """
+    joined = "\n".join(texts)
+    if not _MAYBE_NUMBER.search(joined):
+        return [t or None for t in texts]
+    has_null = "" in texts
+    filled = [t or "0" for t in texts] if has_null else texts
+    parsed: Optional[List[Any]] = None
+    try:
+        ints = list(map(int, filled))
+        if list(map(str, ints)) == filled:   # rejects "007", "+5", " 5", "1_0"
+            parsed = ints
+    except ValueError:
+        pass
+    if parsed is None and not _NOT_FLOAT_CHARS.search(joined) and not _LEADING_ZERO.search(joined):
+        try:
+            parsed = list(map(float, filled))
+        except ValueError:
+            pass
+    if parsed is None:
+        if _ISO_DATE_LINES.fullmatch("\n".join(t for t in texts if t) if has_null else joined):
+            return [t or None for t in texts]
+        return list(map(parse_scalar, texts))
+    if has_null:
+        return [v if t else None for t, v in zip(texts, parsed)]
+    return parsed
+
+
+def _merge_kind(a: str, b: str) -> str:
+    if a == b or a == "empty":
+        return b
+    if {a, b} == {"int", "float"}:
+        return "float"
+    return "str"
+
+
+class ColumnStats:
+    """
+    Streaming statistics for one column: type, null count, min/max and a
+    distinct-count estimate (k-minimum-values sketch; exact below k).
+    Fed in batches: ``add_batch(values, texts)`` with parsed values and
+    their source text.
+    """
+
+    __slots__ = ("name", "kind", "count", "nulls", "_num_min", "_num_max",
+                 "_text_min", "_text_max", "_sketch")
+
+    def __init__(self, name: str = "", nulls: int = 0) -> None:
+        self.name = name
+        self.kind = "empty"
+        self.count = nulls
+        self.nulls = nulls
+        self._num_min: Any = None
+        self._num_max: Any = None
+        self._text_min: Optional[str] = None
+        self._text_max: Optional[str] = None
+        self._sketch: List[int] = []  # ascending, the k smallest distinct hashes
+
+    def add_batch(self, values: Sequence[Any], texts: Sequence[str]) -> None:
+        self.count += len(values)
+        present = [v for v in values if v is not None]
+        self.nulls += len(values) - len(present)
+        if not present:
+            return
+        strs = [t for t in texts if t]
+
+        kinds = {_STAT_KINDS.get(t, "str") for t in set(map(type, present))}
+        if kinds == {"str"} and self.kind in ("empty", "datetime"):
+            text_values = present if len(present) == len(strs) else [v for v in present if type(v) is str]
+            if _ISO_DATE_LINES.fullmatch("\n".join(text_values)):
+                kinds = {"datetime"}
+        for kind in kinds:
+            self.kind = _merge_kind(self.kind, kind)
+
+        nums = present if kinds <= {"int", "float"} else [v for v in present if type(v) in (int, float)]
+        if nums:
+            lo, hi = min(nums), max(nums)
+            if self._num_min is None or lo < self._num_min:
+                self._num_min = lo
+            if self._num_max is None or hi > self._num_max:
+                self._num_max = hi
+        lo_t, hi_t = min(strs), max(strs)
+        if self._text_min is None or lo_t < self._text_min:
+            self._text_min = lo_t
+        if self._text_max is None or hi_t > self._text_max:
+            self._text_max = hi_t
+
+        hashes = set(map(hash, strs))
+        if len(self._sketch) >= _DISTINCT_SKETCH_SIZE:
+            threshold = self._sketch[-1]
+            hashes = {h for h in hashes if h < threshold}
+        if hashes:
+            self._sketch = sorted(hashes.union(self._sketch))[:_DISTINCT_SKETCH_SIZE]
+
+    def add(self, value: Any, text: str) -> None:
+        self.add_batch([value], [text])
+
+    @property
+    def null_rate(self) -> float:
+        return self.nulls / self.count if self.count else 0.0
+
+    @property
+    def distinct_estimate(self) -> int:
+        k = len(self._sketch)
+        if k < _DISTINCT_SKETCH_SIZE:
+            return k
+        return int((k - 1) * 2 ** 64 / (self._sketch[-1] + _HASH_OFFSET + 1))
+
+    def to_dict(self) -> Dict[str, Any]:
+        numeric = self.kind in ("int", "float")
+        return {
+            "name": self.name,
+            "type": self.kind,
+            "count": self.count,
+            "null_rate": round(self.null_rate, 4),
+            "min": self._num_min if numeric else self._text_min,
+            "max": self._num_max if numeric else self._text_max,
+            "distinct_estimate": self.distinct_estimate,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Columnar spill files
+# ---------------------------------------------------------------------------
+
+_SPILL_MAGIC = b"DPCOLSP1"
+_SPILL_FRAME = struct.Struct("<Q")
+
+
+class ColumnarSpillWriter:
+    """
+    Stream rows to disk as a sequence of zlib-compressed ColumnarTable row
+    groups of ``row_group_rows`` rows, so memory stays bounded by one group.
+    Column types are per row group (a later group may have widened a column).
+    """
+
+    def __init__(self, path: Path, header: Optional[Sequence[Any]] = None,
+                 row_group_rows: int = SPILL_ROW_GROUP_ROWS) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.header = list(header) if header else None
+        self.row_group_rows = row_group_rows
+        self.rows_written = 0
+        self.row_groups = 0
+        self._fh = open(self.path, "wb")
+        self._fh.write(_SPILL_MAGIC)
+        self._table = ColumnarTable(self.path.stem, self.header)
+
+    def append_row(self, row: Sequence[Any]) -> None:
+        self._table.append_row(row)
+        if self._table.row_count >= self.row_group_rows:
+            self._flush()
+
+    def append_columns(self, columns: Sequence[Sequence[Any]], rows: int) -> None:
+        self._table.extend_columns(columns, rows)
+        if self._table.row_count >= self.row_group_rows:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._table.row_count:
+            return
+        payload = zlib.compress(pickle.dumps(self._table, pickle.HIGHEST_PROTOCOL), 1)
+        self._fh.write(_SPILL_FRAME.pack(len(payload)))
+        self._fh.write(payload)
+        self.rows_written += self._table.row_count
+        self.row_groups += 1
+        self._table = ColumnarTable(self.path.stem, self.header)
+
+    def close(self) -> None:
+        if not self._fh.closed:
+            self._flush()
+            self._fh.close()
+
+    def abort(self) -> None:
+        self._fh.close()
+        self.path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "ColumnarSpillWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        self.abort() if exc_type else self.close()
+
+
+def read_spill(path: Path) -> Iterator[ColumnarTable]:
+    """Yield the row groups of a spill file written by ColumnarSpillWriter."""
+    with open(path, "rb") as fh:
+        if fh.read(len(_SPILL_MAGIC)) != _SPILL_MAGIC:
+            raise ValueError(f"{path} is not a columnar spill file")
+        while True:
+            frame = fh.read(_SPILL_FRAME.size)
+            if not frame:
+                return
+            (size,) = _SPILL_FRAME.unpack(frame)
+            yield pickle.loads(zlib.decompress(fh.read(size)))
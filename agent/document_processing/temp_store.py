@@ -0,0 +1,219 @@
+"""
+Temporary Upload Store - content-addressed temp storage with background expiry
+
+Layout under the store root:
+  objects/<sha256[:2]>/<sha256>   → one copy of each distinct upload
+  uploads/<file_id>_<safe_name>   → per-upload hardlink to its object
+  .<file_id>.part                 → in-flight spool files from INGEST
+  spill/                          → EXTRACT side files (columnar spills)
+  .temp_index.sqlite3             → expiry index (expires_at-ordered)
+
+Identical uploads share one object; only a new hardlink is created. Expiry
+is tracked in a SQLite index ordered by ``expires_at`` and processed by a
+daemon janitor thread, so the request path never scans the directory. An
+object is removed once its last upload link has expired.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+TEMP_STORE_DIR: Path = Path(os.getenv("TEMP_UPLOAD_DIR", tempfile.gettempdir())) / "doc_processing"
+TEMP_STORE_TTL_SECONDS: int = 3600  # 1 hour
+JANITOR_INTERVAL_SECONDS: int = int(os.getenv("TEMP_JANITOR_INTERVAL_SECONDS", "60"))
+_JANITOR_BATCH = 500
+
+
+class TempStore:
+    """Content-addressed upload store rooted at ``root``."""
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS temp_files ("
+        " path TEXT PRIMARY KEY,"
+        " object_path TEXT NOT NULL,"
+        " expires_at REAL NOT NULL"
+        ")",
+        "CREATE INDEX IF NOT EXISTS idx_temp_files_expires ON temp_files(expires_at)",
+    )
+
+    def __init__(self, root: Path, ttl_seconds: int,
+                 janitor_interval: int = JANITOR_INTERVAL_SECONDS) -> None:
+        self.root = Path(root)
+        self.ttl_seconds = ttl_seconds
+        self.janitor_interval = janitor_interval
+        self.objects_dir = self.root / "objects"
+        self.uploads_dir = self.root / "uploads"
+        self.spill_dir = self.root / "spill"
+        self.uploads_dir.mkdir(parents=True, exist_ok=True)
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._janitor: Optional[threading.Thread] = None
+        self._janitor_pid = 0
+        self._stop = threading.Event()
+        self._janitor_lock = threading.Lock()
+        conn = self._connection()
+        for stmt in self._SCHEMA:
+            conn.execute(stmt)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(str(self.root / ".temp_index.sqlite3"), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def spool_path(self, file_id: str) -> Path:
+        return self.root / f".{file_id}.part"
+
+    def side_file_path(self, name: str) -> Path:
+        """
+        Path for an EXTRACT side file (e.g. a CSV spill) in ``spill/``. Starts
+        the janitor, so side files expire in extract-only processes too.
+        """
+        self.ensure_janitor()
+        return self.spill_dir / name
+
+    def object_path(self, sha256: str) -> Path:
+        return self.objects_dir / sha256[:2] / sha256
+
+    def commit(self, spool_path: Path, sha256: str, file_id: str, safe_name: str) -> str:
+        """
+        Move a finished spool file into the store and return the upload path.
+
+        If an object with the same hash already exists the spool is discarded
+        and the upload is hardlinked to the existing object.
+        """
+        obj = self.object_path(sha256)
+        upload = self.uploads_dir / f"{file_id}_{safe_name}"
+        try:
+            os.link(obj, upload)
+        except FileNotFoundError:
+            obj.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(spool_path, obj)
+            os.link(obj, upload)
+        except OSError as exc:
+            # Filesystem without hardlinks: keep a private copy per upload.
+            logger.debug("Hardlink unavailable (%s); storing %s unlinked", exc, upload)
+            os.replace(spool_path, upload)
+            obj = upload
+        spool_path.unlink(missing_ok=True)
+        self._connection().execute(
+            "INSERT OR REPLACE INTO temp_files (path, object_path, expires_at) VALUES (?, ?, ?)",
+            (str(upload), str(obj), time.time() + self.ttl_seconds),
+        )
+        self.ensure_janitor()
+        return str(upload)
+
+    def expire_due(self, now: Optional[float] = None) -> int:
+        """Remove every upload whose TTL has passed; return how many were removed."""
+        now = time.time() if now is None else now
+        conn = self._connection()
+        removed = 0
+        while True:
+            rows = conn.execute(
+                "SELECT path, object_path FROM temp_files WHERE expires_at <= ? "
+                "ORDER BY expires_at LIMIT ?", (now, _JANITOR_BATCH),
+            ).fetchall()
+            if not rows:
+                break
+            for path, object_path in rows:
+                Path(path).unlink(missing_ok=True)
+                if object_path != path:
+                    self._release_object(Path(object_path))
+            conn.executemany("DELETE FROM temp_files WHERE path = ?", [(r[0],) for r in rows])
+            removed += len(rows)
+        removed += self._sweep_orphaned_spools(now)
+        removed += self._sweep_spill_dir(now)
+        return removed
+
+    def _release_object(self, obj: Path) -> None:
+        # Only the object's own directory entry left → no live uploads.
+        try:
+            if obj.stat().st_nlink <= 1:
+                obj.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _sweep_orphaned_spools(self, now: float) -> int:
+        # Spools left behind by crashed workers. Only in-flight ``.part``
+        # files live at the top level, so this stays small.
+        removed = 0
+        for p in self.root.glob(".*.part"):
+            try:
+                if now - p.stat().st_mtime > self.ttl_seconds:
+                    p.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def _sweep_spill_dir(self, now: float) -> int:
+        # Extractors write side files (e.g. CSV column spills) here; they
+        # live as long as an upload does.
+        removed = 0
+        for p in self.spill_dir.glob("*"):
+            try:
+                if now - p.stat().st_mtime > self.ttl_seconds:
+                    p.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    # ── Janitor ─────────────────────────────────────────────────────
+
+    def ensure_janitor(self) -> None:
+        """Start the background janitor in this process if it isn't running."""
+        if self._janitor is not None and self._janitor_pid == os.getpid() and self._janitor.is_alive():
+            return
+        with self._janitor_lock:
+            if self._janitor is not None and self._janitor_pid == os.getpid() and self._janitor.is_alive():
+                return
+            self._stop.clear()
+            self._janitor = threading.Thread(target=self._janitor_loop, name="temp-store-janitor", daemon=True)
+            self._janitor_pid = os.getpid()
+            self._janitor.start()
+
+    def stop_janitor(self) -> None:
+        self._stop.set()
+        if self._janitor is not None and self._janitor_pid == os.getpid():
+            self._janitor.join(timeout=5)
+        self._janitor = None
+
+    def _janitor_loop(self) -> None:
+        while not self._stop.wait(self.janitor_interval):
+            try:
+                removed = self.expire_due()
+                if removed:
+                    logger.debug("Temp janitor removed %d expired files", removed)
+            except Exception as exc:
+                logger.warning("Temp janitor pass failed: %s", exc)
+
+
+# ---------------------------------------------------------------------------
+# Process-wide store
+# ---------------------------------------------------------------------------
+
+_STORE: Optional[TempStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_temp_store() -> TempStore:
+    """The store at TEMP_STORE_DIR, shared by INGEST (uploads) and EXTRACT (side files)."""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None or _STORE.root != TEMP_STORE_DIR:
+            _STORE = TempStore(TEMP_STORE_DIR, TEMP_STORE_TTL_SECONDS)
+        return _STORE
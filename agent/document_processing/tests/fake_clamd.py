@@ -0,0 +1,107 @@
+"""Minimal in-process clamd speaking IDSESSION + INSTREAM, for scanner tests."""
+import socketserver
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+EICAR_SIGNATURE = b"EICAR-STANDARD-ANTIVIRUS-TEST-FILE"
+
+
+class _FakeClamdHandler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        self.server.connections += 1
+        buf = b""
+        session_id = 0
+        in_session = False
+
+        def read_exact(n: int) -> bytes:
+            nonlocal buf
+            while len(buf) < n:
+                data = self.request.recv(65536)
+                if not data:
+                    raise ConnectionError
+                buf += data
+            out, buf = buf[:n], buf[n:]
+            return out
+
+        def read_command() -> bytes:
+            nonlocal buf
+            while b"\0" not in buf:
+                data = self.request.recv(4096)
+                if not data:
+                    raise ConnectionError
+                buf += data
+            cmd, _, buf = buf.partition(b"\0")
+            return cmd
+
+        try:
+            while True:
+                cmd = read_command()
+                if cmd == b"zIDSESSION":
+                    in_session = True
+                    continue
+                if cmd == b"zEND":
+                    return
+                if cmd != b"zINSTREAM":
+                    self.request.sendall(b"UNKNOWN COMMAND\0")
+                    return
+                session_id += 1
+                payload = bytearray()
+                while True:
+                    (size,) = struct.unpack("!L", read_exact(4))
+                    if size == 0:
+                        break
+                    payload += read_exact(size)
+                self.server.scanned += 1
+                if self.server.delay:
+                    time.sleep(self.server.delay)
+                reply = "stream: Eicar-Test-Signature FOUND" if EICAR_SIGNATURE in payload else "stream: OK"
+                prefix = f"{session_id}: " if in_session else ""
+                self.request.sendall(f"{prefix}{reply}\0".encode())
+                if not in_session:
+                    return
+        except (ConnectionError, OSError):
+            return
+
+
+class FakeClamdServer:
+    """
+    Threaded fake clamd. Flags any stream containing the EICAR test
+    signature. ``scanned`` counts INSTREAM commands served, ``connections``
+    the sessions opened, and ``delay`` holds every reply back (timeouts).
+
+        with FakeClamdServer(str(tmp_path / "clamd.sock")) as server:
+            scanner = MalwareScanner(ClamdPool(server.address))
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, delay: float = 0.0) -> None:
+        if socket_path:
+            Path(socket_path).unlink(missing_ok=True)
+            self._server = socketserver.ThreadingUnixStreamServer(socket_path, _FakeClamdHandler)
+            self.address = f"unix:{socket_path}"
+        else:
+            self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _FakeClamdHandler)
+            self.address = f"tcp:127.0.0.1:{self._server.server_address[1]}"
+        self._server.daemon_threads = True
+        self._server.scanned = 0
+        self._server.connections = 0
+        self._server.delay = delay
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def scanned(self) -> int:
+        return self._server.scanned
+
+    @property
+    def connections(self) -> int:
+        return self._server.connections
+
+    def __enter__(self) -> "FakeClamdServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
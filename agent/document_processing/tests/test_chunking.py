@@ -0,0 +1,47 @@
+import random
+import re
+
+from agent.document_processing import chunking
+from agent.document_processing.chunking import chunk_document, count_tokens
+
+_ATOMS = ["word", "a", "_", "x.", "-", " ", "  ", "\t", "\n", "\n\n", "\n \n", "\x0b", "\x1c",
+          "\x00", "é", "　", "\u0085", "# Title", "1. Intro", "A | B | C"]
+
+
+def _fuzz_texts(n, seed=0):
+    rng = random.Random(seed)
+    for _ in range(n):
+        yield "".join(rng.choice(_ATOMS) for _ in range(rng.randint(0, 60)))
+
+
+def test_count_tokens_is_words_plus_punctuation():
+    punct = re.compile(r"[^\w\s]")
+    for text in _fuzz_texts(5_000):
+        assert count_tokens(text) == len(text.split()) + len(punct.findall(text))
+        cut = len(text) // 3
+        assert count_tokens(text, cut, len(text) - 1) == count_tokens(text[cut:len(text) - 1])
+
+
+def test_blocks_are_trimmed_blank_line_separated():
+    sep = re.compile(r"\n[ \t]*\n\s*")
+    for text in _fuzz_texts(5_000, seed=1):
+        expected = []
+        pos = 0
+        for m in list(sep.finditer(text)) + [None]:
+            stop = m.start() if m else len(text)
+            part = text[pos:stop]
+            lead = len(part) - len(part.lstrip())
+            body = part.strip()
+            if body:
+                expected.append((pos + lead, pos + lead + len(body)))
+            if m:
+                pos = m.end()
+        assert [m.span() for m in chunking._BLOCK_RE.finditer(text)] == expected
+
+
+def test_pages_within_budget_chunk_as_when_counted(monkeypatch):
+    pages = ["\n\n".join(_fuzz_texts(8, seed=s)).strip() for s in range(40)]
+    text = "\n\n".join(pages)
+    fast = chunk_document(text, pages, max_tokens=200, overlap_tokens=20)
+    monkeypatch.setattr(chunking, "_FITS_CHARS_PER_TOKEN", 0)
+    assert fast == chunk_document(text, pages, max_tokens=200, overlap_tokens=20)
@@ -0,0 +1,81 @@
+"""clean_raw_text / clean_text against the per-step regex chains they replaced."""
+import random
+import re
+import unicodedata
+
+from agent.document_processing.cleaning import clean_raw_text, clean_text, strip_boilerplate
+
+_BOILERPLATE = re.compile(
+    r"(all rights reserved|confidential and proprietary|this document is|"
+    r"page \d+ of \d+|printed on|do not distribute|internal use only|"
+    r"footer|header|table of contents)",
+    re.IGNORECASE,
+)
+
+
+def reference_raw(text):
+    text = re.sub(r"\r\n", "\n", text)
+    text = re.sub(r"\r", "\n", text)
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+def reference_clean(text):
+    text = unicodedata.normalize("NFKC", text)
+    text = text.replace("\x00", "").replace("\ufffd", "?")
+    text = re.sub(r"[^\x09\x0A\x0D\x20-\x7E\x80-\xFF\u0100-\uffff]", " ", text)
+    text = re.sub(r"\r\n?", "\n", text)
+    text = re.sub(r"([!?.]){3,}", r"\1\1\1", text)
+    text = re.sub(r"[ \t]{2,}", " ", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return "\n".join(line for line in text.split("\n") if not _BOILERPLATE.search(line)).strip()
+
+
+_ATOMS = [
+    " ", " ", "  ", "\t", "\n", "\n", "\r", "\r\n", "!", "?", ".", "...", "!?",
+    "\x00", "\x01", "\x0b", "\x1c", "\x1f", "\x7f", "\x85", "\xa0",
+    "\u1680", "\u2003", "\u2028", "\u3000", "\ufffd", "\ufb01", "\u2026", "\u2460",
+    "\U0001f600", "\U00020000", "\U0001d400",
+    "\u0130", "\u0131", "\u017f", "\u212a", "\xe9", "e\u0301",
+    "word", "Invoice", "42", "Footer", "HEADER", "Page 3 of 9", "pr\u0131nted on", "all rights reserved",
+]
+
+
+def _fuzz(count, seed):
+    rng = random.Random(seed)
+    return ["".join(rng.choice(_ATOMS) for _ in range(rng.randint(0, 24))) for _ in range(count)]
+
+
+def test_clean_raw_text_matches_reference():
+    mismatches = [t for t in _fuzz(20_000, 1) if clean_raw_text(t) != reference_raw(t)]
+    assert not mismatches, mismatches[:5]
+
+
+def test_clean_text_matches_reference():
+    mismatches = [t for t in _fuzz(20_000, 2) if clean_text(t, boilerplate=True) != reference_clean(t)]
+    assert not mismatches, mismatches[:5]
+
+
+def test_pipeline_order_matches_reference():
+    # EXTRACT's rule, then NORMALIZE's, as the two stages run them
+    mismatches = [t for t in _fuzz(20_000, 3)
+                  if clean_text(clean_raw_text(t), boilerplate=True) != reference_clean(reference_raw(t))]
+    assert not mismatches, mismatches[:5]
+
+
+def test_boilerplate_flag_equals_strip_after():
+    for text in _fuzz(2_000, 4):
+        assert strip_boilerplate(clean_text(text)) == clean_text(text, boilerplate=True)
+
+
+def test_raw_text_keeps_characters():
+    text = "Math \U0001d400 emoji \U0001f600 rare \U00020000 ligature \ufb01 nbsp\xa0x \x85"
+    assert clean_raw_text(text) == text.strip()
+
+
+def test_raw_text_idempotent_and_joinable():
+    pieces = [p for p in map(clean_raw_text, _fuzz(2_000, 5)) if p]
+    for a, b in zip(pieces, pieces[1:]):
+        assert clean_raw_text(a) == a
+        assert clean_raw_text(a + "\n\n" + b) == a + "\n\n" + b
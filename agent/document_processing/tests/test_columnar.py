@@ -0,0 +1,50 @@
+import io
+
+import pytest
+
+from agent.document_processing import columnar
+
+pa = pytest.importorskip("pyarrow")
+feather = pytest.importorskip("pyarrow.feather")
+
+
+def _feather(rows, chunksize, compression="lz4"):
+    table = pa.table({"id": list(range(rows)), "name": [f"row {i}" for i in range(rows)]})
+    sink = io.BytesIO()
+    feather.write_feather(table, sink, compression=compression, chunksize=chunksize)
+    return sink.getvalue()
+
+
+@pytest.mark.parametrize("compression", ["lz4", "zstd", "uncompressed"])
+@pytest.mark.parametrize("rows, chunksize", [(10_000, 1_500), (7, 1_000), (0, 1_000)])
+def test_batch_rows_come_from_the_footer(compression, rows, chunksize):
+    data = _feather(rows, chunksize, compression)
+    reader = pa.ipc.open_file(pa.BufferReader(data))
+    expected = [reader.get_batch(i).num_rows for i in range(reader.num_record_batches)]
+    assert columnar._ipc_batch_rows(columnar.arrow_source(data)) == expected
+
+
+def test_batches_outside_the_sample_are_not_read(monkeypatch):
+    data = _feather(10_000, 500)
+    read = []
+    real_open = pa.ipc.open_file
+
+    class Reader:
+        def __init__(self, reader):
+            self._reader = reader
+
+        def __getattr__(self, name):
+            return getattr(self._reader, name)
+
+        def get_batch(self, i):
+            read.append(i)
+            return self._reader.get_batch(i)
+
+    monkeypatch.setattr(pa.ipc, "open_file", lambda *a, **kw: Reader(real_open(*a, **kw)))
+    info = columnar.read_feather(columnar.arrow_source(data))
+    assert info.row_count == 10_000 and info.row_groups == [500] * 20
+    assert sorted(set(read)) == [i for i, _ in columnar.sample_plan(info.row_groups)]
+
+
+def test_unexpected_layout_falls_back():
+    assert columnar._ipc_batch_rows(columnar.arrow_source(b"not an arrow file, ARROW1")) is None
@@ -0,0 +1,39 @@
+import io
+import zipfile
+
+import pytest
+
+from agent.document_processing.extract import extract_document
+
+
+def _zip(members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, data in members:
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+def test_zip_pages_numbered_consecutively():
+    inner = _zip([("a.txt", b"alpha text in the inner archive\n"), ("b.txt", b"beta text\n")])
+    outer = _zip([("notes.txt", b"top level notes\n"), ("inner.zip", inner)])
+    result = extract_document(outer, "f1", "bundle.zip")
+
+    numbers = [p.page_number for p in result.pages]
+    assert numbers == list(range(1, len(numbers) + 1))
+    assert result.metadata["members"][-1]["last_page"] == numbers[-1]
+    assert {span.page for span in result.chunk_spans} <= set(numbers)
+    for span in result.chunk_spans:
+        page = result.pages[span.page - 1]
+        assert result.raw_text[span.start:span.end].split()[0] in page.text
+
+
+@pytest.mark.parametrize("name, head, kind", [
+    ("backup.7z", b"7z\xbc\xaf\x27\x1c\x00\x04", "7z"),
+    ("backup.rar", b"Rar!\x1a\x07\x01\x00", "rar"),
+])
+def test_unstreamable_archive_succeeds_with_warning(name, head, kind):
+    result = extract_document(head + b"\x00" * 64, "f1", name)
+    assert result.success and not result.errors
+    assert result.metadata["archive_type"] == kind
+    assert any("not extracted" in w for w in result.warnings)
@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+from agent.document_processing.dedup_registry import (
+    DuplicateRegistry, MemoryDuplicateRegistry, SQLiteDuplicateRegistry,
+)
+
+
+def test_interface_is_abstract():
+    with pytest.raises(TypeError):
+        DuplicateRegistry()
+
+    class LookupOnly(DuplicateRegistry):
+        def lookup(self, sha256):
+            return None
+
+    with pytest.raises(TypeError):
+        LookupOnly()
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_backends_round_trip(backend, tmp_path):
+    if backend == "memory":
+        registry = MemoryDuplicateRegistry()
+    else:
+        registry = SQLiteDuplicateRegistry(tmp_path / "dup.sqlite3")
+    registry.register_many([("a" * 64, "f1"), ("b" * 64, "f2")])
+    assert registry.lookup("a" * 64) == "f1"
+    assert registry.lookup_many(["a" * 64, "c" * 64]) == {"a" * 64: "f1"}
+
+
+@pytest.mark.parametrize("batch", [False, True])
+def test_cached_hit_expires_with_the_row(batch, tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: clock[0])
+    path = tmp_path / "dup.sqlite3"
+    SQLiteDuplicateRegistry(path, ttl_seconds=10).register("a" * 64, "f1")
+
+    clock[0] += 9  # one second left on the row
+    reader = SQLiteDuplicateRegistry(path, ttl_seconds=10)  # empty LRU: the hit comes from the DB
+    if batch:
+        assert reader.lookup_many(["a" * 64]) == {"a" * 64: "f1"}
+    else:
+        assert reader.lookup("a" * 64) == "f1"
+
+    clock[0] += 2
+    assert reader.lookup("a" * 64) is None
+    assert reader.lookup_many(["a" * 64]) == {}
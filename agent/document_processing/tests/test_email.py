@@ -0,0 +1,71 @@
+from email import message_from_bytes, policy
+from email.message import EmailMessage
+
+from agent.document_processing import extract
+from agent.document_processing.extract import extract_document
+
+MESSAGE = b"""From: a@example.com
+To: b@example.com
+Subject: Quarterly numbers
+MIME-Version: 1.0
+Content-Type: multipart/mixed; boundary="XX"
+
+--XX
+Content-Type: text/plain; charset="x-unknown"
+Content-Transfer-Encoding: 8bit
+
+Caf\xe9 totals are attached.
+--XX
+Content-Type: text/plain
+Content-Disposition: attachment; filename="totals.txt"
+
+Revenue 1200
+--XX--
+"""
+
+
+def test_unknown_charset_keeps_body_and_attachments():
+    result = extract_document(MESSAGE, "m1", "q.eml")
+    assert result.success, result.errors
+    assert "totals are attached" in result.raw_text
+    assert "Revenue 1200" in result.raw_text
+    assert any("x-unknown" in w for w in result.warnings)
+
+
+def test_declared_charset_is_used():
+    message = MESSAGE.replace(b"x-unknown", b"iso-8859-1")
+    result = extract_document(message, "m2", "q.eml")
+    assert "Café totals" in result.raw_text
+    assert not any("charset" in w for w in result.warnings)
+
+
+def _forward(inner: bytes, subject: str) -> bytes:
+    outer = EmailMessage()
+    outer["Subject"] = subject
+    outer.set_content("See the forwarded message.")
+    outer.add_attachment(message_from_bytes(inner, policy=policy.default))
+    return outer.as_bytes()
+
+
+def test_forwarded_message_is_extracted():
+    result = extract_document(_forward(MESSAGE, "Fwd"), "m3", "fwd.eml")
+    assert result.success, result.errors
+    assert result.metadata["attachments"] == ["Quarterly numbers.eml"]
+    assert "Revenue 1200" in result.raw_text
+
+
+def test_forwarded_messages_count_against_the_member_limit(monkeypatch):
+    monkeypatch.setattr(extract, "ARCHIVE_MAX_MEMBERS", 2)
+    data = MESSAGE
+    for depth in range(4):
+        data = _forward(data, f"Fwd {depth}")
+    result = extract_document(data, "m4", "chain.eml")
+    assert any("member limit of 2" in w for w in result.warnings)
+    assert "Revenue 1200" not in result.raw_text
+
+
+def test_oversized_forwarded_message_is_skipped(monkeypatch):
+    monkeypatch.setattr(extract, "EMAIL_MAX_ATTACHMENT_BYTES", 100)
+    result = extract_document(_forward(MESSAGE, "Fwd"), "m5", "fwd.eml")
+    assert any("attachment limit" in w for w in result.warnings)
+    assert "Revenue 1200" not in result.raw_text
@@ -0,0 +1,105 @@
+import hashlib
+import io
+import threading
+
+import pytest
+
+from agent.document_processing import ingest, temp_store
+from agent.document_processing.dedup_registry import MemoryDuplicateRegistry
+
+
+class FailingUpload(io.RawIOBase):
+    """Serves ``good`` blocks of data, then fails like a dropped connection."""
+
+    def __init__(self, good):
+        self.good = good
+
+    def readable(self):
+        return True
+
+    def read(self, n=-1):
+        if self.good == 0:
+            raise ConnectionResetError("client went away")
+        self.good -= 1
+        return b"x" * n
+
+
+def _hash_threads():
+    return [t for t in threading.enumerate() if t.name.startswith("hash-")]
+
+
+def test_failed_spool_stops_hashers_and_removes_file(tmp_path):
+    dest = tmp_path / "upload.bin"
+    with pytest.raises(ConnectionResetError):
+        ingest._spool_to_temp(FailingUpload(good=3), dest, max_size_bytes=1 << 30)
+    assert not dest.exists()
+    assert not _hash_threads()
+
+
+def test_spool_hashes_and_keeps_file(tmp_path):
+    dest = tmp_path / "upload.bin"
+    data = b"y" * (3 * ingest.INGEST_CHUNK_BYTES)
+    spool = ingest._spool_to_temp(data, dest, max_size_bytes=1 << 30)
+    assert dest.read_bytes() == data and spool.size == len(data) and not spool.oversize
+    assert spool.sha256 == hashlib.sha256(data).hexdigest()
+    assert not _hash_threads()
+
+
+class CountingRegistry(MemoryDuplicateRegistry):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def lookup_many(self, hashes):
+        hashes = list(hashes)
+        self.batches.append(len(hashes))
+        return super().lookup_many(hashes)
+
+
+@pytest.fixture
+def bulk(tmp_path, monkeypatch):
+    registry = CountingRegistry()
+    monkeypatch.setattr(temp_store, "TEMP_STORE_DIR", tmp_path / "store")
+    monkeypatch.setattr(ingest, "get_duplicate_registry", lambda: registry)
+    return registry
+
+
+def _ingest_many(sources, **kw):
+    return list(ingest.ingest_many(sources, skip_scan=True, **kw))
+
+
+def test_bulk_commits_in_batches_and_flags_in_batch_duplicates(bulk, monkeypatch):
+    monkeypatch.setattr(ingest, "BULK_COMMIT_MAX_WAIT_SECONDS", 5.0)
+    sources = [(b"same content\n", "a.txt"), (b"same content\n", "b.txt")]
+    sources += [(b"file %d\n" % i, f"f{i}.txt") for i in range(10)]
+    results = _ingest_many(sources, max_workers=2)
+
+    assert bulk.batches == [12]
+    dups = [r for r in results if r.is_duplicate]
+    assert len(dups) == 1
+    original = next(r for r in results if r.original_filename in ("a.txt", "b.txt") and not r.is_duplicate)
+    assert dups[0].duplicate_of == original.file_id
+
+
+def test_bulk_expands_directories_and_counts(bulk, tmp_path):
+    src = tmp_path / "src"
+    (src / "sub").mkdir(parents=True)
+    (src / "one.txt").write_bytes(b"one\n")
+    (src / "sub" / "two.txt").write_bytes(b"two two\n")
+    (src / "sub" / "copy.txt").write_bytes(b"one\n")
+    (src / "empty.txt").write_bytes(b"")
+    stats = ingest.BulkIngestStats()
+    results = _ingest_many([src, (b"three\n", "three.txt")], stats=stats)
+
+    assert sorted(r.original_filename for r in results) == ["copy.txt", "empty.txt", "one.txt", "three.txt", "two.txt"]
+    assert (stats.files, stats.succeeded, stats.failed, stats.duplicates) == (5, 4, 1, 1)
+    assert stats.bytes_ingested == 4 + 8 + 4 + 6
+    assert stats.elapsed_seconds > 0
+
+
+def test_bulk_closed_early_leaves_no_spool_files(bulk, tmp_path):
+    gen = ingest.ingest_many(((b"doc %d\n" % i, f"d{i}.txt") for i in range(50)),
+                             max_workers=4, skip_scan=True)
+    next(gen)
+    gen.close()
+    assert not list((tmp_path / "store").glob("*.part"))
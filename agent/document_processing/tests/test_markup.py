@@ -0,0 +1,36 @@
+import pytest
+
+from agent.document_processing.extract import extract_document
+
+FILLER = "<p>" + "plain ascii filler text " * 40 + "</p>\n"
+TAIL = "<p>Café €100 naïve</p>"
+
+
+def _page(head_markup):
+    body = FILLER * 100 + TAIL  # the accented text sits past the first 64 KB
+    return f"<html><head>{head_markup}<title>t</title></head><body>{body}</body></html>".encode("cp1252")
+
+
+@pytest.mark.parametrize("head_markup", [
+    '<meta charset="windows-1252">',
+    '<meta http-equiv="Content-Type" content="text/html; charset=windows-1252">',
+    '<meta charset="iso-8859-1">',  # means windows-1252 in HTML
+])
+def test_declared_charset_wins(head_markup):
+    result = extract_document(_page(head_markup), "h1", "page.html")
+    assert "Café €100 naïve" in result.raw_text
+    assert result.metadata["encoding"] == "cp1252"
+    assert result.metadata["encoding_source"] == "meta"
+
+
+def test_undeclared_charset_detected_from_whole_document():
+    result = extract_document(_page(""), "h2", "page.html")
+    assert "Café" in result.raw_text and "naïve" in result.raw_text
+    assert result.metadata["encoding_source"] != "meta"
+
+
+def test_unknown_declaration_ignored():
+    page = f"<html><head><meta charset='x-bogus'></head><body>{FILLER * 100}{TAIL}</body></html>"
+    result = extract_document(page.encode("utf-8"), "h3", "page.html")
+    assert "Café €100 naïve" in result.raw_text
+    assert result.metadata["encoding_source"] != "meta"
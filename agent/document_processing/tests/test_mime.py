@@ -0,0 +1,39 @@
+import struct
+
+import pytest
+
+from agent.document_processing.extract import resolve_extension
+from agent.document_processing.mime import detect_mime
+
+
+def _bmp(width=2, height=2):
+    pixels = b"\x00" * (4 * height * width)
+    dib = struct.pack("<IiiHHIIiiII", 40, width, height, 1, 32, 0, len(pixels), 2835, 2835, 0, 0)
+    return b"BM" + struct.pack("<IHHI", 14 + len(dib) + len(pixels), 0, 0, 14 + len(dib)) + dib + pixels
+
+
+@pytest.mark.parametrize("filename, data", [
+    ("cars.csv", b"BMW,Model,Year\nBMW,320i,2019\n"),
+    ("notes.txt", b"BMI is weight over height squared.\n"),
+])
+def test_text_starting_with_bm_is_not_bmp(filename, data):
+    mime = detect_mime(data, filename)
+    assert mime != "image/bmp"
+    assert resolve_extension(filename, mime) == filename[filename.rindex("."):]
+
+
+def test_real_bmp_detected():
+    assert detect_mime(_bmp(), "picture") == "image/bmp"
+    assert resolve_extension("scan.txt", detect_mime(_bmp(), "scan.txt")) == ".bmp"
+
+
+def test_weak_signature_does_not_override_text_extension():
+    data = b"\x1f\x8b not really gzip\n"
+    assert detect_mime(data, "log.txt") == "application/gzip"
+    assert resolve_extension("log.txt", "application/gzip") == ".txt"
+    assert resolve_extension("log.bin", "application/gzip") == ".gz"
+
+
+def test_strong_signature_overrides_text_extension():
+    assert resolve_extension("report.txt", detect_mime(b"%PDF-1.7\n", "report.txt")) == ".pdf"
+    assert resolve_extension("image.csv", detect_mime(b"\x89PNG\r\n\x1a\n" + b"\x00" * 16, "image.csv")) == ".png"
@@ -0,0 +1,41 @@
+from agent.document_processing import ocr
+
+
+class FakeApi:
+    def __init__(self, osd):
+        self.osd = osd
+        self.cleared = False
+
+    def SetImage(self, img):
+        pass
+
+    def Recognize(self):
+        pass
+
+    def GetUTF8Text(self):
+        return "Invoice INV-1001"
+
+    def MeanTextConf(self):
+        return 91
+
+    def DetectOrientationScript(self):
+        if isinstance(self.osd, Exception):
+            raise self.osd
+        return self.osd
+
+    def Clear(self):
+        self.cleared = True
+
+
+def test_osd_failure_keeps_text():
+    api, result = FakeApi(RuntimeError("osd.traineddata not found")), ocr.OcrResult()
+    ocr._run_tesserocr(api, None, result)
+    assert result.text == "Invoice INV-1001" and result.confidence == 0.91
+    assert result.orientation is None and result.engine == "tesserocr"
+    assert api.cleared
+
+
+def test_osd_fills_orientation():
+    api, result = FakeApi({"orient_deg": 90, "orient_conf": 4.5, "script_name": "Latin"}), ocr.OcrResult()
+    ocr._run_tesserocr(api, None, result)
+    assert (result.orientation, result.orientation_confidence, result.script) == (90, 4.5, "Latin")
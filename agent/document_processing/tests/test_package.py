@@ -0,0 +1,14 @@
+import agent.document_processing as dp
+
+
+def test_dir_lists_only_the_public_api():
+    names = dir(dp)
+    assert set(dp.__all__) <= set(names)
+    for name in ("Any", "List", "TYPE_CHECKING", "importlib", "annotations", "pipeline", "extract"):
+        assert name not in names
+    assert all(n in dp.__all__ or (n.startswith("__") and n.endswith("__")) for n in names)
+
+
+def test_exports_resolve():
+    assert dp.ExtractionResult.__module__ == "agent.document_processing.extract"
+    assert "ExtractionResult" in dir(dp)
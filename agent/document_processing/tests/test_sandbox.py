@@ -0,0 +1,108 @@
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from agent.document_processing import sandbox
+from agent.document_processing.extract import extract_document
+
+pytestmark = pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods() or not os.path.exists("/proc/self/status"),
+    reason="needs fork and /proc",
+)
+
+
+def _fake_extract(data, file_id, filename, mime_type="", source_path=None):
+    """Behaves according to the filename; otherwise a real text extraction tagged with the worker pid."""
+    if filename == "sleep.txt":
+        time.sleep(60)
+    elif filename == "hog.txt":
+        hog = bytearray(1024 * 1024 * 1024)
+        del hog
+    elif filename == "crash.txt":
+        os._exit(3)
+    result = extract_document(data, file_id, filename, mime_type, source_path)
+    result.metadata["pid"] = os.getpid()
+    return result
+
+
+def _vm_mb():
+    with open("/proc/self/status") as fh:
+        for line in fh:
+            if line.startswith("VmSize:"):
+                return int(line.split()[1]) // 1024
+    return 0
+
+
+@pytest.fixture
+def make_sandbox(monkeypatch):
+    monkeypatch.setattr(sandbox, "extract_document", _fake_extract)
+    started = []
+
+    def make(**kw):
+        kw.setdefault("workers", 1)
+        kw.setdefault("timeout", 30)
+        kw.setdefault("memory_mb", 0)
+        box = sandbox.ExtractorSandbox(start_method="fork", **kw)
+        started.append(box)
+        return box
+
+    yield make
+    for box in started:
+        box.shutdown()
+
+
+def _extract(box, name, **kw):
+    return box.extract(b"some plain text\n", "f1", name, "text/plain", **kw)
+
+
+def test_worker_is_reused(make_sandbox):
+    box = make_sandbox()
+    first, second = _extract(box, "a.txt"), _extract(box, "b.txt")
+    assert first.success and second.success and "plain text" in second.raw_text
+    assert first.metadata["pid"] == second.metadata["pid"] != os.getpid()
+
+
+def test_timeout_kills_and_replaces_worker(make_sandbox):
+    box = make_sandbox()
+    pid = _extract(box, "a.txt").metadata["pid"]
+    result = _extract(box, "sleep.txt", timeout=0.5)
+
+    assert not result.success
+    assert any("timed out" in e for e in result.errors)
+    info = result.metadata["sandbox"]
+    assert info["outcome"] == "timeout" and info["exit_code"] == -9 and info["timeout_seconds"] == 0.5
+    after = _extract(box, "a.txt")
+    assert after.success and after.metadata["pid"] != pid
+    assert box.stats()["timeouts"] == 1
+
+
+def test_memory_cap_fails_document_and_replaces_worker(make_sandbox):
+    box = make_sandbox(memory_mb=_vm_mb() + 300)
+    pid = _extract(box, "a.txt").metadata["pid"]
+    result = _extract(box, "hog.txt")
+
+    assert not result.success
+    assert any("memory limit" in e for e in result.errors)
+    assert result.metadata["sandbox"]["outcome"] == "memory"
+    assert _extract(box, "a.txt").metadata["pid"] != pid
+    assert box.stats()["memory_failures"] == 1
+
+
+def test_crash_is_reported_with_exit_code(make_sandbox):
+    box = make_sandbox()
+    result = _extract(box, "crash.txt")
+
+    assert not result.success
+    assert result.metadata["sandbox"]["outcome"] == "crashed"
+    assert result.metadata["sandbox"]["exit_code"] == 3
+    assert any("exit code 3" in e for e in result.errors)
+    assert _extract(box, "a.txt").success
+
+
+def test_worker_recycled_after_max_documents(make_sandbox):
+    box = make_sandbox(max_documents=2)
+    pids = [_extract(box, f"{i}.txt").metadata["pid"] for i in range(5)]
+    assert pids[0] == pids[1] != pids[2] == pids[3] != pids[4]
+    assert box.stats()["recycled"] == 2
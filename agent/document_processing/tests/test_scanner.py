@@ -0,0 +1,83 @@
+import hashlib
+
+import pytest
+
+from agent.document_processing.scanner import ClamdPool, MalwareScanner
+
+from .fake_clamd import EICAR_SIGNATURE, FakeClamdServer
+
+INFECTED = b"X5O!P%@AP[4\\PZX54(P^)7CC)7}$" + EICAR_SIGNATURE + b"!$H+H*"
+
+
+def _sha(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+@pytest.fixture
+def clamd(tmp_path):
+    with FakeClamdServer(str(tmp_path / "clamd.sock")) as server:
+        yield server
+
+
+@pytest.fixture
+def scanner(clamd):
+    scanner = MalwareScanner(ClamdPool(clamd.address, size=2, timeout=5), workers=2)
+    yield scanner
+    scanner.shutdown()
+
+
+def test_clean(scanner):
+    assert scanner.scan(b"quarterly report", _sha(b"quarterly report")) == ("clean", "ClamAV scan passed")
+
+
+def test_infected(scanner):
+    assert scanner.scan(INFECTED, _sha(INFECTED)) == ("threat_found", "Eicar-Test-Signature")
+
+
+def test_path_and_file_sources(scanner, tmp_path):
+    path = tmp_path / "doc.bin"
+    path.write_bytes(INFECTED)
+    assert scanner.scan(str(path), "")[0] == "threat_found"
+    with open(path, "rb") as fh:
+        assert scanner.scan(fh, "")[0] == "threat_found"
+
+
+def test_timeout_is_skipped_and_not_cached(tmp_path):
+    with FakeClamdServer(str(tmp_path / "slow.sock"), delay=1.0) as server:
+        scanner = MalwareScanner(ClamdPool(server.address, timeout=0.2), workers=1)
+        try:
+            status, detail = scanner.scan(b"slow", _sha(b"slow"))
+            assert status == "skipped"
+            assert "timed out" in detail
+            assert scanner.cached_verdict(_sha(b"slow")) is None
+        finally:
+            scanner.shutdown()
+
+
+def test_unreachable_is_skipped(tmp_path):
+    scanner = MalwareScanner(ClamdPool(f"unix:{tmp_path / 'missing.sock'}"), workers=1)
+    try:
+        assert scanner.scan(b"x", _sha(b"x")) == ("skipped", "Antivirus unavailable; hash-list check passed")
+    finally:
+        scanner.shutdown()
+
+
+def test_pool_reuses_session(clamd, scanner):
+    for i in range(5):
+        data = f"document {i}".encode()
+        assert scanner.scan(data, _sha(data))[0] == "clean"
+    assert clamd.scanned == 5
+    assert clamd.connections == 1
+
+
+def test_verdict_cache(clamd, scanner):
+    sha = _sha(INFECTED)
+    scanner.scan(INFECTED, sha)
+    assert scanner.submit(INFECTED, sha).result()[0] == "threat_found"
+    assert clamd.scanned == 1
+
+
+def test_submit_runs_concurrently_within_pool_size(clamd, scanner):
+    futures = [scanner.submit(f"doc {i}".encode(), _sha(f"doc {i}".encode())) for i in range(6)]
+    assert [f.result(timeout=10)[0] for f in futures] == ["clean"] * 6
+    assert clamd.connections <= 2
@@ -0,0 +1,90 @@
+import os
+import stat
+
+import pytest
+
+from agent.document_processing import normalize, pipeline, temp_store
+from agent.document_processing.stage_cache import StageCache
+
+TEXT = (b"Invoice number INV-1001 from Acme Corporation dated 2024-03-05.\n"
+        b"Total due: $1,200.00 payable within thirty days of receipt.\n")
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = StageCache(tmp_path / "cache" / "stage_cache.sqlite3")
+    monkeypatch.setattr(pipeline, "get_stage_cache", lambda: cache)
+    monkeypatch.setattr(normalize, "_SEEN_SIGNATURES", {})
+    return cache
+
+
+def _run(use_cache=True):
+    return pipeline.process_document(TEXT, "invoice.txt", user_id="u1", skip_scan=True, use_cache=use_cache)
+
+
+def _cached(result, stage):
+    return next(sr.cached for sr in result.stage_results if sr.stage == stage)
+
+
+def test_reupload_hit_still_detects_near_duplicate(cache):
+    first = _run()
+    assert first.normalize.near_duplicate_score == 0.0
+    assert "near_duplicate" not in first.metadata.processing_flags
+
+    second = _run()
+    assert _cached(second, "EXTRACT") and _cached(second, "NORMALIZE")
+    assert second.normalize.near_duplicate_score == 1.0
+    assert second.normalize.file_id == second.file_id
+    assert "near_duplicate" in second.metadata.processing_flags
+    assert any(first.file_id in w for w in second.normalize.warnings)
+
+
+def test_reupload_matches_uncached_run(cache, monkeypatch):
+    _run()
+    cached = _run()
+    monkeypatch.setattr(normalize, "_SEEN_SIGNATURES", {})
+    _run(use_cache=False)
+    uncached = _run(use_cache=False)
+    assert cached.normalize.near_duplicate_score == uncached.normalize.near_duplicate_score
+    assert cached.metadata.processing_flags == uncached.metadata.processing_flags
+
+
+def test_csv_spill_path_is_not_cached(cache, tmp_path, monkeypatch):
+    monkeypatch.setattr(temp_store, "TEMP_STORE_DIR", tmp_path / "store")
+    data = b"id,name\n" + b"".join(b"%d,row %d\n" % (i, i) for i in range(50))
+
+    first = pipeline.process_document(data, "rows.csv", user_id="u1", skip_scan=True)
+    spill = first.extract.metadata["spill_path"]
+    assert os.path.exists(spill) and spill.startswith(str(tmp_path / "store" / "spill"))
+    second = pipeline.process_document(data, "rows.csv", user_id="u1", skip_scan=True)
+    assert _cached(second, "EXTRACT")
+    assert "spill_path" not in second.extract.metadata
+    assert second.extract.metadata["row_count"] == 50
+
+
+def test_round_trip_and_miss(tmp_path):
+    cache = StageCache(tmp_path / "c" / "db.sqlite3")
+    cache.put("abc", "EXTRACT", "1", {"text": "hello"}, ".txt")
+    assert cache.get("abc", "EXTRACT", "1", ".txt") == {"text": "hello"}
+    assert cache.get("abc", "EXTRACT", "2", ".txt") is None
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions")
+def test_directory_is_private(tmp_path):
+    shared = tmp_path / "shared"
+    shared.mkdir(mode=0o777)
+    os.chmod(shared, 0o777)
+    cache = StageCache(shared / "db.sqlite3")
+    assert cache.available
+    assert stat.S_IMODE(os.stat(shared).st_mode) == 0o700
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions")
+def test_symlinked_directory_is_refused(tmp_path):
+    target = tmp_path / "elsewhere"
+    target.mkdir()
+    (tmp_path / "link").symlink_to(target)
+    cache = StageCache(tmp_path / "link" / "db.sqlite3")
+    assert not cache.available
+    cache.put("abc", "EXTRACT", "1", "value")
+    assert cache.get("abc", "EXTRACT", "1") is None
@@ -0,0 +1,20 @@
+import os
+import time
+
+from agent.document_processing import temp_store
+from agent.document_processing.extract import extract_document
+
+
+def test_csv_spills_live_in_the_store_and_expire(tmp_path, monkeypatch):
+    monkeypatch.setattr(temp_store, "TEMP_STORE_DIR", tmp_path / "store")
+    data = b"id,name\n" + b"".join(b"%d,row %d\n" % (i, i) for i in range(20))
+    result = extract_document(data, "f1", "rows.csv")
+
+    store = temp_store.get_temp_store()
+    spill = result.metadata["spill_path"]
+    assert os.path.dirname(spill) == str(store.spill_dir)
+    assert store._janitor is not None and store._janitor.is_alive()
+
+    store.expire_due(now=time.time() + store.ttl_seconds + 1)
+    assert not os.path.exists(spill)
+    store.stop_janitor()
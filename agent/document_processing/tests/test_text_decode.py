@@ -0,0 +1,53 @@
+import random
+from functools import partial
+
+import pytest
+
+from agent.document_processing import charset, extract
+from agent.document_processing.cleaning import clean_raw_text
+
+_ATOMS = ["word", "end.", " ", "  ", "\t", "\n", "\n\n\n", "\r", "\r\n", "\xa0", "\x85", " ",
+          "caf\xe9", "\U0001f600", "\x00", "!!!!"]
+
+
+@pytest.mark.parametrize("chunk_bytes", [1, 3, 7, 64])
+def test_chunked_decode_equals_whole(monkeypatch, chunk_bytes):
+    monkeypatch.setattr(extract, "iter_decode", partial(charset.iter_decode, chunk_bytes=chunk_bytes))
+    rng = random.Random(chunk_bytes)
+    for _ in range(1_000):
+        text = "".join(rng.choice(_ATOMS) for _ in range(rng.randint(0, 40)))
+        data = text.encode("utf-8")
+        got, guess, _ = extract._decode_text(data)
+        assert got == clean_raw_text(data.decode(guess.encoding, "replace")), repr(text)
+
+
+def _track_pending(monkeypatch, chunk_bytes):
+    monkeypatch.setattr(extract, "iter_decode", partial(charset.iter_decode, chunk_bytes=chunk_bytes))
+    sizes = []
+    real_cut = extract._clean_cut
+
+    def cut(text):
+        sizes.append(len(text))
+        return real_cut(text)
+
+    monkeypatch.setattr(extract, "_clean_cut", cut)
+    return sizes
+
+
+def test_prose_is_cut_every_chunk(monkeypatch):
+    sizes = _track_pending(monkeypatch, 4096)
+    prose = "The total was paid in full.\nSee the attached statement.\n" * 20_000
+    text, _, _ = extract._decode_text(prose.encode())
+    assert text == clean_raw_text(prose)
+    assert max(sizes) < 2 * 4096
+
+
+def test_whitespace_run_carry_stays_small(monkeypatch):
+    sizes = _track_pending(monkeypatch, 1024)
+    data = b"x" + b" \t" * 100_000 + b"\r\n" * 100_000 + b"y"
+    text, _, _ = extract._decode_text(data)
+    assert text == "x \n\ny"
+    data = b"x" + b" \r\n\t" * 100_000 + b"y"
+    text, _, _ = extract._decode_text(data)
+    assert text == clean_raw_text(data.decode())
+    assert max(sizes) < 2 * 1024